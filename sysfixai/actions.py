@@ -0,0 +1,248 @@
+"""Fix actions planned as a dependency graph and executed concurrently where they do
+not conflict."""
+
+import subprocess
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from sysfixai import trace
+from sysfixai.settings import ACTION_PARALLELISM, ACTION_TIMEOUT
+
+Action = namedtuple(
+    "Action",
+    ["name", "command", "func", "reads", "writes", "after", "timeout"],
+    defaults=(None, None, frozenset(), frozenset(), (), ACTION_TIMEOUT),
+)
+Action.__doc__ = """One remediation step: an argv `command` or an in-process `func`.
+
+reads and writes name the resources the step touches ("processes",
+"packages", "disk", "terminal"...); two steps conflict when one writes a
+resource the other reads or writes. after lists action names that must
+succeed first. name identifies the action, so repeated recommendations
+collapse into one step. timeout is in seconds (None for no limit, e.g.
+interactive steps). Commands that write "terminal" run attached to it, with
+their output shown as it happens, so prompts such as sudo's are visible.
+Output of a `func` is never captured, so a func that prints or prompts must
+write "terminal" too.
+"""
+
+ActionResult = namedtuple(
+    "ActionResult", ["name", "status", "returncode", "output", "elapsed"]
+)
+ActionResult.__doc__ = """Outcome of an action; status is "ok", "failed", "timeout",
+"error" or "skipped"."""
+
+
+def conflicts(a, b):
+    """Return True if the two actions may not run at the same time."""
+    return bool(a.writes & (b.reads | b.writes) or b.writes & a.reads)
+
+
+def build_plan(actions):
+    """
+    Deduplicate actions by name and order them into a DAG.
+    Explicit `after` edges are honoured first. Of two conflicting actions,
+    the one earlier in that order runs first. Dependencies on actions that are
+    not in the plan are ignored.
+    Returns:
+        tuple: (ordered list of actions, {name: set of names it waits for})
+    Raises:
+        ValueError: If the `after` edges form a cycle.
+    """
+    unique = {}
+    for action in actions:
+        unique.setdefault(
+            action.name,
+            action._replace(
+                reads=frozenset(action.reads), writes=frozenset(action.writes)
+            ),
+        )
+    ordered = []
+    state = {}
+
+    def visit(action, path):
+        if state.get(action.name) == "done":
+            return
+        if state.get(action.name) == "visiting":
+            raise ValueError(
+                f"Cyclic action dependencies: {' -> '.join(path + [action.name])}"
+            )
+        state[action.name] = "visiting"
+        for name in action.after:
+            if name in unique:
+                visit(unique[name], path + [action.name])
+        state[action.name] = "done"
+        ordered.append(action)
+
+    for action in unique.values():
+        visit(action, [])
+    deps = {}
+    for position, action in enumerate(ordered):
+        deps[action.name] = {name for name in action.after if name in unique}
+        deps[action.name].update(
+            earlier.name for earlier in ordered[:position] if conflicts(earlier, action)
+        )
+    return ordered, deps
+
+
+def run_action(action):
+    """
+    Run one action, capturing command output unless it holds the terminal. Never raises.
+    """
+    started = time.monotonic()
+    capture = "terminal" not in action.writes
+    with trace.span(action.name, "action"):
+        try:
+            if action.command:
+                proc = subprocess.run(
+                    action.command,
+                    capture_output=capture,
+                    text=True,
+                    timeout=action.timeout,
+                )
+                status = "ok" if proc.returncode == 0 else "failed"
+                output = (proc.stdout + proc.stderr).strip() if capture else ""
+                return ActionResult(
+                    action.name,
+                    status,
+                    proc.returncode,
+                    output,
+                    time.monotonic() - started,
+                )
+            action.func()
+            return ActionResult(action.name, "ok", None, "", time.monotonic() - started)
+        except subprocess.TimeoutExpired as e:
+            output = (
+                e.stdout.decode(errors="replace")
+                if isinstance(e.stdout, bytes)
+                else (e.stdout or "")
+            )
+            return ActionResult(
+                action.name, "timeout", None, output.strip(), time.monotonic() - started
+            )
+        except Exception as e:
+            return ActionResult(
+                action.name, "error", None, str(e), time.monotonic() - started
+            )
+
+
+def execute_plan(actions, parallelism=ACTION_PARALLELISM, on_result=None):
+    """
+    Run actions as soon as everything they depend on has finished.
+    An action whose `after` dependency did not succeed is skipped. An in-process
+    action still running after its timeout is reported as timed out and left
+    to finish in the background; actions that depend on it, or conflict with
+    it, wait until its thread has actually finished. While an action holds the
+    terminal, on_result calls for other actions are held back until it ends.
+    Args:
+        actions (list): Action records, possibly with duplicates.
+        parallelism (int): Maximum actions running at once.
+        on_result (callable): Called with each ActionResult as it completes.
+    Returns:
+        list: ActionResult per unique action, in plan order.
+    """
+    ordered, deps = build_plan(actions)
+    if not ordered:
+        return []
+    results = {}
+    pending = list(ordered)
+    running = {}
+    lingering = {}  # timed-out in-process actions whose threads are still running
+    deadlines = {}
+    held = []
+
+    def finish(result):
+        results[result.name] = result
+        held.append(result)
+
+    def report():
+        if any("terminal" in action.writes for action in running.values()):
+            return
+        while held:
+            result = held.pop(0)
+            if on_result:
+                on_result(result)
+
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, min(parallelism, len(ordered))),
+        thread_name_prefix="sysfix-action",
+    )
+    try:
+        while pending or running:
+            blocked = {action.name for action in lingering.values()}
+            for action in list(pending):
+                if (
+                    not deps[action.name] <= results.keys()
+                    or deps[action.name] & blocked
+                ):
+                    continue
+                pending.remove(action)
+                failed = [
+                    name
+                    for name in action.after
+                    if name in deps and results[name].status != "ok"
+                ]
+                if failed:
+                    finish(
+                        ActionResult(
+                            action.name,
+                            "skipped",
+                            None,
+                            f"{', '.join(failed)} did not succeed",
+                            0.0,
+                        )
+                    )
+                    continue
+                running[pool.submit(run_action, action)] = action
+                if action.func and action.timeout is not None:
+                    deadlines[action.name] = time.monotonic() + action.timeout
+            report()
+            if not running and not lingering:
+                continue
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, min(deadlines.values()) - time.monotonic())
+            done, _ = wait(
+                list(running) + list(lingering),
+                timeout=timeout,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                if future in lingering:
+                    del lingering[future]
+                    continue
+                action = running.pop(future)
+                deadlines.pop(action.name, None)
+                finish(future.result())
+            now = time.monotonic()
+            for future, action in list(running.items()):
+                if action.name in deadlines and deadlines[action.name] <= now:
+                    del running[future]
+                    del deadlines[action.name]
+                    lingering[future] = action
+                    finish(
+                        ActionResult(action.name, "timeout", None, "", action.timeout)
+                    )
+            report()
+    finally:
+        pool.shutdown(wait=False)
+    report()
+    return [results[action.name] for action in ordered]
+
+
+def format_results(results, wall=None):
+    """Return printable summary lines for execute_plan results."""
+    lines = []
+    for result in results:
+        code = (
+            f" (exit {result.returncode})" if result.returncode not in (None, 0) else ""
+        )
+        lines.append(
+            f"{result.status:<8} {result.name:<32} {result.elapsed:7.2f}s{code}"
+        )
+    total = sum(result.elapsed for result in results)
+    ok = sum(result.status == "ok" for result in results)
+    summary = f"{ok}/{len(results)} actions succeeded ({total:.2f}s of action time"
+    lines.append(summary + (f", {wall:.2f}s wall)" if wall is not None else ")"))
+    return lines
@@ -0,0 +1,109 @@
+"""Incremental extraction of the actionable answer from streamed model output."""
+
+import re
+
+_ACTION_TAG = re.compile(r"<action>(.*?)</action>", re.I | re.S)
+_RECOMMENDATION = re.compile(
+    r"^[\s>*#\-]*(?:\*\*)?recommendation(?:\*\*)?\s*:\s*(?:\*\*)?\s*(.*)$", re.I
+)
+_FILLER = ("okay", "wait", "first")
+
+
+def _clean(text):
+    return text.strip().strip("*").strip()
+
+
+class AdviceStream:
+    """
+    Consume model output token by token and recognise the final advice early.
+
+    The advice is either the body of an <action>...</action> tag or the first
+    complete "Recommendation:" line outside <think> blocks (a bare
+    "**Recommendation:**" heading takes the next non-empty line). feed()
+    returns True as soon as one of them is complete, which is the caller's cue
+    to cancel generation; finish() falls back to the last substantial line for
+    answers that carry no marker.
+    """
+
+    def __init__(self):
+        self.advice = None
+        self._pending = ""
+        self._lines = []
+        self._thinking = False
+        self._heading = False
+
+    @property
+    def done(self):
+        return self.advice is not None
+
+    def feed(self, token):
+        """Add a fragment of output. Returns True once the advice is known."""
+        if self.advice is not None:
+            return True
+        self._pending += token
+        if "\n" in self._pending:
+            *lines, self._pending = self._pending.split("\n")
+            for line in lines:
+                self._line(line)
+                if self.advice is not None:
+                    return True
+        # An action tag counts as soon as it closes, without waiting for the newline.
+        if (
+            not self._thinking
+            and "</action>" in self._pending.lower()
+            and "<think>" not in self._pending
+        ):
+            self._line(self._pending)
+            self._pending = ""
+        return self.advice is not None
+
+    def _line(self, line):
+        if self._thinking:
+            if "</think>" not in line:
+                return
+            self._thinking = False
+            line = line.split("</think>", 1)[1]
+        if "<think>" in line:
+            before, after = line.split("<think>", 1)
+            self._thinking = "</think>" not in after
+            line = before if self._thinking else before + after.split("</think>", 1)[1]
+        if not line.strip():
+            return
+        match = _ACTION_TAG.search(line)
+        if match and _clean(match.group(1)):
+            self.advice = _clean(match.group(1))
+            return
+        if self._heading:
+            self.advice = _clean(line)
+            return
+        match = _RECOMMENDATION.match(line)
+        if match:
+            body = _clean(match.group(1))
+            if body:
+                self.advice = body
+            else:
+                self._heading = True
+            return
+        self._lines.append(line.strip())
+
+    def finish(self):
+        """
+        Flush the last partial line and return the advice, falling back to the last
+        substantial line.
+        """
+        if self.advice is None and self._pending:
+            pending, self._pending = self._pending, ""
+            self._line(pending)
+        if self.advice is not None:
+            return self.advice
+        for line in reversed(self._lines):
+            if len(line) > 10 and not line.lower().startswith(_FILLER):
+                return line
+        return self._lines[-1] if self._lines else ""
+
+
+def parse_advice(text):
+    """Return the final advice in a complete response (see AdviceStream)."""
+    stream = AdviceStream()
+    stream.feed(text)
+    return stream.finish() or text
@@ -1,57 +1,593 @@
 import subprocess
+import http.client
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from sysfixai import trace
+from sysfixai.advice import AdviceStream
+from sysfixai.cache import fingerprint, get_advice_cache
+from sysfixai.scheduler import InferenceCost, PressureGuard, get_scheduler
+from sysfixai.settings import ADVICE_MODES, AI_PARALLELISM, OLLAMA_HOST, split_host
 
-import subprocess
+MODEL_NAME = "lfm2.5-thinking"
+DONE_STATS = ("prompt_eval_count", "eval_count", "total_duration", "load_duration")
+KEEP_ALIVE = "30m"  # keep the model resident between queries
+READ_TIMEOUT = 120  # seconds without a token before the HTTP query gives up
+BATCH_SIZE = 8  # issues packed into one prompt in batch advice mode
+FIX_PROMPT_VERSION = 2  # bump when the fix prompts change, to invalidate cached advice
+
+FIX_GUIDANCE = (
+    "Do NOT recommend closing browsers or actively used programs unless you first ask "
+    "the user for confirmation, or unless the program is clearly idle or unresponsive. "
+    "If recommending to close a browser or other program, always warn the user and "
+    "suggest saving work first."
+)
+FIX_FORMAT = (
+    " Start your answer with a single line of the form"
+    ' "Recommendation: <the action to take>", then explain briefly.'
+)
+
+
+class OllamaError(Exception):
+    """Raised when the Ollama HTTP API returns an error or the stream breaks."""
+
+
+class OllamaUnavailable(OllamaError):
+    """Raised when no connection to the Ollama HTTP API can be made."""
 
-def query_lfm25_thinking(prompt: str) -> str:
+
+class OllamaClient:
+    """
+    Minimal client for the Ollama HTTP API.
+
+    Keep-alive connections are pooled and reused across queries, and
+    /api/generate responses are streamed so tokens can be shown as they arrive.
     """
-    Query the lfm2.5-thinking Ollama model locally via CLI.
+
+    def __init__(
+        self,
+        host=OLLAMA_HOST,
+        timeout=READ_TIMEOUT,
+        keep_alive=KEEP_ALIVE,
+        pool_size=AI_PARALLELISM,
+    ):
+        self.host, self.port = split_host(host)
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.pool_size = pool_size
+        self._pool = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        with self._lock:
+            if self._pool:
+                return self._pool.pop(), True
+        return (
+            http.client.HTTPConnection(self.host, self.port, timeout=self.timeout),
+            False,
+        )
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._pool) < self.pool_size:
+                self._pool.append(conn)
+                return
+        conn.close()
+
+    def reserve(self, count):
+        """
+        Keep up to count idle connections, so count concurrent queries can all reuse
+        theirs.
+        """
+        with self._lock:
+            self.pool_size = max(self.pool_size, count)
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            pool, self._pool = self._pool, []
+        for conn in pool:
+            conn.close()
+
+    def _request(self, method, path, payload=None, on_connect=None):
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        while True:
+            conn, reused = self._acquire()
+            try:
+                if on_connect:
+                    on_connect(conn)
+                conn.request(method, path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except (
+                http.client.RemoteDisconnected,
+                ConnectionResetError,
+                BrokenPipeError,
+            ):
+                conn.close()
+                if not reused:
+                    raise OllamaUnavailable("Ollama closed the connection")
+                # A pooled keep-alive connection went stale; retry on a fresh one.
+            except OSError as e:
+                conn.close()
+                raise OllamaUnavailable(
+                    f"Cannot reach Ollama at {self.host}:{self.port}: {e}"
+                ) from e
+
+    def _finish(self, conn, resp):
+        # Drain anything left so the connection can be reused.
+        resp.read()
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+    def loaded_models(self):
+        """
+        Return the names of the models Ollama holds in memory (empty if that cannot be
+        told).
+        """
+        try:
+            conn, resp = self._request("GET", "/api/ps")
+            body = resp.read()
+            self._finish(conn, resp)
+            models = json.loads(body).get("models", []) if resp.status == 200 else []
+        except (OllamaError, OSError, ValueError):
+            return set()
+        names = set()
+        for model in models:
+            name = model.get("name", "")
+            names.update((name, name.split(":")[0]))
+        return names
+
+    def generate(
+        self,
+        prompt,
+        model=MODEL_NAME,
+        on_token=None,
+        options=None,
+        format=None,
+        stop=None,
+        stats=None,
+    ):
+        """
+        Run a prompt through /api/generate and return the full response text.
+        Args:
+            prompt (str): The prompt to send.
+            model (str): Ollama model name.
+            on_token (callable): Called with each text fragment as it streams in.
+            options (dict): Extra Ollama model options.
+            format (str): Output format constraint, e.g. "json".
+            stop (callable): Called with each fragment; returning True cancels
+                generation (the connection is dropped, which makes Ollama stop).
+            stats (dict): If given, filled with the number of fragments, whether
+                generation was cancelled, and Ollama's final token counts and
+                durations (DONE_STATS) when it finishes.
+        Returns:
+            str: The concatenated response, up to the point of cancellation.
+        """
+        with trace.span(
+            "ollama /api/generate", "model", model=model, prompt_chars=len(prompt)
+        ):
+            return self._generate(
+                prompt,
+                model,
+                on_token,
+                options,
+                format,
+                stop,
+                {} if stats is None else stats,
+            )
+
+    def _generate(self, prompt, model, on_token, options, format, stop, stats):
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+        }
+        if options:
+            payload["options"] = options
+        if format:
+            payload["format"] = format
+        parts = []
+        watch = getattr(stop, "watch", None)
+        if watch is None:
+            return self._stream(payload, parts, on_token, stop, stats)
+        # The guard also re-reads pressure on a timer: during a long prefill or a
+        # stalled stream no token arrives to ask it, so it aborts the call by
+        # shutting the socket down under the blocked read instead.
+        sockets = []
+        aborted = threading.Event()
+
+        def on_connect(conn):
+            if conn.sock is None:
+                conn.connect()
+            sockets.append(conn.sock)
+            if aborted.is_set():
+                conn.close()
+                raise OllamaError("Generation cancelled before the request was sent")
+
+        def abort():
+            aborted.set()
+            for sock in sockets:
+                _shutdown(sock)
+
+        with watch(abort):
+            try:
+                return self._stream(
+                    payload, parts, on_token, stop, stats, on_connect, aborted.is_set
+                )
+            except Exception:
+                if not aborted.is_set():
+                    raise
+        stats["cancelled"] = True
+        return "".join(parts)
+
+    def _stream(
+        self, payload, parts, on_token, stop, stats, on_connect=None, aborted=None
+    ):
+        conn, resp = self._request("POST", "/api/generate", payload, on_connect)
+        try:
+            if resp.status != 200:
+                raise OllamaError(
+                    f"Ollama returned HTTP {resp.status}: "
+                    f"{resp.read().decode(errors='replace').strip()}"
+                )
+            for line in resp:
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(chunk["error"])
+                token = chunk.get("response", "")
+                if token:
+                    parts.append(token)
+                    stats["fragments"] = len(parts)
+                    if on_token:
+                        on_token(token)
+                    if stop and stop(token):
+                        conn.close()
+                        stats["cancelled"] = True
+                        return "".join(parts)
+                if chunk.get("done"):
+                    stats.update(
+                        (key, chunk[key]) for key in DONE_STATS if key in chunk
+                    )
+                    break
+            if aborted and aborted():
+                raise OllamaError("Generation cancelled")
+        except OSError as e:
+            conn.close()
+            raise OllamaError(f"Ollama stream interrupted: {e}") from e
+        except Exception:
+            conn.close()
+            raise
+        self._finish(conn, resp)
+        return "".join(parts)
+
+
+def _shutdown(sock):
+    """Shut sock down so a thread blocked reading it returns at once."""
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+_client = None
+_remote_clients = {}
+_pool_size = AI_PARALLELISM
+_client_lock = threading.Lock()
+
+
+def get_client(host=None):
+    """
+    Return the process-wide OllamaClient for OLLAMA_HOST, or the shared client of
+    another host.
+    """
+    global _client
+    with _client_lock:
+        if host is not None and host != OLLAMA_HOST:
+            if host not in _remote_clients:
+                _remote_clients[host] = OllamaClient(host=host, pool_size=_pool_size)
+            return _remote_clients[host]
+        if _client is None:
+            _client = OllamaClient(pool_size=_pool_size)
+        return _client
+
+
+def reserve_connections(count):
+    """
+    Let the local and every remote client keep count idle connections, one per
+    concurrent query.
+    """
+    global _pool_size
+    with _client_lock:
+        _pool_size = max(_pool_size, count)
+        clients = [
+            client
+            for client in (_client, *_remote_clients.values())
+            if client is not None
+        ]
+    for client in clients:
+        client.reserve(count)
+
+
+def query_lfm25_thinking(prompt: str, on_token=None, format=None, stop=None) -> str:
+    """
+    Query the lfm2.5-thinking Ollama model locally.
+    Uses the Ollama HTTP API and falls back to the `ollama run` CLI if the
+    server cannot be reached. The inference scheduler decides where the call
+    runs first: locally if the host has room, on SYSFIX_OLLAMA_REMOTE if the
+    host is under pressure, or not at all once a queued call times out (see
+    sysfixai.scheduler). A local call is also cancelled if memory runs short
+    while it generates. Every call's cost is recorded with the scheduler.
     Args:
         prompt (str): The prompt to send to the AI model.
+        on_token (callable): Optional callback receiving response text as it streams.
+        format (str): Optional output format constraint for the HTTP API, e.g. "json".
+        stop (callable): Optional early-cancel predicate, see OllamaClient.generate.
     Returns:
         str: The AI model's response.
     """
+    scheduler = get_scheduler()
+    with trace.span("schedule inference", "ai"):
+        placement = scheduler.place(
+            model_loaded=lambda: MODEL_NAME in get_client().loaded_models()
+        )
+    if placement.where == "degrade":
+        scheduler.record(
+            InferenceCost(
+                "local", None, 0.0, placement.waited, len(prompt), None, 0, "deferred"
+            )
+        )
+        return f"AI query deferred, host under pressure: {'; '.join(placement.reasons)}"
+    guard = PressureGuard(scheduler.read, stop) if placement.where == "local" else stop
+    stats = {}
+    outcome = "ok"
+    started = time.monotonic()
     try:
-        result = subprocess.run(
-            ["ollama", "run", "lfm2.5-thinking", prompt],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=30  # seconds
+        response = (
+            get_client(placement.host)
+            .generate(prompt, on_token=on_token, format=format, stop=guard, stats=stats)
+            .strip()
         )
+        if getattr(guard, "reason", None):
+            response, outcome = (
+                f"AI query deferred, host under pressure: {guard.reason}",
+                "aborted",
+            )
+        elif stats.get("cancelled"):
+            outcome = "cancelled"
+    except OllamaUnavailable as e:
+        if placement.host != OLLAMA_HOST:
+            # The offload target is down; loading the model here is what offloading
+            # avoids.
+            response, outcome = f"AI query failed: {e}", "failed"
+        else:
+            response = query_ollama_cli(prompt)
+            outcome = "failed" if is_failed_response(response) else "ok"
+            if on_token:
+                on_token(response)
+    except (OllamaError, ValueError) as e:
+        response, outcome = f"AI query failed: {e}", "failed"
+    scheduler.record(
+        InferenceCost(
+            placement.where,
+            placement.host,
+            time.monotonic() - started,
+            placement.waited,
+            len(prompt),
+            stats.get("prompt_eval_count"),
+            stats.get("eval_count", stats.get("fragments", 0)),
+            outcome,
+        )
+    )
+    return response
+
+
+def query_ollama_cli(prompt: str) -> str:
+    """
+    Query the lfm2.5-thinking Ollama model via the `ollama run` CLI.
+    Args:
+        prompt (str): The prompt to send to the AI model.
+    Returns:
+        str: The AI model's response.
+    """
+    try:
+        with trace.span(
+            "ollama run", "model", model=MODEL_NAME, prompt_chars=len(prompt)
+        ):
+            result = subprocess.run(
+                ["ollama", "run", MODEL_NAME, prompt],
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=30,  # seconds
+            )
         return result.stdout.strip()
     except subprocess.TimeoutExpired:
         return "AI query timed out. Ollama may be busy or unresponsive."
     except Exception as e:
         return f"AI query failed: {e}"
 
+
 def ask_ai_for_fix(issue: str) -> str:
     """
     Given an issue description, ask the lfm2.5-thinking model for a recommended fix.
+    The answer is parsed as it streams and generation is cancelled as soon as
+    the recommendation line (or an <action> tag) is complete.
     Args:
         issue (str): Description of the problem.
     Returns:
         str: The AI’s recommended fix or advice.
     """
     prompt = (
-        f"You are a Linux systems expert AI. The following issue was detected:\n\n{issue}\n\n"
-        "Provide a concise and practical recommendation on how to fix this issue, or what steps to take next. "
-        "Do NOT recommend closing browsers or actively used programs unless you first ask the user for confirmation, or unless the program is clearly idle or unresponsive. "
-        "If recommending to close a browser or other program, always warn the user and suggest saving work first."
+        "You are a Linux systems expert AI. The following issue was "
+        f"detected:\n\n{issue}\n\n"
+        "Provide a concise and practical recommendation on how to fix this issue, or "
+        "what steps to take next. " + FIX_GUIDANCE + FIX_FORMAT
     )
-    response = query_lfm25_thinking(prompt)
+    response = query_lfm25_thinking(prompt, stop=AdviceStream().feed)
     return response
 
-def ask_ai_deep_dive(prompt: str) -> str:
+
+def ask_ai_for_fix_batch(issues) -> list:
     """
-    Given a detailed issue description, ask the lfm2.5-thinking model for an in-depth analysis.
+    Ask for recommendations for several issues in a single model round-trip.
     Args:
-        prompt (str): Detailed description of the problem and context.
+        issues (list): Issue descriptions.
     Returns:
-        str: The AI’s detailed analysis and troubleshooting guide.
+        list: One recommendation per issue, or None where the model gave no usable
+            answer.
+    """
+    numbered = "\n".join(f"{idx}. {issue}" for idx, issue in enumerate(issues, 1))
+    prompt = (
+        "You are a Linux systems expert AI. The following issues were "
+        f"detected:\n\n{numbered}\n\n"
+        "For each issue, give a concise and practical recommendation on how to fix it, "
+        "or what steps to take next. "
+        + FIX_GUIDANCE
+        + ' Answer with JSON only, in the form '
+        '{"recommendations": [{"id": 1, "recommendation": "..."}]}, '
+        "with one entry per issue number."
+    )
+    return parse_batch_response(
+        query_lfm25_thinking(prompt, format="json"), len(issues)
+    )
+
+
+def parse_batch_response(response: str, count: int) -> list:
+    """
+    Extract per-issue recommendations from a batch response.
+    Thinking models may write prose around the JSON, so the last JSON value in
+    the text that looks like a recommendation list wins.
+    """
+    decoder = json.JSONDecoder()
+    entries = None
+    candidates = [i for i, ch in enumerate(response) if ch in "{["]
+    for start in reversed(candidates):
+        try:
+            value, _ = decoder.raw_decode(response, start)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            value = value.get("recommendations")
+        if (
+            isinstance(value, list)
+            and value
+            and all(isinstance(item, dict) for item in value)
+        ):
+            entries = value
+            break
+    answers = [None] * count
+    for position, item in enumerate(entries or []):
+        try:
+            idx = int(item.get("id", position + 1)) - 1
+        except (TypeError, ValueError):
+            continue
+        text = item.get("recommendation")
+        if 0 <= idx < count and isinstance(text, str) and text.strip():
+            answers[idx] = text.strip()
+    return answers
+
+
+def is_failed_response(response) -> bool:
+    """Return True for the placeholder text returned when a query failed."""
+    return not response or response.startswith(
+        ("AI query failed", "AI query timed out", "AI query deferred")
+    )
+
+
+def ask_ai_for_fixes(
+    issues,
+    mode="parallel",
+    parallelism=AI_PARALLELISM,
+    batch_size=BATCH_SIZE,
+    use_cache=True,
+) -> list:
     """
-    detailed_prompt = (
-        f"You are a Linux systems expert AI. The user has provided the following detailed issue:\n\n{prompt}\n\n"
+    Get a recommendation for every issue.
+    Args:
+        issues (list): Issue descriptions.
+        mode (str): "parallel" fans out one request per issue, at most
+            `parallelism` at a time; "batch" packs up to `batch_size` issues
+            into each prompt; "serial" asks one issue at a time.
+        parallelism (int): Maximum concurrent model requests.
+        batch_size (int): Issues per batch prompt.
+        use_cache (bool): Serve repeat issues from the on-disk advice cache.
+    Returns:
+        list: One response per issue, in input order.
+    """
+    issues = list(issues)
+    if mode not in ADVICE_MODES:
+        raise ValueError(f"Unknown advice mode: {mode}")
+    if not use_cache:
+        return _ask_ai_for_fixes(issues, mode, parallelism, batch_size)
+    cache = get_advice_cache()
+    keys = [fingerprint(issue, MODEL_NAME, FIX_PROMPT_VERSION) for issue in issues]
+    answers = [cache.get(key) for key in keys]
+    missing = [idx for idx, answer in enumerate(answers) if answer is None]
+    if missing:
+        fresh = _ask_ai_for_fixes(
+            [issues[idx] for idx in missing], mode, parallelism, batch_size
+        )
+        for idx, answer in zip(missing, fresh):
+            answers[idx] = answer
+            if not is_failed_response(answer):
+                cache.put(keys[idx], answer)
+    return answers
+
+
+def _ask_ai_for_fixes(issues, mode, parallelism, batch_size):
+    if not issues:
+        return []
+    if mode == "serial" or (
+        mode == "parallel" and (parallelism <= 1 or len(issues) == 1)
+    ):
+        return [ask_ai_for_fix(issue) for issue in issues]
+    if mode == "parallel":
+        workers = min(parallelism, len(issues))
+        reserve_connections(workers)
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="sysfix-ai"
+        ) as pool:
+            return list(pool.map(ask_ai_for_fix, issues))
+    answers = []
+    for start in range(0, len(issues), max(batch_size, 1)):
+        answers.extend(ask_ai_for_fix_batch(issues[start : start + batch_size]))
+    # Issues the batch answer did not cover are asked about individually.
+    missing = [idx for idx, answer in enumerate(answers) if answer is None]
+    if missing:
+        retried = _ask_ai_for_fixes(
+            [issues[idx] for idx in missing], "parallel", parallelism, batch_size
+        )
+        for idx, answer in zip(missing, retried):
+            answers[idx] = answer
+    return answers
+
+
+def deep_dive_prompt(description: str, context: str = None) -> str:
+    """
+    Build the Deep Dive prompt from the user's description and an optional system
+    snapshot.
+    """
+    prompt = (
+        "You are a Linux systems expert AI. The user has provided the following "
+        f"detailed issue:\n\n{description}\n\n"
+    )
+    if context:
+        prompt += (
+            f"System snapshot collected just now:\n\n{context}\n\n"
+            "The snapshot already shows processes, memory, disks, sensors and recent "
+            "errors. Base the analysis on it and do not ask the user to run commands "
+            "that only gather this information.\n\n"
+        )
+    return prompt + (
         "Provide a comprehensive analysis, including:"
         "1. Potential root causes."
         "2. Step-by-step troubleshooting guide."
@@ -59,5 +595,21 @@ def ask_ai_deep_dive(prompt: str) -> str:
         "4. Safety warnings or precautions."
         "5. Recommendations for prevention."
     )
-    response = query_lfm25_thinking(detailed_prompt)
+
+
+def ask_ai_deep_dive(prompt: str, on_token=None, context: str = None) -> str:
+    """
+    Given a detailed issue description, ask the lfm2.5-thinking model for an
+    in-depth analysis.
+    Args:
+        prompt (str): Detailed description of the problem and context.
+        on_token (callable): Optional callback receiving the analysis as it streams.
+        context (str): Optional system snapshot (see sysfixai.context) included in
+            the prompt.
+    Returns:
+        str: The AI’s detailed analysis and troubleshooting guide.
+    """
+    response = query_lfm25_thinking(
+        deep_dive_prompt(prompt, context), on_token=on_token
+    )
     return response
@@ -0,0 +1,158 @@
+"""Persistent, content-addressed cache for AI recommendations."""
+
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from sysfixai.settings import cache_dir
+
+CACHE_TTL = 7 * 24 * 3600  # seconds an answer stays valid
+CACHE_MAX_ENTRIES = 2000
+
+
+def _bucket_percent(match):
+    return f"{int(float(match.group(1)) // 10 * 10)}%"
+
+
+def _bucket_megabytes(match):
+    value = float(match.group(1))
+    return f"~{2 ** math.ceil(math.log2(value)) if value >= 1 else 1} MB"
+
+
+def _bucket_celsius(match):
+    return f"{int(float(match.group(1)) // 5 * 5)}°C"
+
+
+_NORMALIZERS = [
+    (re.compile(r"\bpid\s*(\d+)", re.I), "pid #"),
+    (re.compile(r"(\d+(?:\.\d+)?)\s*%"), _bucket_percent),
+    (re.compile(r"(\d+(?:\.\d+)?)\s*mb\b", re.I), _bucket_megabytes),
+    (re.compile(r"(\d+(?:\.\d+)?)\s*°c", re.I), _bucket_celsius),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize_issue(issue):
+    """
+    Reduce an issue string to its stable shape.
+    PIDs are dropped, percentages are bucketed to tens, sizes to the next power
+    of two in MB and temperatures to 5°C steps, so "Storage almost full: 93.4%
+    used." and "... 96.1% used." share one cache entry.
+    """
+    text = str(issue).strip()
+    for pattern, replacement in _NORMALIZERS:
+        text = pattern.sub(replacement, text)
+    return text.lower()
+
+
+def fingerprint(issue, model, prompt_version):
+    """
+    Return the cache key for an issue asked of model with a prompt template version.
+    """
+    material = f"{prompt_version}\0{model}\0{normalize_issue(issue)}"
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class AdviceCache:
+    """
+    SQLite-backed answer cache with TTL expiry and LRU eviction by entry count.
+    Hit and miss counters are kept in the database so `cache stats` reports
+    totals across runs.
+    """
+
+    def __init__(self, path=None, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path or os.path.join(cache_dir(), "advice.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS advice ("
+            " key TEXT PRIMARY KEY, answer TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS advice_accessed ON advice (accessed);"
+            "CREATE TABLE IF NOT EXISTS counters "
+            "(name TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+        )
+
+    def _count(self, name):
+        self._db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key):
+        """Return the cached answer for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT answer, created FROM advice WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self._db.execute(
+                    "UPDATE advice SET accessed = ? WHERE key = ?", (now, key)
+                )
+                self._count("hits")
+                return row[0]
+            if row:
+                self._db.execute("DELETE FROM advice WHERE key = ?", (key,))
+            self._count("misses")
+            return None
+
+    def put(self, key, answer):
+        """
+        Store an answer, evicting the least recently used entries beyond max_entries.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO advice (key, answer, created, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, answer, now, now),
+            )
+            self._db.execute(
+                "DELETE FROM advice WHERE key IN (SELECT key FROM advice"
+                " ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        """Return a dict with entry count, hits, misses and database size."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM advice").fetchone()[0]
+            counters = dict(self._db.execute("SELECT name, value FROM counters"))
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {
+            "entries": entries,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "path": self.path,
+            "bytes": size,
+        }
+
+    def clear(self):
+        """Remove every cached answer and reset the counters."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM advice")
+            self._db.execute("DELETE FROM counters")
+
+    def close(self):
+        self._db.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_advice_cache():
+    """Return the process-wide AdviceCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AdviceCache()
+        return _cache
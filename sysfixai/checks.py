@@ -0,0 +1,175 @@
+"""Registry of diagnostic checks, with cost and prerequisite metadata, extensible
+through entry points."""
+
+import os
+import threading
+from collections import namedtuple
+
+from sysfixai.diagnostics import check_name
+from sysfixai.hostfacts import which as cached_which
+
+ENTRY_POINT_GROUP = "sysfixai.checks"
+COST_ESTIMATE_MS = {"cheap": 10, "moderate": 100, "expensive": 1000}  # rough wall time
+PRIVILEGES = ("root", "sudo")
+
+CheckSpec = namedtuple(
+    "CheckSpec", ["name", "func", "cost", "privileges", "binaries", "cacheable"]
+)
+CheckSpec.__doc__ = """A registered check and what it needs.
+
+cost is a key of COST_ESTIMATE_MS. privileges may contain "root" (must run
+as root) or "sudo" (root, or sudo available to escalate). binaries must all
+be on PATH. cacheable checks report facts that do not change while the
+system is up, so watch mode collects them only once.
+"""
+
+_CHECKS = {}
+_plugins_loaded = False
+_plugin_errors = []
+_lock = threading.Lock()
+
+
+def register_check(
+    name=None, cost="cheap", privileges=(), binaries=(), cacheable=False
+):
+    """
+    Decorator registering a check (a callable returning a list of Issue records).
+    The name defaults to the function name without its "check_" prefix.
+    """
+    if cost not in COST_ESTIMATE_MS:
+        raise ValueError(
+            f"Unknown cost class {cost!r} (choose from {', '.join(COST_ESTIMATE_MS)})"
+        )
+    for privilege in privileges:
+        if privilege not in PRIVILEGES:
+            raise ValueError(
+                f"Unknown privilege {privilege!r} (choose from {', '.join(PRIVILEGES)})"
+            )
+
+    def decorator(func):
+        spec = CheckSpec(
+            name or check_name(func),
+            func,
+            cost,
+            tuple(privileges),
+            tuple(binaries),
+            cacheable,
+        )
+        _CHECKS[spec.name] = spec
+        return func
+
+    return decorator
+
+
+def _entry_points():
+    from importlib import metadata
+
+    eps = metadata.entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    return list(eps.get(ENTRY_POINT_GROUP, ()))
+
+
+def load_plugins():
+    """
+    Import the checks published under the "sysfixai.checks" entry point group,
+    once. An entry point may name a module that uses @register_check, or a
+    plain check function, which is registered with default metadata. Plugins
+    that fail to load are recorded in plugin_errors() rather than raised.
+    """
+    global _plugins_loaded
+    with _lock:
+        if _plugins_loaded:
+            return
+        _plugins_loaded = True
+        for ep in _entry_points():
+            try:
+                loaded = ep.load()
+            except Exception as e:
+                _plugin_errors.append((ep.name, str(e) or type(e).__name__))
+                continue
+            if callable(loaded) and loaded not in (
+                spec.func for spec in _CHECKS.values()
+            ):
+                register_check(name=ep.name)(loaded)
+
+
+def plugin_errors():
+    return list(_plugin_errors)
+
+
+def registered_checks():
+    """
+    Return every registered CheckSpec, built-in checks and plugins, in registration
+    order.
+    """
+    load_plugins()
+    return list(_CHECKS.values())
+
+
+def missing_prerequisites(spec, which=cached_which, euid=None):
+    """
+    Return why a check cannot run here (e.g. "pactl not found"), or None.
+    Binaries are resolved through the per-boot host facts by default.
+    """
+    euid = os.geteuid() if euid is None else euid
+    for binary in spec.binaries:
+        if not which(binary):
+            return f"{binary} not found"
+    if euid != 0:
+        if "root" in spec.privileges:
+            return "needs root"
+        if "sudo" in spec.privileges and not which("sudo"):
+            return "needs root or sudo"
+    return None
+
+
+def select_checks(only=None, skip=None, budget_ms=None, which=cached_which, euid=None):
+    """
+    Choose the checks to run, cheapest first.
+    Args:
+        only (list): Run just these check names.
+        skip (list): Never run these check names.
+        budget_ms (float): Keep adding checks, cheapest first, while their
+            estimated costs add up to at most this many milliseconds.
+    Returns:
+        tuple: (list of CheckSpec to run, list of (name, reason) not run).
+            Plugins that failed to load are listed as not run, with the error.
+    Raises:
+        ValueError: If only or skip names a check that is not registered.
+    """
+    specs = registered_checks()
+    failed = [
+        (name, f"plugin failed to load: {error}") for name, error in plugin_errors()
+    ]
+    known = {spec.name for spec in specs} | {name for name, _ in failed}
+    unknown = sorted(set(only or ()) - known | set(skip or ()) - known)
+    if unknown:
+        raise ValueError(
+            f"Unknown check(s): {', '.join(unknown)} "
+            f"(available: {', '.join(sorted(known))})"
+        )
+    order = list(COST_ESTIMATE_MS)
+    selected = []
+    dropped = [
+        (name, reason)
+        for name, reason in failed
+        if not (only and name not in only) and not (skip and name in skip)
+    ]
+    spent = 0
+    for spec in sorted(specs, key=lambda s: order.index(s.cost)):
+        if (only and spec.name not in only) or (skip and spec.name in skip):
+            continue
+        reason = missing_prerequisites(spec, which, euid)
+        if (
+            reason is None
+            and budget_ms is not None
+            and spent + COST_ESTIMATE_MS[spec.cost] > budget_ms
+        ):
+            reason = f"over the {budget_ms:g} ms budget"
+        if reason:
+            dropped.append((spec.name, reason))
+            continue
+        spent += COST_ESTIMATE_MS[spec.cost]
+        selected.append(spec)
+    return selected, dropped
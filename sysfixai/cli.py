@@ -1,51 +1,606 @@
+import os
+import time
 
 import click
-from sysfixai.core import diagnose, apply_fix, ai_auto_fix, ai_deep_dive
+from termcolor import colored
+from sysfixai.settings import (
+    ADVICE_MODES,
+    AI_PARALLELISM,
+    CHECK_TIMEOUT,
+    FLEET_CONCURRENCY,
+    HOST_TIMEOUT,
+    SCAN_MAX_DEPTH,
+    SCAN_TIME_BUDGET,
+)
+
+# Subcommands import the modules they need when they run, so `--help` and
+# `check --no-ai` do not pay for psutil, the AI backends or SQLite up front.
+
+OUTPUT_FORMATS = ("text", "json", "ndjson")
+
+
+def format_issue(issue):
+    """Render an issue for the terminal, highlighting critical ones."""
+    if getattr(issue, "severity", None) == "critical":
+        return colored(str(issue), "red", attrs=["bold"])
+    return str(issue)
+
+
+def emit_machine_readable(fmt, issues, results, wall, not_run=()):
+    """
+    Print issues (and check timings) as one JSON document or one JSON object per line.
+    """
+    import json
+    from sysfixai.diagnostics import build_report
+
+    host = os.uname().nodename
+    if fmt == "ndjson":
+        for issue in issues:
+            click.echo(json.dumps(dict(issue.to_dict(), host=host)))
+        return
+    click.echo(json.dumps(build_report(issues, results, wall, host, not_run), indent=2))
+
+
+def split_names(values):
+    """Flatten repeated and comma-separated option values into a list of names."""
+    return [
+        name.strip() for value in values for name in value.split(",") if name.strip()
+    ]
+
+
+def run_and_report(timeout, timings, fmt="text", only=(), skip=(), budget_ms=None):
+    """Run diagnostics, print the results and optionally per-check timings."""
+    from sysfixai.checks import select_checks
+    from sysfixai.core import run_diagnostics
+    from sysfixai.diagnostics import collect_issues, format_timings
+    from sysfixai.issues import Issue
+
+    try:
+        specs, not_run = select_checks(
+            only=split_names(only), skip=split_names(skip), budget_ms=budget_ms
+        )
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    if budget_ms is not None:
+        timeout = min(timeout, budget_ms / 1000)
+    started = time.monotonic()
+    results = run_diagnostics(timeout=timeout, checks=specs)
+    wall = time.monotonic() - started
+    issues = collect_issues(results) or [
+        Issue("ok", "No issues detected.", severity="info")
+    ]
+    if fmt != "text":
+        emit_machine_readable(fmt, issues, results, wall, not_run)
+        return issues
+    if not_run:
+        click.echo(
+            "Not run: " + ", ".join(f"{name} ({reason})" for name, reason in not_run)
+        )
+    click.echo("Diagnostics results:")
+    for idx, issue in enumerate(issues, 1):
+        click.echo(f"{idx}. {format_issue(issue)}")
+    if timings:
+        click.echo("Check timings:")
+        for line in format_timings(results):
+            click.echo(f"  {line}")
+        click.echo(f"  total wall time: {wall * 1000:.1f} ms")
+    return issues
+
 
 @click.group()
 def cli():
     """sysfix-ai: Safe Linux diagnostics with optional AI-assisted fixes."""
     pass
 
+
 @cli.command()
-def check():
+@click.option('--timings', is_flag=True, help="Show wall time spent in each check.")
+@click.option(
+    '--timeout',
+    type=float,
+    default=CHECK_TIMEOUT,
+    show_default=True,
+    help="Seconds each check may run before it is reported as timed out.",
+)
+@click.option(
+    '--advice',
+    type=click.Choice(ADVICE_MODES),
+    default="parallel",
+    show_default=True,
+    help="How Fast Sweep asks the AI: concurrent requests, one batched prompt, "
+    "or one at a time.",
+)
+@click.option(
+    '--ai-parallelism',
+    type=click.IntRange(min=1),
+    default=AI_PARALLELISM,
+    show_default=True,
+    help="Maximum concurrent AI requests in parallel advice mode.",
+)
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    help="Always query the AI instead of reusing cached advice.",
+)
+@click.option(
+    '--format',
+    'fmt',
+    type=click.Choice(OUTPUT_FORMATS),
+    default="text",
+    show_default=True,
+    help="Output format; json and ndjson skip the interactive AI prompt.",
+)
+@click.option(
+    '--profile',
+    is_flag=True,
+    help="Record spans for checks, subprocesses, scans and model calls "
+    "and print a summary.",
+)
+@click.option(
+    '--trace-file',
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the recorded spans as a Chrome trace (implies --profile).",
+)
+@click.option(
+    '--no-ai', is_flag=True, help="Only run diagnostics; do not offer AI modes."
+)
+@click.option(
+    '--only',
+    multiple=True,
+    metavar='CHECK',
+    help="Run only these checks (repeatable or comma-separated).",
+)
+@click.option(
+    '--skip',
+    multiple=True,
+    metavar='CHECK',
+    help="Do not run these checks (repeatable or comma-separated).",
+)
+@click.option(
+    '--budget-ms',
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Run the cheapest checks whose estimated cost fits in this many ms, "
+    "and cut each off at it.",
+)
+def check(
+    timings,
+    timeout,
+    advice,
+    ai_parallelism,
+    no_cache,
+    fmt,
+    profile,
+    trace_file,
+    no_ai,
+    only,
+    skip,
+    budget_ms,
+):
     """Run system diagnostics."""
-    use_ai = click.confirm("Do you want to use AI to automatically diagnose and fix issues?", default=False)
+    selection = {"only": only, "skip": skip, "budget_ms": budget_ms}
+    if not (profile or trace_file):
+        run_check(
+            timings, timeout, advice, ai_parallelism, no_cache, fmt, no_ai, selection
+        )
+        return
+    from sysfixai import trace
+
+    trace.enable()
+    try:
+        run_check(
+            timings, timeout, advice, ai_parallelism, no_cache, fmt, no_ai, selection
+        )
+    finally:
+        trace.disable()
+        recorded = trace.spans()
+        # Keep stdout clean for machine-readable formats.
+        click.echo("Profile:", err=fmt != "text")
+        for line in trace.format_summary(recorded):
+            click.echo(f"  {line}", err=fmt != "text")
+        if trace_file:
+            trace.write_chrome_trace(trace_file, recorded)
+            click.echo(f"Chrome trace written to {trace_file}", err=fmt != "text")
+
+
+def run_check(
+    timings, timeout, advice, ai_parallelism, no_cache, fmt, no_ai=False, selection=None
+):
+    selection = selection or {}
+    if fmt != "text":
+        run_and_report(timeout, timings, fmt, **selection)
+        return
+    use_ai = not no_ai and click.confirm(
+        "Do you want to use AI to automatically diagnose and fix issues?", default=False
+    )
     if use_ai:
-        ai_mode = click.prompt("Select AI mode", type=click.Choice(['1', '2'], case_sensitive=False),
-                              default='1', show_choices=True)
+        from sysfixai.core import ai_auto_fix, ai_deep_dive
+
+        ai_mode = click.prompt(
+            "Select AI mode",
+            type=click.Choice(['1', '2'], case_sensitive=False),
+            default='1',
+            show_choices=True,
+        )
         if ai_mode == '1':
             click.echo("Running Fast Sweep mode...")
-            issues = diagnose()
-            click.echo("Diagnostics results:")
-            for idx, issue in enumerate(issues, 1):
-                click.echo(f"{idx}. {issue}")
-            ai_auto_fix(issues)
+            issues = run_and_report(timeout, timings, **selection)
+            # Informational facts (system, CPU, motherboard) need no advice.
+            actionable = [issue for issue in issues if issue.severity != "info"]
+            ai_auto_fix(
+                actionable,
+                mode=advice,
+                parallelism=ai_parallelism,
+                use_cache=not no_cache,
+            )
         elif ai_mode == '2':
             click.echo("Running Deep Dive mode...")
             ai_deep_dive()
     else:
-        issues = diagnose()
-        click.echo("Diagnostics results:")
-        for idx, issue in enumerate(issues, 1):
-            click.echo(f"{idx}. {issue}")
+        run_and_report(timeout, timings, **selection)
+
 
 @cli.command()
 @click.argument('issue_number', type=int)
-def fix(issue_number):
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    help="Always query the AI instead of reusing cached advice.",
+)
+def fix(issue_number, no_cache):
     """Apply fix for a given issue number."""
-    use_ai = click.confirm("Do you want to use AI to automatically fix this issue?", default=False)
+    from sysfixai.core import ai_auto_fix, apply_fix, diagnose
+
+    use_ai = click.confirm(
+        "Do you want to use AI to automatically fix this issue?", default=False
+    )
     issues = diagnose()
     if issue_number < 1 or issue_number > len(issues):
         click.echo("Invalid issue number.")
         return
     issue = issues[issue_number - 1]
-    click.echo(f"Applying fix for: {issue}")
+    click.echo(f"Applying fix for: {format_issue(issue)}")
     if use_ai:
-        ai_auto_fix([issue])
+        ai_auto_fix([issue], use_cache=not no_cache)
     else:
         apply_fix(issue)
     click.echo("Fix applied (simulated).")
 
+
+@cli.command()
+@click.option(
+    '--interval',
+    type=click.FloatRange(min=0.5),
+    default=30.0,
+    show_default=True,
+    help="Seconds between samples.",
+)
+@click.option(
+    '--count',
+    type=click.IntRange(min=1),
+    default=None,
+    help="Stop after this many samples (default: run until interrupted).",
+)
+@click.option(
+    '--timeout',
+    type=float,
+    default=CHECK_TIMEOUT,
+    show_default=True,
+    help="Seconds each check may run before it is reported as timed out.",
+)
+@click.option(
+    '--format',
+    'fmt',
+    type=click.Choice(("text", "ndjson")),
+    default="text",
+    show_default=True,
+    help="Output format; ndjson prints one JSON object per change.",
+)
+def watch(interval, count, timeout, fmt):
+    """Monitor continuously and report new, changed or cleared issues."""
+    import json
+    from sysfixai.watch import Sampler, watch as watch_loop
+
+    markers = {"new": "+", "changed": "~", "cleared": "-"}
+    host = os.uname().nodename
+
+    def report(changes):
+        stamp = time.strftime("%H:%M:%S")
+        for change in changes:
+            if fmt == "ndjson":
+                record = dict(
+                    change.issue.to_dict(),
+                    host=host,
+                    change=change.kind,
+                    time=time.time(),
+                )
+                click.echo(json.dumps(record))
+            else:
+                click.echo(
+                    f"[{stamp}] {markers[change.kind]} {change.kind}: "
+                    f"{format_issue(change.issue)}"
+                )
+
+    sampler = Sampler(timeout=timeout)
+    if fmt == "text":
+        click.echo("System facts:")
+        for fact in sampler.static_facts():
+            click.echo(f"  {fact}")
+        click.echo(f"Watching every {interval:g}s (Ctrl+C to stop)...")
+    try:
+        watch_loop(interval, report, sampler=sampler, iterations=count)
+    except KeyboardInterrupt:
+        click.echo(f"Stopped after {sampler.samples} sample(s).")
+
+
+@cli.command()
+@click.argument('targets', nargs=-1)
+@click.option(
+    '--targets-file',
+    type=click.File(),
+    default=None,
+    help="File with one target per line (# comments allowed).",
+)
+@click.option(
+    '--concurrency',
+    type=click.IntRange(min=1),
+    default=FLEET_CONCURRENCY,
+    show_default=True,
+    help="Hosts queried at the same time.",
+)
+@click.option(
+    '--host-timeout',
+    type=float,
+    default=HOST_TIMEOUT,
+    show_default=True,
+    help="Seconds allowed per host, including connecting.",
+)
+@click.option(
+    '--timeout',
+    type=float,
+    default=CHECK_TIMEOUT,
+    show_default=True,
+    help="Seconds each check may run on an agent.",
+)
+@click.option(
+    '--include-info', is_flag=True, help="Also aggregate informational facts."
+)
+@click.option(
+    '--format',
+    'fmt',
+    type=click.Choice(("text", "json")),
+    default="text",
+    show_default=True,
+)
+def fleet(targets, targets_file, concurrency, host_timeout, timeout, include_info, fmt):
+    """Diagnose many hosts concurrently and print one merged report.
+
+    TARGETS are unix:/path or tcp:host:port (a running `agent`), ssh:host
+    (runs the CLI over ssh) or cmd:COMMAND (any command printing
+    `check --format json` output).
+    """
+    import json
+    from sysfixai.fleet import aggregate, format_finding, sweep
+
+    targets = list(targets)
+    if targets_file:
+        targets.extend(
+            line.strip()
+            for line in targets_file
+            if line.strip() and not line.lstrip().startswith("#")
+        )
+    if not targets:
+        raise click.UsageError("No targets given.")
+    started = time.monotonic()
+    results = sweep(
+        targets, concurrency=concurrency, timeout=host_timeout, check_timeout=timeout
+    )
+    wall = time.monotonic() - started
+    findings = aggregate(results, include_info=include_info)
+    failed = [r for r in results if r.error]
+    if fmt == "json":
+        click.echo(
+            json.dumps(
+                {
+                    "wall_ms": round(wall * 1000, 3),
+                    "hosts": [
+                        {
+                            "target": r.target,
+                            "host": r.host,
+                            "elapsed_ms": round(r.elapsed * 1000, 3),
+                            "error": r.error,
+                            "issues": len(r.issues),
+                        }
+                        for r in results
+                    ],
+                    "findings": [f._asdict() for f in findings],
+                },
+                indent=2,
+            )
+        )
+        return
+    click.echo(
+        f"Fleet report: {len(results) - len(failed)}/{len(results)} hosts "
+        f"answered in {wall:.1f}s"
+    )
+    for finding in findings:
+        line = format_finding(finding)
+        click.echo(
+            colored(line, "red", attrs=["bold"])
+            if finding.severity == "critical"
+            else line
+        )
+    if not findings:
+        click.echo("No issues detected on any host.")
+    for result in failed:
+        click.echo(f"[unreachable] {result.target}: {result.error}")
+
+
+@cli.command()
+@click.option(
+    '--listen',
+    default="tcp:127.0.0.1:7311",
+    show_default=True,
+    help="unix:/path or tcp:host:port. The agent has no authentication; "
+    "keep it on a local socket or a trusted network.",
+)
+@click.option(
+    '--name', default=None, help="Host name to report (default: the node name)."
+)
+def agent(listen, name):
+    """Serve diagnostics to `fleet` sweeps over a unix or TCP socket."""
+    from sysfixai.fleet import make_agent
+
+    server = make_agent(listen, name=name)
+    click.echo(f"sysfix-ai agent listening on {listen}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@cli.command()
+@click.option(
+    '--policy',
+    'policy_file',
+    type=click.Path(dir_okay=False),
+    help="Policy file (default: $SYSFIX_POLICY or ~/.config/sysfix-ai/policy.json).",
+)
+@click.option(
+    '--dry-run', is_flag=True, help="Show what the policy would do without doing it."
+)
+@click.option(
+    '--no-ai', is_flag=True, help="Do not ask the AI about processes no rule covers."
+)
+def memory(policy_file, dry_run, no_ai):
+    """Apply the memory policy to every high memory process in one batch."""
+    from sysfixai.core import handle_memory_hogs
+    from sysfixai.policy import load_policy
+
+    try:
+        policy = load_policy(policy_file)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    handle_memory_hogs(policy=policy, ask_ai=not no_ai, dry_run=dry_run)
+
+
+@cli.group()
+def storage():
+    """Inspect disk usage and reclaim space."""
+    pass
+
+
+@storage.command()
+@click.argument('path', default="/", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    '--top',
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Directories to list.",
+)
+@click.option(
+    '--depth',
+    type=click.IntRange(min=1),
+    default=SCAN_MAX_DEPTH,
+    show_default=True,
+    help="Deepest directory level to list.",
+)
+@click.option(
+    '--budget',
+    type=float,
+    default=SCAN_TIME_BUDGET,
+    show_default=True,
+    help="Seconds the scan may take.",
+)
+def top(path, top, depth, budget):
+    """Show mount usage and the largest directories under PATH."""
+    from sysfixai.storage import all_mount_usage, format_bytes, largest_directories
+
+    for usage in all_mount_usage():
+        click.echo(
+            f"{usage.mountpoint:<24} {usage.percent:5.1f}% of "
+            f"{format_bytes(usage.total):>10}"
+            f"  inodes {usage.inodes_percent:5.1f}%"
+        )
+    dirs, complete = largest_directories(
+        path, top_n=top, max_depth=depth, time_budget=budget
+    )
+    click.echo(f"Largest directories under {path}:")
+    for entry in dirs:
+        click.echo(f"  {format_bytes(entry.size):>10}  {entry.path}")
+    if not complete:
+        click.echo("  (scan stopped at its time budget; sizes are lower bounds)")
+
+
+@storage.command()
+@click.option(
+    '--apply',
+    'apply_',
+    is_flag=True,
+    help="Run the cleanup actions instead of only estimating.",
+)
+def reclaim(apply_):
+    """Estimate (or with --apply, reclaim) space from package caches and the journal."""
+    from sysfixai.core import free_space
+
+    free_space(dry_run=not apply_)
+
+
+@cli.group()
+def cache():
+    """Inspect or clear the AI advice cache."""
+    pass
+
+
+@cache.command()
+def stats():
+    """Show advice cache size and hit/miss counters."""
+    from sysfixai.cache import get_advice_cache
+
+    info = get_advice_cache().stats()
+    lookups = info["hits"] + info["misses"]
+    rate = f"{info['hits'] / lookups * 100:.1f}%" if lookups else "n/a"
+    click.echo(f"Cache file: {info['path']} ({info['bytes'] // 1024} KiB)")
+    click.echo(f"Entries: {info['entries']}")
+    click.echo(f"Hits: {info['hits']}  Misses: {info['misses']}  Hit rate: {rate}")
+    from sysfixai.history import get_history
+
+    history = get_history().stats()
+    click.echo(
+        f"History: {history['samples']} samples in {history['series']} series "
+        f"({history['path']})"
+    )
+    from sysfixai.scheduler import ledger_stats
+
+    inference = ledger_stats()
+    click.echo(
+        f"Inference: {inference['calls']} model calls in {inference['runs']} runs, "
+        f"{inference['seconds']:.1f}s, {inference['tokens']} tokens "
+        f"({inference['path']})"
+    )
+
+
+@cache.command()
+@click.option(
+    '--facts',
+    is_flag=True,
+    help="Also forget the cached host facts (dmidecode, CPU model).",
+)
+def clear(facts):
+    """Remove all cached AI advice."""
+    from sysfixai import hostfacts
+    from sysfixai.cache import get_advice_cache
+
+    get_advice_cache().clear()
+    click.echo("Advice cache cleared.")
+    if facts:
+        hostfacts.clear()
+        click.echo("Host facts cache cleared.")
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,237 @@
+"""Bounded, token-budgeted system snapshot attached to Deep Dive prompts."""
+
+import os
+import shutil
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+from sysfixai import trace
+from sysfixai.procsnap import get_snapshot
+from sysfixai.sensors import get_sampler
+from sysfixai.storage import all_mount_usage, format_bytes
+
+CONTEXT_TOKEN_BUDGET = 1500  # estimated tokens of system context per prompt
+LINE_CHARS = 160  # longer lines are cut
+TOP_PROCESSES = 8
+CPU_INTERVAL = 0.3  # seconds over which process CPU use is measured
+SENSOR_WINDOW = 0.25
+JOURNAL_LINES = 20
+
+Section = namedtuple("Section", ["title", "lines"])
+SectionUsage = namedtuple("SectionUsage", ["title", "tokens", "included", "total"])
+Context = namedtuple("Context", ["text", "tokens", "budget", "usage"])
+Context.__doc__ = (
+    """Rendered snapshot; usage has one SectionUsage per section, in prompt order."""
+)
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English and log text)."""
+    return (len(text) + 3) // 4
+
+
+def issue_lines(issues):
+    return [
+        str(issue)
+        for issue in issues
+        if getattr(issue, "severity", "warning") != "info"
+    ]
+
+
+def memory_lines():
+    vm = psutil.virtual_memory()
+    swap = psutil.swap_memory()
+    load = os.getloadavg()
+    return [
+        f"RAM {format_bytes(vm.used)} used of {format_bytes(vm.total)} "
+        f"({vm.percent:.0f}%), {format_bytes(vm.available)} available; "
+        f"swap {swap.percent:.0f}% used",
+        f"load average {load[0]:.2f} {load[1]:.2f} {load[2]:.2f} "
+        f"on {os.cpu_count()} CPUs",
+    ]
+
+
+def process_lines(count=TOP_PROCESSES, interval=CPU_INTERVAL):
+    """
+    Top processes by RSS (from the shared snapshot) and by CPU measured over interval.
+    """
+    lines = [
+        f"RSS {entry.rss / (1024 * 1024):8.1f} MB  {entry.name} (PID {entry.pid})"
+        for entry in get_snapshot().top_rss(count)
+    ]
+    procs = []
+    for proc in psutil.process_iter(["pid", "name"]):
+        try:
+            proc.cpu_percent(None)
+            procs.append(proc)
+        except psutil.Error:
+            pass
+    time.sleep(interval)
+    busy = []
+    for proc in procs:
+        try:
+            busy.append((proc.cpu_percent(None), proc.info["name"], proc.info["pid"]))
+        except psutil.Error:
+            pass
+    busy.sort(reverse=True)
+    lines.extend(
+        f"CPU {percent:6.1f}%     {name} (PID {pid})"
+        for percent, name, pid in busy[:count]
+        if percent > 0
+    )
+    return lines
+
+
+def mount_lines():
+    return [
+        f"{usage.mountpoint} {usage.percent:.0f}% of {format_bytes(usage.total)} used, "
+        f"inodes {usage.inodes_percent:.0f}%"
+        for usage in all_mount_usage()
+    ]
+
+
+def sensor_lines(window=SENSOR_WINDOW):
+    sampler = get_sampler()
+    if not sampler.sensors:
+        return []
+    sampled = sampler.sample(window)
+    lines = [
+        f"{s.sensor}/{s.label}: p50 {s.p50:.0f}°C, max {s.max:.0f}°C"
+        for s in sampled.sensors
+    ]
+    clock = sampled.clock
+    if clock.mhz:
+        limit = f" of {clock.max_mhz:.0f}" if clock.max_mhz else ""
+        lines.append(f"CPU clock {clock.mhz:.0f}{limit} MHz")
+    return lines
+
+
+def journal_lines(count=JOURNAL_LINES):
+    """
+    Recent error-priority journal messages from this boot, repeats collapsed, newest
+    last.
+    """
+    if not shutil.which("journalctl"):
+        return []
+    result = trace.run(
+        [
+            "journalctl",
+            "-p",
+            "err",
+            "-b",
+            "-n",
+            str(count * 5),
+            "--no-pager",
+            "-o",
+            "cat",
+        ],
+        capture_output=True,
+        text=True,
+        timeout=5,
+    )
+    messages = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+    counts = Counter(messages)
+    lines = []
+    for message in reversed(messages):
+        if message in counts:
+            repeat = counts.pop(message)
+            lines.append(f"{message} (x{repeat})" if repeat > 1 else message)
+    return list(reversed(lines[:count]))
+
+
+def gather_sections(issues=()):
+    """
+    Collect every section concurrently, so the slowest collector (the CPU
+    measurement window) bounds the latency. A collector that fails yields a
+    one-line note instead of an exception.
+    """
+    collectors = [
+        ("Detected issues", lambda: issue_lines(issues)),
+        ("Memory and load", memory_lines),
+        ("Top processes", process_lines),
+        ("Disk and mounts", mount_lines),
+        ("Sensors", sensor_lines),
+        ("Recent journal errors", journal_lines),
+    ]
+    with trace.span("gather context", "context"):
+        with ThreadPoolExecutor(
+            max_workers=len(collectors), thread_name_prefix="sysfix-context"
+        ) as pool:
+            futures = [(title, pool.submit(collect)) for title, collect in collectors]
+            sections = []
+            for title, future in futures:
+                try:
+                    lines = future.result()
+                except Exception as e:
+                    # One broken collector must not cost the whole snapshot.
+                    lines = [f"(unavailable: {e})"]
+                sections.append(Section(title, lines))
+    return sections
+
+
+def render(sections, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Render sections in priority order within a token budget.
+    Each section keeps as many of its lines as still fit and notes how many
+    were left out. Empty sections are dropped.
+    """
+    parts = []
+    usage = []
+    used = 0
+    for section in sections:
+        if not section.lines:
+            continue
+        header = f"## {section.title}"
+        cost = estimate_tokens(header) + 1
+        if used + cost > budget:
+            usage.append(SectionUsage(section.title, 0, 0, len(section.lines)))
+            continue
+        kept = [header]
+        for line in section.lines:
+            line = line if len(line) <= LINE_CHARS else line[: LINE_CHARS - 3] + "..."
+            line_cost = estimate_tokens(line) + 1
+            if used + cost + line_cost > budget:
+                break
+            kept.append(line)
+            cost += line_cost
+        omitted = len(section.lines) - (len(kept) - 1)
+        if omitted:
+            # The note counts against the budget too; give back lines until it fits
+            note = f"({omitted} more omitted)"
+            while used + cost + estimate_tokens(note) + 1 > budget and len(kept) > 1:
+                cost -= estimate_tokens(kept.pop()) + 1
+                omitted += 1
+                note = f"({omitted} more omitted)"
+            if used + cost + estimate_tokens(note) + 1 > budget:
+                usage.append(SectionUsage(section.title, 0, 0, len(section.lines)))
+                continue
+            kept.append(note)
+            cost += estimate_tokens(note) + 1
+        parts.append("\n".join(kept))
+        used += cost
+        usage.append(
+            SectionUsage(
+                section.title, cost, len(kept) - 1 - bool(omitted), len(section.lines)
+            )
+        )
+    text = "\n\n".join(parts)
+    return Context(text, estimate_tokens(text), budget, usage)
+
+
+def format_usage(context, prompt=None):
+    """
+    One-line prompt-size summary, e.g. "context 812/1500 tokens: Top processes 210,
+    ...".
+    """
+    sections = ", ".join(
+        f"{u.title} {u.tokens}"
+        + (f" ({u.included}/{u.total} lines)" if u.included < u.total else "")
+        for u in context.usage
+    )
+    line = f"context {context.tokens}/{context.budget} tokens: {sections}"
+    if prompt is not None:
+        line += f"; prompt {len(prompt)} chars, ~{estimate_tokens(prompt)} tokens"
+    return line
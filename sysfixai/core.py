@@ -1,292 +1,853 @@
 import socket
-def is_ollama_running(host='127.0.0.1', port=11434, timeout=1):
-    """Check if Ollama server is running locally."""
-    try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return True
-    except Exception:
-        return False
+import psutil
+import subprocess
+import os
+import sys
+import time
+from sysfixai import trace
+from sysfixai.actions import Action, execute_plan, format_results
+from sysfixai.advice import parse_advice
+from sysfixai.checks import register_check, select_checks
+from sysfixai.diagnostics import CHECK_TIMEOUT, collect_issues, run_checks
+from sysfixai.fixes import fix_for, register_fix
+from sysfixai.hostfacts import host_fact, which
+from sysfixai.issues import Issue, as_issue
+from sysfixai.policy import Decision, action_from_advice, apply_decisions, load_policy
+from sysfixai.procsnap import get_snapshot, invalidate, open_process
+from sysfixai.sensors import THROTTLE_RATIO, get_sampler, is_throttling
+from sysfixai.storage import (
+    INODE_THRESHOLD,
+    STORAGE_THRESHOLD,
+    all_mount_usage,
+    format_bytes,
+    largest_directories,
+    mount_of,
+    mount_usage,
+    reclaim_candidates,
+)
+from sysfixai.settings import (
+    ACTION_PARALLELISM,
+    AI_PARALLELISM,
+    OLLAMA_HOST,
+    OLLAMA_REMOTE,
+    split_host,
+)
+from termcolor import colored
+
+SUBPROCESS_TIMEOUT = 5  # seconds, for probes such as pactl and dmidecode
+MEMORY_HOG_MB = 500  # RSS threshold for a high memory process
+HISTORY_PROCESSES = 50  # largest processes whose RSS is recorded each run
+LEAK_WINDOW = 30 * 60  # seconds of history fitted when looking for trends
+LEAK_MB_PER_MIN = 10  # sustained RSS growth reported as a leak
+LEAK_MIN_SPAN = 5 * 60  # seconds of samples needed before a trend is trusted
+STABLE_MB_PER_MIN = 1  # RSS drift small enough to call a large process stable
+TREND_MIN_R2 = 0.8  # fit quality below which growth is treated as noise
+TEMPERATURE_CRITICAL = 85  # °C
+TEMPERATURE_WATCH = 70  # °C; rising sensors above this are reported early
+TEMPERATURE_RISE_PER_MIN = 1.0  # °C/min
+TEMPERATURE_MIN_SPAN = 2 * 60
+SENSOR_WINDOW = 1.0  # seconds of high-frequency sensor sampling per temperature check
+
+
+def is_ollama_running(host=None, timeout=1):
+    """
+    Check if an Ollama server is reachable: `host`, else OLLAMA_HOST or the
+    SYSFIX_OLLAMA_REMOTE offload host.
+    """
+    for candidate in [host] if host else [OLLAMA_HOST, OLLAMA_REMOTE]:
+        if not candidate:
+            continue
+        try:
+            with socket.create_connection(split_host(candidate), timeout=timeout):
+                return True
+        except OSError:
+            continue
+    return False
+
+
+def extract_final_advice(ai_response):
+    """Filter out 'thinking out loud' and return only the final advice line."""
+    return parse_advice(ai_response)
 
-def ai_auto_fix(issues):
+
+def ai_auto_fix(issues, mode="parallel", parallelism=AI_PARALLELISM, use_cache=True):
+    """
+    Ask the AI for advice on every issue and carry out the mapped actions.
+    Advice is gathered up front (see ask_ai_for_fixes for the modes), so the
+    model latency is paid roughly once rather than once per issue. Issues seen
+    before are answered from the advice cache unless use_cache is False. The
+    resulting actions are deduplicated and run as one plan (see run_actions).
+    Issues the model gave no advice for, e.g. because the inference scheduler
+    deferred the call while the host was under pressure, get their built-in
+    fix instead.
+    """
     if not is_ollama_running():
-        print("[WARNING] Ollama server is not running. Please start it with: ollama serve")
+        print(
+            "[WARNING] Ollama server is not running. Please start it with: ollama serve"
+        )
         return
-    for issue in issues:
+    issues = list(issues)
+    print(f"Asking AI about {len(issues)} issue(s) ({mode} mode)...")
+    # AI backends load only when AI is used
+    from sysfixai.ai import ask_ai_for_fixes, is_failed_response
+
+    responses = ask_ai_for_fixes(
+        issues, mode=mode, parallelism=parallelism, use_cache=use_cache
+    )
+    report_inference("fast sweep")
+    actions = []
+    for issue, ai_response in zip(issues, responses):
         print(f"AI is fixing: {issue}")
-        ai_response = ask_ai_for_fix(issue)
-        # Filter out 'thinking out loud' and only show final advice
-        advice_lines = [line for line in ai_response.splitlines() if line.strip()]
-        final_advice = None
-        for line in reversed(advice_lines):
-            # Look for lines starting with Recommendation, or bolded, or ending with a period
-            if line.strip().lower().startswith("recommendation:") or line.strip().startswith("**Recommendation"):
-                final_advice = line.strip().replace("**Recommendation:**", "").replace("Recommendation:", "").strip()
-                break
-            elif (len(line.strip()) > 10 and not line.lower().startswith("okay") and not line.lower().startswith("wait") and not line.lower().startswith("first")):
-                final_advice = line.strip()
-                break
-        if not final_advice:
-            final_advice = advice_lines[-1] if advice_lines else ai_response
+        if is_failed_response(ai_response):
+            print(f"[AI] {ai_response or 'No advice'}. Using the built-in fix.")
+            actions.append(builtin_fix_action(issue))
+            continue
+        with trace.span("extract_final_advice", "ai"):
+            final_advice = extract_final_advice(ai_response)
         print(f"AI advice: {final_advice}")
-        advice = final_advice.lower()
-        if "terminate" in advice or "kill" in advice:
-            if "chrome" in advice:
-                print("[AI ACTION] Terminating chrome processes...")
-                for proc in psutil.process_iter(['pid', 'name']):
-                    if proc.info['name'] and 'chrome' in proc.info['name'].lower():
-                        try:
-                            p = psutil.Process(proc.info['pid'])
-                            p.terminate()
-                            p.wait(timeout=3)
-                            print(f"Terminated chrome (PID {proc.info['pid']})")
-                        except Exception as e:
-                            print(f"Failed to terminate chrome: {e}")
-            elif "plasmashell" in advice:
-                print("[AI ACTION] Terminating plasmashell process...")
-                for proc in psutil.process_iter(['pid', 'name']):
-                    if proc.info['name'] and 'plasmashell' in proc.info['name'].lower():
-                        try:
-                            p = psutil.Process(proc.info['pid'])
-                            p.terminate()
-                            p.wait(timeout=3)
-                            print(f"Terminated plasmashell (PID {proc.info['pid']})")
-                        except Exception as e:
-                            print(f"Failed to terminate plasmashell: {e}")
-        elif "bios" in advice:
-            print("[AI ACTION] BIOS changes are NOT performed automatically for safety reasons.")
-            print("AI can only provide advice or resources. Please refer to your motherboard/computer manufacturer's website for BIOS updates and instructions.")
-        elif "free up space" in advice or "disk space" in advice or "storage" in advice:
-            print("[AI ACTION] Attempting to free up disk space...")
-            free_space()
-        elif "optimize" in advice:
-            print("[AI ACTION] Optimizing memory usage...")
-            handle_memory_hogs()
-        elif "skip" in advice:
-            print("[AI ACTION] Skipping issue as per AI advice.")
-        elif "consult" in advice or "technician" in advice or "professional" in advice:
-            print("[AI ACTION] AI recommends consulting a technician or professional. No automatic action taken.")
-        else:
-            print("[AI ACTION] No direct action mapped for AI advice. Please review manually.")
-import psutil
-import subprocess
-import shutil
-import os
-from sysfixai.ai import ask_ai_for_fix, ask_ai_deep_dive
-from termcolor import colored
-from termcolor import colored
+        actions.extend(advice_actions(final_advice))
+    return run_actions(actions)
+
+
+def report_inference(label):
+    """Print and record the cost of the model calls made since the last report."""
+    from sysfixai.scheduler import format_summary, get_scheduler
+
+    summary = get_scheduler().flush(label)
+    if summary:
+        print(f"Inference: {format_summary(summary)}")
+    return summary
+
+
+def builtin_fix_action(issue):
+    """
+    Rule-based fallback: run the fix registered for the issue (see apply_fix) as a plan
+    action.
+    """
+    return Action(
+        f"built-in fix: {issue}",
+        func=lambda: apply_fix(issue),
+        writes={"terminal"},
+        timeout=None,
+    )
+
+
+def advice_actions(final_advice):
+    """
+    Map a piece of AI advice to fix actions.
+    Advice with no safe automatic action (BIOS, skip, consult someone) is
+    reported here and yields no actions.
+    """
+    advice = final_advice.lower()
+    if "terminate" in advice or "kill" in advice:
+        for name in ("chrome", "plasmashell"):
+            if name in advice:
+                print(f"[AI ACTION] Terminating {name} processes...")
+                return [
+                    Action(
+                        f"terminate {name}",
+                        func=lambda name=name: terminate_by_name(name),
+                        reads={"processes"},
+                        writes={"processes", "terminal"},
+                    )
+                ]
+    elif "bios" in advice:
+        print(
+            "[AI ACTION] BIOS changes are NOT performed automatically "
+            "for safety reasons."
+        )
+        print(
+            "AI can only provide advice or resources. Please refer to your "
+            "motherboard/computer manufacturer's website for BIOS updates and "
+            "instructions."
+        )
+    elif "free up space" in advice or "disk space" in advice or "storage" in advice:
+        print("[AI ACTION] Attempting to free up disk space...")
+        return [FREE_SPACE]
+    elif "optimize" in advice:
+        print("[AI ACTION] Optimizing memory usage...")
+        return [HANDLE_MEMORY_HOGS]
+    elif "skip" in advice:
+        print("[AI ACTION] Skipping issue as per AI advice.")
+    elif "consult" in advice or "technician" in advice or "professional" in advice:
+        print(
+            "[AI ACTION] AI recommends consulting a technician or professional. "
+            "No automatic action taken."
+        )
+    else:
+        print(
+            "[AI ACTION] No direct action mapped for AI advice. Please review manually."
+        )
+    return []
+
+
+def run_actions(actions, parallelism=ACTION_PARALLELISM):
+    """
+    Run fix actions as a deduplicated plan and print an execution summary.
+    Actions that touch different resources run concurrently. Output of captured
+    commands is shown once each action finishes; actions that hold the terminal
+    (attached commands, and in-process actions, which print directly) run one
+    at a time while other reports are held back, so output does not interleave.
+    Returns:
+        list: ActionResult per unique action.
+    """
+    if not actions:
+        return []
 
-def diagnose():
+    def report(result):
+        print(f"[{result.status}] {result.name} ({result.elapsed:.1f}s)")
+        if result.output:
+            print(result.output)
+
+    started = time.monotonic()
+    results = execute_plan(actions, parallelism=parallelism, on_result=report)
+    print("Action summary:")
+    for line in format_results(results, wall=time.monotonic() - started):
+        print(f"  {line}")
+    return results
+
+
+def default_checks(only=None, skip=None, budget_ms=None):
+    """
+    Return the checks run by diagnose(): registered checks that can run here, cheapest
+    first.
+    """
+    return [spec.func for spec in select_checks(only, skip, budget_ms)[0]]
+
+
+def static_checks():
+    """Return the checks whose output does not change while the system is up."""
+    return [spec.func for spec in select_checks()[0] if spec.cacheable]
+
+
+def dynamic_checks():
+    """Return the checks that must be re-sampled to follow the system state."""
+    return [spec.func for spec in select_checks()[0] if not spec.cacheable]
+
+
+def run_diagnostics(timeout=CHECK_TIMEOUT, checks=None):
+    """
+    Run the given checks (default: all that can run here) concurrently and return their
+    CheckResult records.
+    """
+    if checks is None:
+        checks = select_checks()[0]
+    return run_checks(checks, timeout=timeout)
+
+
+def diagnose(timeout=CHECK_TIMEOUT):
     """Run system diagnostics and return list of detected issues."""
-    issues = []
-    issues.extend(check_audio())
-    issues.extend(check_memory())
-    issues.extend(check_storage())
-    issues.extend(check_temperatures())
-    issues.extend(check_bios())
-    issues.extend(check_motherboard())
-    issues.extend(check_system_info())
-    return issues if issues else ["No issues detected."]
+    issues = collect_issues(run_diagnostics(timeout=timeout))
+    return issues if issues else [Issue("ok", "No issues detected.", severity="info")]
+
+
+def dmidecode_path():
+    """Return the dmidecode path (cached per boot), or None if it is not installed."""
+    return which("dmidecode")
+
+
+def read_baseboard():
+    """
+    Run the privileged dmidecode query for the baseboard.
+    Returns {"status": "ok"|"missing", "info": [...]}. Timeouts and failures
+    (including sudo needing a password: it runs with -n, so it never prompts)
+    are raised rather than returned so they are not cached for the whole boot.
+    """
+    if not dmidecode_path():
+        return {"status": "missing", "info": []}
+    cmd = ["dmidecode", "-t", "baseboard"]
+    if os.geteuid() != 0:
+        cmd = ["sudo", "-n"] + cmd
+    result = trace.run(cmd, capture_output=True, text=True, timeout=SUBPROCESS_TIMEOUT)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(
+            result.returncode, cmd, result.stdout, result.stderr
+        )
+    lines = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+    info = []
+    for line in lines:
+        if any(
+            key in line.lower()
+            for key in ["manufacturer", "product name", "version", "serial number"]
+        ):
+            info.append(line)
+    return {"status": "ok", "info": info}
+
+
+def read_cpu_model():
+    """Return the CPU model name from /proc/cpuinfo, or None."""
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.lower().startswith("model name"):
+                    return line.strip().split(":", 1)[-1].strip()
+    return None
+
+
+@register_check(
+    cost="expensive", privileges=("sudo",), binaries=("dmidecode",), cacheable=True
+)
 def check_motherboard():
     issues = []
     try:
-        # Try to get motherboard info using dmidecode
-        if shutil.which("dmidecode"):
-            result = subprocess.run(["sudo", "dmidecode", "-t", "baseboard"], capture_output=True, text=True)
-            if result.returncode == 0:
-                lines = [line.strip() for line in result.stdout.splitlines() if line.strip()]
-                info = []
-                for line in lines:
-                    if any(key in line.lower() for key in ["manufacturer", "product name", "version", "serial number"]):
-                        info.append(line)
-                if info:
-                    issues.append("Motherboard info: " + ", ".join(info))
-                else:
-                    issues.append("Motherboard info could not be determined.")
+        # dmidecode needs root; a successful answer is cached until the next
+        # reboot so sudo only has to work once per boot.
+        baseboard = host_fact("baseboard", read_baseboard)
+        if baseboard["status"] == "ok":
+            if baseboard["info"]:
+                issues.append(
+                    Issue(
+                        "motherboard",
+                        "Motherboard info: " + ", ".join(baseboard["info"]),
+                        severity="info",
+                    )
+                )
             else:
-                issues.append("Failed to retrieve motherboard info (dmidecode error).")
+                issues.append(
+                    Issue(
+                        "motherboard",
+                        "Motherboard info could not be determined.",
+                        severity="info",
+                    )
+                )
         else:
-            issues.append("dmidecode not found. Cannot retrieve motherboard info.")
+            issues.append(
+                Issue(
+                    "motherboard",
+                    "dmidecode not found. Cannot retrieve motherboard info.",
+                    severity="info",
+                )
+            )
+    except subprocess.TimeoutExpired:
+        issues.append(
+            Issue(
+                "motherboard",
+                "Failed to retrieve motherboard info (dmidecode timed out).",
+            )
+        )
+    except subprocess.CalledProcessError as e:
+        reason = (
+            "needs root or passwordless sudo"
+            if "password" in (e.stderr or "")
+            else "dmidecode error"
+        )
+        issues.append(
+            Issue("motherboard", f"Failed to retrieve motherboard info ({reason}).")
+        )
     except Exception as e:
-        issues.append(f"Error checking motherboard info: {e}")
+        issues.append(Issue("motherboard", f"Error checking motherboard info: {e}"))
     return issues
+
+
+@register_check(cost="cheap", cacheable=True)
 def check_system_info():
     issues = []
     try:
         uname = os.uname()
-        issues.append(f"System: {uname.sysname} {uname.release} ({uname.machine})")
-        issues.append(f"Node: {uname.nodename}")
+        issues.append(
+            Issue(
+                "system_info",
+                f"System: {uname.sysname} {uname.release} ({uname.machine})",
+                severity="info",
+                subject="system",
+            )
+        )
+        issues.append(
+            Issue(
+                "system_info",
+                f"Node: {uname.nodename}",
+                severity="info",
+                subject="node",
+            )
+        )
         # Try to get CPU info
-        cpuinfo = None
-        if os.path.exists("/proc/cpuinfo"):
-            with open("/proc/cpuinfo") as f:
-                for line in f:
-                    if line.lower().startswith("model name"):
-                        cpuinfo = line.strip().split(":", 1)[-1].strip()
-                        break
+        cpuinfo = host_fact("cpu_model", read_cpu_model)
         if cpuinfo:
-            issues.append(f"CPU: {cpuinfo}")
+            issues.append(
+                Issue("system_info", f"CPU: {cpuinfo}", severity="info", subject="cpu")
+            )
         # Try to get RAM info
         try:
-            import psutil
-            mem = psutil.virtual_memory()
-            issues.append(f"RAM: {mem.total // (1024*1024)} MB total")
+            total_mb = host_fact(
+                "ram_total_mb", lambda: psutil.virtual_memory().total // (1024 * 1024)
+            )
+            issues.append(
+                Issue(
+                    "system_info",
+                    f"RAM: {total_mb} MB total",
+                    severity="info",
+                    subject="ram",
+                    value=total_mb,
+                    unit="MB",
+                )
+            )
         except Exception:
             pass
     except Exception as e:
-        issues.append(f"Error checking system info: {e}")
+        issues.append(Issue("system_info", f"Error checking system info: {e}"))
     return issues
 
+
+@register_check(cost="moderate", binaries=("pactl",))
 def check_audio():
     issues = []
     # Check PulseAudio status
     try:
-        result = subprocess.run(["pactl", "info"], capture_output=True, text=True)
+        result = trace.run(
+            ["pactl", "info"],
+            capture_output=True,
+            text=True,
+            timeout=SUBPROCESS_TIMEOUT,
+        )
         if "Server Name" not in result.stdout:
-            issues.append("Audio system check failed (PulseAudio may not be running).")
+            issues.append(
+                Issue(
+                    "audio",
+                    "Audio system check failed (PulseAudio may not be running).",
+                    subject="pulseaudio",
+                )
+            )
+    except subprocess.TimeoutExpired:
+        issues.append(
+            Issue(
+                "audio",
+                "Audio system check failed (PulseAudio did not respond).",
+                subject="pulseaudio",
+            )
+        )
     except Exception:
-        issues.append("Audio system check failed (PulseAudio command not found).")
+        issues.append(
+            Issue(
+                "audio",
+                "Audio system check failed (PulseAudio command not found).",
+                subject="pulseaudio",
+            )
+        )
     return issues
 
+
+def process_key(entry):
+    """History series key for a process; create_time keeps reused PIDs apart."""
+    return f"{entry.pid}:{entry.create_time:.2f}"
+
+
+def record_trends(kind, rows, window=LEAK_WINDOW):
+    """
+    Append rows of (key, label, value) to the history store and fit the window.
+    Returns {key: Trend}; empty if the history store is unavailable.
+    """
+    try:
+        from sysfixai.history import get_history
+
+        store = get_history()
+        store.record(kind, rows)
+        return {trend.key: trend for trend in store.trends(kind, window)}
+    except Exception:
+        return {}
+
+
+def is_rising(trend, min_slope, min_span):
+    return (
+        trend.slope >= min_slope and trend.span >= min_span and trend.r2 >= TREND_MIN_R2
+    )
+
+
+@register_check(cost="moderate")
 def check_memory():
     issues = []
-    # Check for high memory usage processes
-    hogs = []
-    for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
-        try:
-            mem_mb = proc.info['memory_info'].rss / (1024 * 1024)
-            if mem_mb > 500:  # threshold
-                hogs.append((proc.info['name'], proc.info['pid'], mem_mb))
-        except Exception:
+    snapshot = get_snapshot()
+    tracked = snapshot.top_rss(HISTORY_PROCESSES)
+    trends = record_trends(
+        "rss", [(process_key(e), e.name, e.rss / (1024 * 1024)) for e in tracked]
+    )
+    # Steady RSS growth, whatever the current size
+    leaking = set()
+    for entry in tracked:
+        trend = trends.get(process_key(entry))
+        if trend and is_rising(trend, LEAK_MB_PER_MIN, LEAK_MIN_SPAN):
+            leaking.add(entry.pid)
+            issues.append(
+                Issue(
+                    "memory_leak",
+                    f"Possible memory leak: {entry.name} (PID {entry.pid}) RSS growing "
+                    f"{trend.slope:.1f} MB/min "
+                    f"over {trend.span / 60:.0f} min "
+                    f"({trend.first:.0f} -> {trend.last:.0f} MB).",
+                    subject=entry.pid,
+                    value=round(trend.slope, 1),
+                    threshold=LEAK_MB_PER_MIN,
+                    unit="MB/min",
+                )
+            )
+    # Check for high memory usage processes; large but flat ones are informational
+    for name, pid, mem, entry in find_memory_hogs(snapshot):
+        if pid in leaking:
             continue
-    if hogs:
-        desc = "High memory usage by processes: " + ", ".join(
-            f"{name} (PID {pid}) using {mem:.1f} MB RAM" for name, pid, mem in hogs)
-        issues.append(desc)
+        trend = trends.get(process_key(entry))
+        message = (
+            f"High memory usage by process: {name} (PID {pid}) using {mem:.1f} MB RAM."
+        )
+        severity = "warning"
+        if (
+            trend
+            and trend.span >= LEAK_MIN_SPAN
+            and abs(trend.slope) <= STABLE_MB_PER_MIN
+        ):
+            message = message[:-1] + f" (stable over {trend.span / 60:.0f} min)."
+            severity = "info"
+        issues.append(
+            Issue(
+                "memory",
+                message,
+                severity=severity,
+                subject=pid,
+                value=round(mem, 1),
+                threshold=MEMORY_HOG_MB,
+                unit="MB",
+            )
+        )
     return issues
 
+
+@register_check(cost="cheap")
 def check_storage():
     issues = []
-    total, used, free = shutil.disk_usage("/")
-    used_pct = used / total * 100
-    if used_pct > 90:
-        issues.append(f"Storage almost full: {used_pct:.1f}% used.")
+    # Every real mount, bytes and inodes, from one statvfs call each
+    for usage in all_mount_usage():
+        if usage.percent > STORAGE_THRESHOLD:
+            issues.append(
+                Issue(
+                    "storage",
+                    f"Storage almost full: {usage.percent:.1f}% used on "
+                    f"{usage.mountpoint}.",
+                    subject=usage.mountpoint,
+                    value=round(usage.percent, 1),
+                    threshold=STORAGE_THRESHOLD,
+                    unit="%",
+                )
+            )
+        if usage.inodes_percent > INODE_THRESHOLD:
+            issues.append(
+                Issue(
+                    "inodes",
+                    f"Inodes almost exhausted: {usage.inodes_percent:.1f}% used on "
+                    f"{usage.mountpoint}.",
+                    subject=usage.mountpoint,
+                    value=round(usage.inodes_percent, 1),
+                    threshold=INODE_THRESHOLD,
+                    unit="%",
+                )
+            )
     return issues
 
+
+@register_check(cost="expensive")  # samples sensors for SENSOR_WINDOW seconds
 def check_temperatures():
     issues = []
-    try:
-        import psutil._pslinux as pslinux  # may not always be available
-        temps = psutil.sensors_temperatures()
-        if temps:
-            for sensor, entries in temps.items():
-                for entry in entries:
-                    if entry.current > 85:
-                        issues.append(f"High temperature alert: {sensor} sensor '{entry.label or entry.device}' at {entry.current:.1f}°C.")
-    except Exception:
-        pass
+    sampler = get_sampler()
+    if not sampler.sensors and not sampler.has_throttle_counters:
+        return issues
+    # A window of fast reads rather than one reading: spikes and sustained heat look
+    # different
+    window = sampler.sample(SENSOR_WINDOW)
+    readings = [(f"{stats.sensor}/{stats.label}", stats) for stats in window.sensors]
+    trends = record_trends(
+        "temperature", [(key, key, stats.p50) for key, stats in readings]
+    )
+    hottest = None
+    for key, stats in readings:
+        spread = (
+            f"p50 {stats.p50:.1f}, p95 {stats.p95:.1f}, max {stats.max:.1f}°C "
+            f"over {window.duration:.1f}s"
+        )
+        trend = trends.get(key)
+        if hottest is None or stats.p95 > hottest[1].p95:
+            hottest = (key, stats)
+        # Prefer the limit the sensor itself reports (tempN_crit); fall back to ours
+        limit = stats.critical if stats.critical is not None else TEMPERATURE_CRITICAL
+        if stats.p50 > limit:
+            issues.append(
+                Issue(
+                    "temperature",
+                    f"High temperature alert: {stats.sensor} sensor '{stats.label}' "
+                    f"at {stats.p50:.1f}°C ({spread}).",
+                    severity="critical",
+                    subject=key,
+                    value=round(stats.p50, 1),
+                    threshold=limit,
+                    unit="°C",
+                )
+            )
+        elif stats.max > limit:
+            issues.append(
+                Issue(
+                    "temperature",
+                    f"Temperature spike: {stats.sensor} sensor '{stats.label}' "
+                    f"reached {stats.max:.1f}°C ({spread}).",
+                    subject=key,
+                    value=round(stats.max, 1),
+                    threshold=limit,
+                    unit="°C",
+                )
+            )
+        elif (
+            stats.current > TEMPERATURE_WATCH
+            and trend
+            and is_rising(trend, TEMPERATURE_RISE_PER_MIN, TEMPERATURE_MIN_SPAN)
+        ):
+            issues.append(
+                Issue(
+                    "temperature",
+                    f"Temperature rising: {stats.sensor} sensor '{stats.label}' at "
+                    f"{stats.current:.1f}°C, "
+                    f"climbing {trend.slope:.1f}°C/min.",
+                    subject=key,
+                    value=round(trend.slope, 1),
+                    threshold=TEMPERATURE_RISE_PER_MIN,
+                    unit="°C/min",
+                )
+            )
+    hot = hottest is not None and hottest[1].p95 >= TEMPERATURE_WATCH
+    if is_throttling(window, hot):
+        clock = window.clock
+        if clock.throttle_events:
+            message = (
+                f"CPU thermal throttling: {clock.throttle_events} throttle events "
+                f"in {window.duration:.1f}s."
+            )
+        else:
+            message = (
+                f"CPU thermal throttling: clock at {clock.ratio:.0%} of maximum "
+                f"({clock.mhz:.0f} of {clock.max_mhz:.0f} MHz) while busy, "
+                f"{hottest[0]} at {hottest[1].p95:.1f}°C."
+            )
+        issues.append(
+            Issue(
+                "throttling",
+                message,
+                subject="cpu",
+                value=round(clock.ratio * 100, 1) if clock.ratio is not None else None,
+                threshold=THROTTLE_RATIO * 100,
+                unit="%",
+            )
+        )
     return issues
 
+
+@register_check(cost="cheap", binaries=("dmidecode",), cacheable=True)
 def check_bios():
     issues = []
     try:
         # Reading BIOS info with dmidecode requires root, so just warn user
         bios_warning = [
-            colored("WARNING: BIOS info detected. DO NOT attempt automated BIOS updates or changes.", "red", attrs=["bold"]),
-            colored("BIOS flashing is dangerous and can brick your computer if done incorrectly.", "yellow", attrs=["bold"])
+            Issue(
+                "bios",
+                "WARNING: BIOS info detected. "
+                "DO NOT attempt automated BIOS updates or changes.",
+                severity="critical",
+                subject="no-automated-changes",
+            ),
+            Issue(
+                "bios",
+                "BIOS flashing is dangerous and can brick your computer "
+                "if done incorrectly.",
+                severity="critical",
+                subject="flashing-risk",
+            ),
         ]
         # Let's say if dmidecode is installed, show this warning:
-        if shutil.which("dmidecode"):
+        if dmidecode_path():
             issues.extend(bios_warning)
     except Exception:
         pass
     return issues
 
+
 def apply_fix(issue):
+    """Apply the fix registered for the issue's kind (strings are classified first)."""
+    issue = as_issue(issue)
     print(f"Applying fix for: {issue}")
-    if "memory usage" in issue:
-        handle_memory_hogs()
-    elif "storage almost full" in issue:
-        handle_storage()
-    elif "Audio system" in issue:
-        print("No automatic fix available for audio issues.")
-    elif "temperature alert" in issue:
-        print("Temperature is high, please ensure proper cooling manually.")
-    elif "BIOS" in issue:
-        print(colored("BIOS fixes are not supported automatically due to risk of bricking the system.", "red"))
+    handler = fix_for(issue.kind)
+    if handler:
+        handler(issue)
     else:
         print("No automatic fix available.")
     print("Fix applied (simulated).")
 
-def handle_memory_hogs():
-    hogs = []
-    for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
+
+@register_fix("memory")
+@register_fix("memory_leak")
+def fix_memory(issue):
+    # The rule-based path: only the policy decides, the model is never consulted
+    pids = [issue.subject] if isinstance(issue.subject, int) else None
+    handle_memory_hogs(pids=pids, ask_ai=False)
+
+
+@register_fix("storage")
+@register_fix("inodes")
+def fix_storage(issue):
+    handle_storage(issue.subject or "/")
+
+
+@register_fix("audio")
+def fix_audio(issue):
+    print("No automatic fix available for audio issues.")
+
+
+@register_fix("temperature")
+@register_fix("throttling")
+def fix_temperature(issue):
+    print("Temperature is high, please ensure proper cooling manually.")
+
+
+@register_fix("bios")
+def fix_bios(issue):
+    print(
+        colored(
+            "BIOS fixes are not supported automatically "
+            "due to risk of bricking the system.",
+            "red",
+        )
+    )
+
+
+def find_memory_hogs(snapshot=None):
+    """
+    Return (name, pid, rss_mb, entry) for processes above MEMORY_HOG_MB, largest first.
+    """
+    snapshot = snapshot or get_snapshot()
+    return [
+        (entry.name, entry.pid, entry.rss / (1024 * 1024), entry)
+        for entry in snapshot.above_rss(MEMORY_HOG_MB * 1024 * 1024)
+    ]
+
+
+def terminate_by_name(pattern, snapshot=None):
+    """
+    Terminate every process whose name contains pattern, using the shared snapshot.
+    """
+    snapshot = snapshot or get_snapshot()
+    for entry in snapshot.find_name(pattern):
         try:
-            mem_mb = proc.info['memory_info'].rss / (1024 * 1024)
-            if mem_mb > 500:
-                hogs.append((proc.info['name'], proc.info['pid'], mem_mb))
-        except Exception:
-            continue
+            p = open_process(entry)
+            p.terminate()
+            p.wait(timeout=3)
+            print(f"Terminated {pattern} (PID {entry.pid})")
+        except Exception as e:
+            print(f"Failed to terminate {pattern}: {e}")
+    invalidate()
+
 
-    if not hogs:
+def handle_memory_hogs(
+    snapshot=None, pids=None, policy=None, ask_ai=True, dry_run=False
+):
+    """
+    Apply the memory policy (see sysfixai.policy) to high memory processes in one batch.
+    Processes no rule covers are put to the AI together in a single batch
+    prompt, and its choice is applied only if the policy allows that action.
+    Without AI they are just reported.
+    Args:
+        snapshot (ProcessSnapshot): Process table to work from (default: the
+            shared one).
+        pids (list): Only consider these PIDs, whatever their size.
+        policy (Policy): Policy to apply (default: the policy file, or built-in
+            defaults).
+        ask_ai (bool): Consult the model about uncovered processes.
+        dry_run (bool): Print the decisions without acting on them.
+    Returns:
+        list: Outcome per process acted on.
+    """
+    snapshot = snapshot or get_snapshot()
+    policy = policy or load_policy()
+    hog_bytes = MEMORY_HOG_MB * 1024 * 1024
+    if pids is not None:
+        # Named processes are handled whatever their size (e.g. a leak still below the
+        # threshold)
+        entries = [entry for entry in snapshot if entry.pid in pids]
+    else:
+        floor = min(
+            MEMORY_HOG_MB, policy.min_rss_mb() if policy.rules else MEMORY_HOG_MB
+        )
+        entries = snapshot.above_rss(floor * 1024 * 1024)
+    decisions, uncovered = policy.decide(entries)
+    if pids is None:
+        uncovered = [entry for entry in uncovered if entry.rss > hog_bytes]
+        decisions = [
+            d for d in decisions if d.action != "protect" or d.entry.rss > hog_bytes
+        ]
+    if not decisions and not uncovered:
         print("No high memory usage processes found.")
-        return
+        return []
+    if uncovered and ask_ai and is_ollama_running():
+        ai_decisions, uncovered = ask_ai_for_decisions(uncovered, policy)
+        decisions.extend(ai_decisions)
+    outcomes = apply_decisions(decisions, dry_run=dry_run)
+    for outcome in outcomes:
+        entry = outcome.entry
+        status = "ok" if outcome.ok else "failed"
+        print(
+            f"[{outcome.action}] {entry.name} "
+            f"(PID {entry.pid}, {entry.rss / (1024 * 1024):.1f} MB): "
+            f"{outcome.detail} [{status}]"
+        )
+    for entry in uncovered:
+        print(
+            f"[no rule] {entry.name} (PID {entry.pid}) is using "
+            f"{entry.rss / (1024 * 1024):.1f} MB RAM; left alone."
+        )
+    return outcomes
 
-    for name, pid, mem in hogs:
-        while True:
-            prompt = f"Process '{name}' (PID {pid}) is using {mem:.1f} MB RAM.\nKill (k), Optimize (o), Skip (s), or AI (auto)?: "
-            choice = input(prompt).strip()
-            choice_lower = choice.lower()
-            if choice_lower == 'k':
-                try:
-                    p = psutil.Process(pid)
-                    p.terminate()
-                    p.wait(timeout=3)
-                    print(f"Killed process '{name}' (PID {pid}).")
-                except Exception as e:
-                    print(f"Failed to kill process: {e}")
-                break
-            elif choice_lower == 'o':
-                optimize_process(pid, name)
-                break
-            elif choice_lower == 's':
-                print(f"Skipped {name} (PID {pid}).")
-                break
-            elif choice_lower == 'ai':
-                ai_choice = ask_ai_for_fix(f"Should I kill, optimize, or skip process '{name}' with PID {pid} using {mem:.1f} MB RAM on a Linux system? Answer with one letter: k, o, or s.")
-                ai_choice = ai_choice.strip().lower()
-                if ai_choice in ('k', 'o', 's'):
-                    print(f"AI chose: {ai_choice}")
-                    if ai_choice == 'k':
-                        try:
-                            p = psutil.Process(pid)
-                            p.terminate()
-                            p.wait(timeout=3)
-                            print(f"Killed process '{name}' (PID {pid}) by AI choice.")
-                        except Exception as e:
-                            print(f"Failed to kill process: {e}")
-                    elif ai_choice == 'o':
-                        optimize_process(pid, name)
-                    else:
-                        print(f"Skipped {name} (PID {pid}) by AI choice.")
-                    break
-                else:
-                    print("AI returned invalid choice. Please enter k, o, s, or AI.")
-            else:
-                print("Invalid input. Please enter k, o, s, or AI.")
 
-def optimize_process(pid, name):
-    print(f"Optimizing memory for {name} (PID {pid})...")
-    try:
-        # This will drop caches to free up memory - requires sudo
-        subprocess.run(["sudo", "bash", "-c", "echo 3 > /proc/sys/vm/drop_caches"], check=True)
-        print(f"Optimized memory for {name} (PID {pid}).")
-    except subprocess.CalledProcessError:
-        print("Failed to optimize memory. You may need to run with sudo or adjust permissions.")
-
-def handle_storage():
-    total, used, free = shutil.disk_usage("/")
-    used_pct = used / total * 100
-    print(f"Storage usage at {used_pct:.1f}%")
+def ask_ai_for_decisions(entries, policy):
+    """
+    Ask the model, in one batch prompt, what to do with processes no rule covers.
+    Returns:
+        tuple: (list of Decision for allowed choices, list of entries left alone)
+    """
+    from sysfixai.ai import ask_ai_for_fixes, is_failed_response
+
+    choices = ", ".join(policy.allowed_actions)
+    questions = [
+        f"Process '{entry.name}' (PID {entry.pid}) is using "
+        f"{entry.rss / (1024 * 1024):.1f} MB RAM "
+        f"on a Linux system. Which single action should be taken: {choices}, or skip?"
+        for entry in entries
+    ]
+    answers = ask_ai_for_fixes(questions, mode="batch")
+    report_inference("memory policy")
+    decisions = []
+    left = []
+    for entry, answer in zip(entries, answers):
+        action = None
+        if not is_failed_response(answer):
+            action = action_from_advice(
+                extract_final_advice(answer), policy.allowed_actions
+            )
+        if action:
+            decisions.append(Decision(entry, action, None, "AI choice"))
+        else:
+            left.append(entry)
+    return decisions, left
+
+
+def handle_storage(mountpoint="/"):
+    usage = mount_usage(mountpoint)
+    print(
+        f"Storage usage on {mountpoint} at {usage.percent:.1f}% "
+        f"({usage.inodes_percent:.1f}% of inodes)"
+    )
+    print(f"Largest directories on {mountpoint}:")
+    dirs, complete = largest_directories(mountpoint, top_n=5)
+    for entry in dirs:
+        print(f"  {format_bytes(entry.size):>10}  {entry.path}")
+    if not complete:
+        print("  (scan stopped at its time budget; sizes are lower bounds)")
+    if mount_of("/var") != mount_of(mountpoint):
+        print(
+            f"Package caches and the journal are not on {mountpoint}; review the "
+            "directories above manually."
+        )
+        return
     while True:
         choice = input("Would you like to try to free up space? (y/n/AI): ").strip()
         choice_lower = choice.lower()
@@ -297,8 +858,12 @@ def handle_storage():
             print("Skipping storage optimization.")
             break
         elif choice_lower == 'ai':
-            ai_choice = ask_ai_for_fix("Should I try to free up disk space on the system? Answer yes or no.")
-            if ai_choice.strip().lower().startswith('y'):
+            from sysfixai.ai import ask_ai_for_fix
+
+            ai_choice = ask_ai_for_fix(
+                "Should I try to free up disk space on the system? Answer yes or no."
+            )
+            if extract_final_advice(ai_choice).strip().lower().startswith('y'):
                 free_space()
             else:
                 print("Skipping storage optimization by AI decision.")
@@ -306,90 +871,183 @@ def handle_storage():
         else:
             print("Please enter y, n, or AI.")
 
-def free_space():
-    print("Attempting to free space by clearing apt cache and systemd journal...")
-    try:
-        subprocess.run(["sudo", "apt-get", "clean"], check=True)
-        subprocess.run(["sudo", "journalctl", "--vacuum-time=2d"], check=True)
-        print("Freed up disk space.")
-    except subprocess.CalledProcessError:
-        print("Failed to free space automatically.")
-def ai_deep_dive():
-    """Interactive AI troubleshooting mode for complex issues."""
+
+def free_space(dry_run=False):
+    """
+    Run the cleanup actions available on this host, largest measured gain first.
+    With dry_run, only print what each action would reclaim.
+    """
+    print("Measuring reclaimable space...")
+    plan = reclaim_candidates()
+    if not plan:
+        print("Nothing to reclaim from package caches or the systemd journal.")
+        return plan
+    for action in plan:
+        print(
+            f"  {format_bytes(action.estimate):>10}  {action.name} "
+            f"({' '.join(action.command)})"
+        )
+    total = sum(action.estimate for action in plan)
+    print(f"  {format_bytes(total):>10}  total estimated")
+    if dry_run:
+        return plan
+    failed = False
+    for action in plan:
+        cmd = action.command if os.geteuid() == 0 else ["sudo"] + action.command
+        try:
+            trace.run(cmd, check=True)
+        except (subprocess.CalledProcessError, OSError):
+            print(f"Failed to clean {action.name}.")
+            failed = True
+    print(
+        "Failed to free some space automatically." if failed else "Freed up disk space."
+    )
+    return plan
+
+
+def stream_to_terminal(text):
+    """Print streamed model output as it arrives."""
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def ai_deep_dive(description=None, budget=None):
+    """
+    Troubleshoot a complex issue in one model round-trip.
+    Instead of asking follow-up questions, a bounded system snapshot (issues
+    from the dynamic checks, memory and load, top processes, mounts, sensors and
+    recent journal errors) is gathered and attached to the prompt.
+    Args:
+        description (str): The user's description of the problem; asked for once
+            if None.
+        budget (int): Token budget of the snapshot (default
+            context.CONTEXT_TOKEN_BUDGET).
+    """
     if not is_ollama_running():
-        print("[WARNING] Ollama server is not running. Please start it with: ollama serve")
+        print(
+            "[WARNING] Ollama server is not running. Please start it with: ollama serve"
+        )
         return
-    
-    print("Welcome to Deep Dive mode. I will ask you questions to diagnose complex issues.")
-    
-    # Step 1: Ask about the main issue
-    main_issue = input("What is the main issue you are experiencing? (e.g., slow performance, crashes, network problems): ")
-    
-    # Step 2: Ask for additional details
-    details = input("Please provide any additional details or symptoms: ")
-    
-    # Step 3: Ask about recent changes
-    recent_changes = input("Have you made any recent changes to your system? (e.g., software installations, updates): ")
-    
-    # Step 4: Combine inputs and query the AI
-    combined_prompt = (
-        f"User Issue: {main_issue}\n"
-        f"Details: {details}\n"
-        f"Recent Changes: {recent_changes}\n"
-        "Provide a detailed analysis and step-by-step troubleshooting guide."
+    from sysfixai.ai import ask_ai_deep_dive, deep_dive_prompt
+    from sysfixai.context import (
+        CONTEXT_TOKEN_BUDGET,
+        format_usage,
+        gather_sections,
+        render,
+    )
+
+    if description is None:
+        description = input(
+            "Describe the problem (e.g., slow performance, crashes, network problems): "
+        )
+    description = (
+        description.strip() or "No description given; diagnose from the snapshot."
+    )
+    print("Collecting a system snapshot...")
+    issues = collect_issues(run_diagnostics(checks=dynamic_checks()))
+    context = render(gather_sections(issues), budget or CONTEXT_TOKEN_BUDGET)
+    print(
+        "Prompt size: "
+        f"{format_usage(context, deep_dive_prompt(description, context.text))}"
     )
-    
-    ai_response = ask_ai_deep_dive(combined_prompt)
-    print(f"\nAI Analysis:\n{ai_response}")
-    
-    # Step 5: Apply fixes automatically based on AI recommendations
+
+    print("\nAI Analysis:")
+    ai_response = ask_ai_deep_dive(
+        description, on_token=stream_to_terminal, context=context.text
+    )
+    print()
+    report_inference("deep dive")
+    from sysfixai.ai import is_failed_response
+
+    if is_failed_response(ai_response):
+        print(
+            f"[AI] {ai_response or 'No analysis'}. "
+            "Using the built-in fixes for the detected issues."
+        )
+        run_actions(
+            [builtin_fix_action(issue) for issue in issues if issue.severity != "info"]
+        )
+        return
+
+    # The snapshot already holds what the read-only diagnostics would print.
     print("\nApplying fixes based on AI recommendations...")
-    apply_fixes_from_ai(ai_response)
+    apply_fixes_from_ai(ai_response, include_diagnostics=False)
+
+
+# In-process actions print as they go (free_space may also prompt for a sudo
+# password, handle_memory_hogs may ask the model), so they hold the terminal.
+FREE_SPACE = Action(
+    "free disk space",
+    func=lambda: free_space(),
+    reads={"disk"},
+    writes={"packages", "journal", "terminal"},
+    timeout=None,
+)
+HANDLE_MEMORY_HOGS = Action(
+    "apply memory policy",
+    func=lambda: handle_memory_hogs(),
+    reads={"processes"},
+    writes={"processes", "terminal"},
+    timeout=None,
+)
+
+
+def response_actions(ai_response, include_diagnostics=True):
+    """
+    Return the fix actions named by a free-form AI response.
+    include_diagnostics=False leaves out read-only steps (process and disk
+    listings) whose output the caller already has.
+    """
+    actions = []
+    if "Update Core Packages" in ai_response or "sudo dnf update" in ai_response:
+        actions.append(
+            Action(
+                "update core packages",
+                ["sudo", "dnf", "update", "-y"],
+                writes={"packages", "terminal"},
+                timeout=1800,
+            )
+        )
+    if (
+        "Monitor Processes" in ai_response
+        or "top" in ai_response
+        or "htop" in ai_response
+    ):
+        actions.append(
+            Action(
+                "monitor processes",
+                ["top", "-b", "-n", "1"],
+                reads={"processes"},
+                timeout=15,
+            )
+        )
+    if "Check Disk Space" in ai_response or "df -h" in ai_response:
+        actions.append(
+            Action("check disk space", ["df", "-h"], reads={"disk"}, timeout=15)
+        )
+    if "Restart Discord" in ai_response:
+        actions.append(
+            Action(
+                "restart discord",
+                ["pkill", "-f", "discord"],
+                reads={"processes"},
+                writes={"processes"},
+                timeout=15,
+            )
+        )
+    if not include_diagnostics:
+        actions = [action for action in actions if action.writes]
+    return actions
+
 
-def apply_fixes_from_ai(ai_response):
+def apply_fixes_from_ai(ai_response, include_diagnostics=True):
     """Apply fixes automatically based on the AI's recommendations."""
     # Parse the AI's response to identify recommended actions
-    if "Update Core Packages" in ai_response or "sudo dnf update" in ai_response:
-        print("Updating core packages...")
-        try:
-            subprocess.run(["sudo", "dnf", "update", "-y"], check=True)
-            print("Core packages updated successfully.")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to update core packages: {e}")
-    
     if "Check File Integrity" in ai_response or "ffmpeg -v error" in ai_response:
-        print("Checking file integrity...")
         # Placeholder for file integrity checks
         print("File integrity check completed (simulated).")
-    
-    if "Monitor Processes" in ai_response or "top" in ai_response or "htop" in ai_response:
-        print("Monitoring system processes...")
-        try:
-            subprocess.run(["top", "-b", "-n", "1"], check=True)
-            print("Process monitoring completed.")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to monitor processes: {e}")
-    
-    if "Check Disk Space" in ai_response or "df -h" in ai_response:
-        print("Checking disk space...")
-        try:
-            subprocess.run(["df", "-h"], check=True)
-            print("Disk space check completed.")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to check disk space: {e}")
-    
-    if "Restart Discord" in ai_response:
-        print("Restarting Discord...")
-        try:
-            subprocess.run(["pkill", "-f", "discord"], check=True)
-            print("Discord restarted successfully.")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to restart Discord: {e}")
-    
     if "Clear Media Player Cache" in ai_response:
-        print("Clearing media player cache...")
         # Placeholder for clearing cache
         print("Media player cache cleared (simulated).")
-    
+    run_actions(response_actions(ai_response, include_diagnostics))
     print("Fixes applied based on AI recommendations.")
-
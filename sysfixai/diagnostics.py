@@ -0,0 +1,139 @@
+"""Concurrent runner for the diagnostic checks."""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from sysfixai import trace
+from sysfixai.issues import Issue, as_issue
+from sysfixai.settings import CHECK_TIMEOUT
+
+CheckResult = namedtuple("CheckResult", ["name", "issues", "elapsed", "status"])
+CheckResult.__doc__ = """Outcome of a single check.
+
+status is one of "ok", "timeout" or "error". elapsed is wall time in seconds;
+for a timed out check it is the time spent waiting for it.
+"""
+
+
+def check_name(check):
+    """Return a short display name for a check callable."""
+    name = getattr(check, "__name__", repr(check))
+    return name[len("check_") :] if name.startswith("check_") else name
+
+
+def run_checks(checks, timeout=CHECK_TIMEOUT):
+    """
+    Run every check concurrently, each with its own deadline.
+    Checks run on daemon threads, so one that overruns its deadline is reported
+    as timed out and cannot hold up interpreter exit either.
+    Args:
+        checks (list): CheckSpec records, or callables taking no arguments and
+            returning a list of Issue records (legacy strings are classified
+            with as_issue).
+        timeout (float): Seconds each check may run before it is reported as timed out.
+    Returns:
+        list: CheckResult per check, in the order the checks were given.
+    """
+    checks = [
+        (
+            (check.name, check.func)
+            if hasattr(check, "func")
+            else (check_name(check), check)
+        )
+        for check in checks
+    ]
+    # Timings are kept per submitted check, not per callable: one function may
+    # be registered under two names.
+    started = [None] * len(checks)
+    finished = [None] * len(checks)
+    futures = []
+
+    def timed(idx, name, check, future):
+        started[idx] = time.monotonic()
+        try:
+            with trace.span(name, "check"):
+                issues = check()
+        except Exception as e:
+            finished[idx] = time.monotonic()
+            future.set_exception(e)
+        else:
+            finished[idx] = time.monotonic()
+            future.set_result(issues)
+
+    submitted = time.monotonic()
+    for idx, (name, check) in enumerate(checks):
+        future = Future()
+        threading.Thread(
+            target=timed,
+            args=(idx, name, check, future),
+            name=f"sysfix-check-{name}",
+            daemon=True,
+        ).start()
+        futures.append(future)
+    results = []
+    for idx, ((name, _), future) in enumerate(zip(checks, futures)):
+        remaining = submitted + timeout - time.monotonic()
+        try:
+            issues = future.result(timeout=max(remaining, 0))
+            status = "ok"
+        except FutureTimeout:
+            issues = [
+                Issue(
+                    "check_timeout",
+                    f"{name} check timed out after {timeout:g}s.",
+                    subject=name,
+                    value=timeout,
+                    unit="s",
+                )
+            ]
+            status = "timeout"
+        except Exception as e:
+            issues = [Issue("check_error", f"{name} check failed: {e}", subject=name)]
+            status = "error"
+        begin = started[idx] or submitted
+        end = finished[idx] or time.monotonic()
+        # Plain-function plugins may still return free-form strings
+        issues = [as_issue(issue) for issue in issues or []]
+        results.append(CheckResult(name, issues, end - begin, status))
+    return results
+
+
+def collect_issues(results):
+    """Flatten check results into a single list of issues."""
+    issues = []
+    for result in results:
+        issues.extend(result.issues)
+    return issues
+
+
+def format_timings(results):
+    """Return printable lines with the wall time of each check, slowest first."""
+    if not results:
+        return []
+    width = max(len(result.name) for result in results)
+    lines = []
+    for result in sorted(results, key=lambda r: r.elapsed, reverse=True):
+        lines.append(
+            f"{result.name:<{width}}  {result.elapsed * 1000:8.1f} ms  {result.status}"
+        )
+    return lines
+
+
+def build_report(issues, results, wall, host, not_run=()):
+    """
+    Return the machine-readable document for one diagnostics run (check --format json).
+    not_run lists (check name, reason) for checks that were dropped before running.
+    """
+    checks = [
+        {"name": r.name, "status": r.status, "elapsed_ms": round(r.elapsed * 1000, 3)}
+        for r in results
+    ]
+    return {
+        "host": host,
+        "wall_ms": round(wall * 1000, 3),
+        "issues": [issue.to_dict() for issue in issues],
+        "checks": checks,
+        "not_run": [{"name": name, "reason": reason} for name, reason in not_run],
+    }
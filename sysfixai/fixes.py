@@ -0,0 +1,22 @@
+"""Registry mapping issue kinds to fix handlers."""
+
+_FIXES = {}
+
+
+def register_fix(kind):
+    """Decorator registering a handler(issue) as the fix for an issue kind."""
+
+    def decorator(handler):
+        _FIXES[kind] = handler
+        return handler
+
+    return decorator
+
+
+def fix_for(kind):
+    """Return the fix handler registered for kind, or None."""
+    return _FIXES.get(kind)
+
+
+def registered_kinds():
+    return sorted(_FIXES)
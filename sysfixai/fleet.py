@@ -0,0 +1,270 @@
+"""Fleet mode: run diagnostics on many hosts concurrently and merge the results."""
+
+import json
+import os
+import re
+import shlex
+import socket
+import socketserver
+import subprocess
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from sysfixai.diagnostics import build_report
+from sysfixai.issues import Issue
+from sysfixai.settings import CHECK_TIMEOUT, FLEET_CONCURRENCY, HOST_TIMEOUT
+
+MAX_REPLY_BYTES = 4 * 1024 * 1024
+REMOTE_COMMAND = "python3 -m sysfixai.cli check --format json"
+
+HostResult = namedtuple("HostResult", ["target", "host", "issues", "elapsed", "error"])
+Finding = namedtuple(
+    "Finding", ["kind", "severity", "message", "hosts", "values", "unit"]
+)
+Finding.__doc__ = (
+    """One deduplicated issue across the fleet; hosts lists every host reporting it."""
+)
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+# -- agent -------------------------------------------------------------------
+
+
+def local_report(timeout=CHECK_TIMEOUT, name=None):
+    """Run the local checks and return the same document as `check --format json`."""
+    from sysfixai.core import run_diagnostics
+    from sysfixai.diagnostics import collect_issues
+
+    started = time.monotonic()
+    results = run_diagnostics(timeout=timeout)
+    wall = time.monotonic() - started
+    return build_report(
+        collect_issues(results), results, wall, name or os.uname().nodename
+    )
+
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    """One request per connection: a JSON line in, a JSON line out."""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline(64 * 1024) or b"{}")
+            if request.get("op") != "diagnose":
+                raise ValueError(f"unsupported op: {request.get('op')!r}")
+            timeout = min(float(request.get("timeout", CHECK_TIMEOUT)), HOST_TIMEOUT)
+            reply = local_report(timeout=timeout, name=self.server.agent_name)
+        except Exception as e:
+            reply = {"error": str(e)}
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class _UnixAgent(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPAgent(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def parse_address(address):
+    """Parse "unix:/path" or "tcp:host:port" into (family, address)."""
+    scheme, _, rest = address.partition(":")
+    if scheme == "unix" and rest:
+        return "unix", rest
+    if scheme == "tcp" and rest:
+        host, _, port = rest.rpartition(":")
+        return "tcp", (host or "127.0.0.1", int(port))
+    raise ValueError(
+        f"Unsupported agent address: {address} (use unix:/path or tcp:host:port)"
+    )
+
+
+def make_agent(address, name=None):
+    """Create (but do not start) an agent server listening on address."""
+    family, addr = parse_address(address)
+    if family == "unix":
+        if os.path.exists(addr):
+            os.unlink(addr)
+        server = _UnixAgent(addr, _AgentHandler)
+    else:
+        server = _TCPAgent(addr, _AgentHandler)
+    server.agent_name = name
+    return server
+
+
+# -- collection --------------------------------------------------------------
+
+
+def _query_socket(family, addr, timeout, check_timeout):
+    sock = socket.socket(
+        socket.AF_UNIX if family == "unix" else socket.AF_INET, socket.SOCK_STREAM
+    )
+    sock.settimeout(timeout)
+    with sock:
+        sock.connect(addr)
+        sock.sendall(
+            json.dumps({"op": "diagnose", "timeout": check_timeout}).encode() + b"\n"
+        )
+        chunks = []
+        received = 0
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+            received += len(data)
+            if received > MAX_REPLY_BYTES:
+                raise ValueError("agent reply too large")
+    return json.loads(b"".join(chunks))
+
+
+def _query_command(argv, timeout):
+    proc = subprocess.run(argv, capture_output=True, text=True, timeout=timeout)
+    if proc.returncode != 0:
+        raise RuntimeError(
+            proc.stderr.strip().splitlines()[-1]
+            if proc.stderr.strip()
+            else f"exit status {proc.returncode}"
+        )
+    return json.loads(proc.stdout)
+
+
+def target_command(target):
+    """Return the argv for an ssh:/cmd: target, or None for socket targets."""
+    scheme, _, rest = target.partition(":")
+    if scheme == "ssh":
+        return [
+            "ssh",
+            "-o",
+            "BatchMode=yes",
+            "-o",
+            "ConnectTimeout=5",
+            rest,
+            REMOTE_COMMAND,
+        ]
+    if scheme == "cmd":
+        return shlex.split(rest)
+    return None
+
+
+def collect_host(target, timeout=HOST_TIMEOUT, check_timeout=CHECK_TIMEOUT):
+    """
+    Run diagnostics on one target and return a HostResult.
+    Targets are "unix:/path" or "tcp:host:port" (a running agent), "ssh:host"
+    (runs the CLI remotely) or "cmd:<command>" (any command printing
+    `check --format json` output). Errors are returned, never raised.
+    """
+    started = time.monotonic()
+    try:
+        argv = target_command(target)
+        if argv is not None:
+            document = _query_command(argv, timeout)
+        else:
+            family, addr = parse_address(target)
+            document = _query_socket(family, addr, timeout, check_timeout)
+        if "error" in document:
+            raise RuntimeError(document["error"])
+        issues = [Issue.from_dict(item) for item in document.get("issues", [])]
+        return HostResult(
+            target,
+            document.get("host") or target,
+            issues,
+            time.monotonic() - started,
+            None,
+        )
+    except subprocess.TimeoutExpired:
+        error = f"timed out after {timeout:g}s"
+    except socket.timeout:
+        error = f"timed out after {timeout:g}s"
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    return HostResult(target, target, [], time.monotonic() - started, error)
+
+
+def sweep(
+    targets,
+    concurrency=FLEET_CONCURRENCY,
+    timeout=HOST_TIMEOUT,
+    check_timeout=CHECK_TIMEOUT,
+):
+    """
+    Collect diagnostics from every target, at most `concurrency` at a time, in target
+    order.
+    """
+    targets = list(targets)
+    if not targets:
+        return []
+    with ThreadPoolExecutor(
+        max_workers=min(concurrency, len(targets)), thread_name_prefix="sysfix-fleet"
+    ) as pool:
+        return list(
+            pool.map(
+                lambda target: collect_host(target, timeout, check_timeout), targets
+            )
+        )
+
+
+# -- aggregation -------------------------------------------------------------
+
+
+def finding_key(issue):
+    """Issues match across hosts on kind and message with the numbers masked."""
+    return issue.kind, _NUMBER.sub("#", issue.message)
+
+
+def aggregate(results, include_info=False):
+    """
+    Merge per-host issues into Findings, most widespread (then most severe) first.
+    Informational facts (CPU model, node name...) are skipped unless include_info.
+    """
+    severity_rank = {"critical": 2, "warning": 1, "info": 0}
+    groups = {}
+    for result in results:
+        for issue in result.issues:
+            if issue.severity == "info" and not include_info:
+                continue
+            key = finding_key(issue)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "issue": issue,
+                    "hosts": [],
+                    "values": [],
+                    "severity": issue.severity,
+                }
+            if result.host not in group["hosts"]:
+                group["hosts"].append(result.host)
+            if isinstance(issue.value, (int, float)):
+                group["values"].append(issue.value)
+            if severity_rank[issue.severity] > severity_rank[group["severity"]]:
+                group["severity"] = issue.severity
+    findings = [
+        Finding(
+            g["issue"].kind,
+            g["severity"],
+            g["issue"].message,
+            g["hosts"],
+            g["values"],
+            g["issue"].unit,
+        )
+        for g in groups.values()
+    ]
+    findings.sort(key=lambda f: (-len(f.hosts), -severity_rank[f.severity], f.kind))
+    return findings
+
+
+def format_finding(finding, max_hosts=5):
+    """Return a one-line summary such as "temperature on 14 hosts: ..."."""
+    hosts = ", ".join(finding.hosts[:max_hosts])
+    if len(finding.hosts) > max_hosts:
+        hosts += f", +{len(finding.hosts) - max_hosts} more"
+    count = len(finding.hosts)
+    counted = f"{count} host{'s' if count != 1 else ''}"
+    line = f"[{finding.severity}] {finding.kind} on {counted}: {finding.message}"
+    if len(finding.values) > 1:
+        low, high = min(finding.values), max(finding.values)
+        line += f" (range {low:g}-{high:g}{finding.unit or ''})"
+    return f"{line}  [{hosts}]"
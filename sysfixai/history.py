@@ -0,0 +1,189 @@
+"""Bounded time-series history of process RSS and sensor temperatures, with trend
+analysis."""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from sysfixai.settings import cache_dir
+
+RETENTION = 3 * 24 * 3600  # seconds of samples kept
+MAX_SAMPLES = 500000  # hard cap on stored samples across all series
+MIN_INTERVAL = 10  # seconds; samples closer together than this are skipped
+PRUNE_EVERY = 50  # writes between retention passes
+
+Trend = namedtuple(
+    "Trend", ["key", "label", "samples", "span", "slope", "first", "last", "r2"]
+)
+Trend.__doc__ = """Least-squares fit of one series over a window; slope is in value
+units per minute."""
+
+
+class HistoryStore:
+    """
+    SQLite ring buffer of (series, timestamp, value) samples.
+
+    Old samples are pruned by age and by a global row cap, so the file stays
+    bounded however long sysfix-ai runs. Trend fits are computed inside SQLite
+    with one grouped aggregate over the window, so analysing every series costs
+    a single indexed range scan rather than a Python loop per sample.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        retention=RETENTION,
+        max_samples=MAX_SAMPLES,
+        min_interval=MIN_INTERVAL,
+    ):
+        self.path = path or os.path.join(cache_dir(), "history.sqlite3")
+        self.retention = retention
+        self.max_samples = max_samples
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._last = {}
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "CREATE TABLE IF NOT EXISTS series ("
+            " id INTEGER PRIMARY KEY, kind TEXT NOT NULL, key TEXT NOT NULL,"
+            " label TEXT, UNIQUE (kind, key));"
+            "CREATE TABLE IF NOT EXISTS samples ("
+            " series INTEGER NOT NULL, ts REAL NOT NULL, value REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS samples_by_series ON samples (series, ts);"
+            "CREATE INDEX IF NOT EXISTS samples_by_ts ON samples (ts);"
+        )
+
+    def _series_id(self, kind, key, label):
+        row = self._db.execute(
+            "SELECT id FROM series WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row:
+            return row[0]
+        return self._db.execute(
+            "INSERT INTO series (kind, key, label) VALUES (?, ?, ?)", (kind, key, label)
+        ).lastrowid
+
+    def record(self, kind, rows, ts=None):
+        """
+        Append one sample per (key, label, value) row for a series kind.
+        Returns False if the previous sample of this kind is younger than min_interval.
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            last = self._last.get(kind)
+            if last is None:
+                found = self._db.execute(
+                    "SELECT MAX(s.ts) FROM samples s JOIN series r ON r.id = s.series "
+                    "WHERE r.kind = ?",
+                    (kind,),
+                ).fetchone()[0]
+                last = found if found is not None else float("-inf")
+            if ts - last < self.min_interval:
+                return False
+            with self._db:
+                samples = [
+                    (self._series_id(kind, key, label), ts, float(value))
+                    for key, label, value in rows
+                ]
+                self._db.executemany(
+                    "INSERT INTO samples (series, ts, value) VALUES (?, ?, ?)", samples
+                )
+            self._last[kind] = ts
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 1:
+                self._prune(ts)
+        return True
+
+    def _prune(self, now):
+        with self._db:
+            self._db.execute(
+                "DELETE FROM samples WHERE ts < ?", (now - self.retention,)
+            )
+            self._db.execute(
+                "DELETE FROM samples WHERE rowid <= "
+                "(SELECT rowid FROM samples ORDER BY rowid DESC"
+                " LIMIT 1 OFFSET ?)",
+                (self.max_samples,),
+            )
+            self._db.execute(
+                "DELETE FROM series WHERE id NOT IN "
+                "(SELECT DISTINCT series FROM samples)"
+            )
+
+    def prune(self, now=None):
+        """Apply the retention policy now."""
+        with self._lock:
+            self._prune(time.time() if now is None else now)
+
+    def trends(self, kind, window, now=None, min_samples=5):
+        """
+        Fit a line to every series of a kind over the last `window` seconds.
+        Returns:
+            list: Trend per series with at least min_samples samples in the window.
+        """
+        now = time.time() if now is None else now
+        start = now - window
+        # x is measured from the window start to keep the sums well conditioned.
+        query = (
+            "SELECT r.key, r.label, COUNT(*), MIN(s.ts), MAX(s.ts),"
+            " SUM(s.ts - :start), SUM(s.value), SUM((s.ts - :start) * s.value),"
+            " SUM((s.ts - :start) * (s.ts - :start)), SUM(s.value * s.value)"
+            " FROM samples s JOIN series r ON r.id = s.series"
+            " WHERE r.kind = :kind AND s.ts >= :start AND s.ts <= :now"
+            " GROUP BY s.series HAVING COUNT(*) >= :min_samples"
+        )
+        with self._lock:
+            rows = self._db.execute(
+                query,
+                {"kind": kind, "start": start, "now": now, "min_samples": min_samples},
+            ).fetchall()
+            ends = {}
+            if rows:
+                for key, first, last in self._db.execute(
+                    "SELECT r.key,"
+                    " (SELECT value FROM samples WHERE series = r.id AND ts >= :start"
+                    " ORDER BY ts LIMIT 1),"
+                    " (SELECT value FROM samples WHERE series = r.id AND ts <= :now"
+                    " ORDER BY ts DESC LIMIT 1)"
+                    " FROM series r WHERE r.kind = :kind",
+                    {"kind": kind, "start": start, "now": now},
+                ):
+                    ends[key] = (first, last)
+        trends = []
+        for key, label, n, t0, t1, sx, sy, sxy, sxx, syy in rows:
+            denom = n * sxx - sx * sx
+            if denom <= 0:
+                continue
+            slope = (n * sxy - sx * sy) / denom
+            var_y = n * syy - sy * sy
+            r2 = (n * sxy - sx * sy) ** 2 / (denom * var_y) if var_y > 0 else 0.0
+            first, last = ends.get(key, (None, None))
+            trends.append(Trend(key, label, n, t1 - t0, slope * 60, first, last, r2))
+        return trends
+
+    def stats(self):
+        with self._lock:
+            samples = self._db.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
+            series = self._db.execute("SELECT COUNT(*) FROM series").fetchone()[0]
+        return {"samples": samples, "series": series, "path": self.path}
+
+    def close(self):
+        self._db.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history():
+    """Return the process-wide HistoryStore."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+        return _store
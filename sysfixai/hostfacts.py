@@ -0,0 +1,91 @@
+"""Per-boot cache of static host facts (dmidecode, /proc/cpuinfo, tool paths)."""
+
+import json
+import os
+import shutil
+import threading
+
+from sysfixai.settings import cache_dir
+
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+
+_lock = threading.Lock()
+_facts = None  # in-memory copy of the file for the current boot
+
+
+def boot_id():
+    """Return the kernel boot ID, or "" if it cannot be read."""
+    try:
+        with open(BOOT_ID_PATH) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def facts_path():
+    return os.path.join(cache_dir(), "hostfacts.json")
+
+
+def _load():
+    global _facts
+    if _facts is not None:
+        return _facts
+    current = boot_id()
+    facts = {}
+    try:
+        with open(facts_path()) as f:
+            stored = json.load(f)
+        if current and stored.get("boot_id") == current:
+            facts = stored.get("facts", {})
+    except (OSError, ValueError):
+        pass
+    _facts = facts
+    return _facts
+
+
+def _save():
+    path = facts_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        # Facts include root-only data such as the baseboard serial number.
+        with os.fdopen(
+            os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w"
+        ) as f:
+            json.dump({"boot_id": boot_id(), "facts": _facts}, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # an unwritable cache only costs us the recomputation
+
+
+def host_fact(name, compute):
+    """
+    Return a fact that cannot change before the next reboot.
+    The value is computed at most once per boot and persisted under the XDG
+    cache directory. compute() must return a JSON-serialisable value; it may
+    raise to signal a transient failure that should not be cached.
+    """
+    with _lock:
+        facts = _load()
+        if name in facts:
+            return facts[name]
+    value = compute()
+    with _lock:
+        _load()[name] = value
+        _save()
+    return value
+
+
+def which(binary):
+    """shutil.which(binary), looked up at most once per boot."""
+    return host_fact(f"{binary}_path", lambda: shutil.which(binary))
+
+
+def clear():
+    """Forget every cached fact, in memory and on disk."""
+    global _facts
+    with _lock:
+        _facts = None
+        try:
+            os.remove(facts_path())
+        except OSError:
+            pass
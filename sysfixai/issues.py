@@ -0,0 +1,101 @@
+"""Structured issue records produced by the diagnostic checks."""
+
+SEVERITIES = ("info", "warning", "critical")
+
+
+class Issue:
+    """
+    A single finding from a check.
+
+    kind names the problem class ("memory", "storage", ...) and is what fixes
+    are dispatched on. subject identifies what is affected (a PID, mount point,
+    sensor or fact name), value/threshold/unit carry the measured metric.
+    str(issue) is the human readable message.
+    """
+
+    __slots__ = ("kind", "message", "severity", "subject", "value", "threshold", "unit")
+
+    def __init__(
+        self,
+        kind,
+        message,
+        severity="warning",
+        subject=None,
+        value=None,
+        threshold=None,
+        unit=None,
+    ):
+        if severity not in SEVERITIES:
+            raise ValueError(f"Unknown severity: {severity}")
+        self.kind = kind
+        self.message = message
+        self.severity = severity
+        self.subject = subject
+        self.value = value
+        self.threshold = threshold
+        self.unit = unit
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return (
+            f"Issue({self.kind!r}, {self.message!r}, "
+            f"severity={self.severity!r}, subject={self.subject!r})"
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Issue):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    @property
+    def key(self):
+        """
+        Identity of the issue across runs: kind plus subject (or message if there is
+        none).
+        """
+        return (self.kind, self.subject if self.subject is not None else self.message)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild an Issue from to_dict() output, ignoring unknown keys such as "host".
+        """
+        return cls(
+            data["kind"],
+            data["message"],
+            severity=data.get("severity", "warning"),
+            subject=data.get("subject"),
+            value=data.get("value"),
+            threshold=data.get("threshold"),
+            unit=data.get("unit"),
+        )
+
+
+def as_issue(issue):
+    """
+    Return issue as an Issue, classifying legacy free-form strings by their text.
+    """
+    if isinstance(issue, Issue):
+        return issue
+    text = str(issue)
+    lowered = text.lower()
+    if "memory usage" in lowered:
+        return Issue("memory", text)
+    if "storage almost full" in lowered:
+        return Issue("storage", text)
+    if "inodes almost exhausted" in lowered:
+        return Issue("inodes", text)
+    if "audio system" in lowered:
+        return Issue("audio", text)
+    if "temperature alert" in lowered:
+        return Issue("temperature", text, severity="critical")
+    if "bios" in lowered:
+        return Issue("bios", text, severity="critical")
+    return Issue("other", text, severity="info")
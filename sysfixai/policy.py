@@ -0,0 +1,299 @@
+"""Declarative memory remediation policy: which processes to act on, and how."""
+
+import fnmatch
+import json
+import os
+import signal
+from collections import namedtuple
+
+import psutil
+
+from sysfixai.procsnap import invalidate, open_process
+from sysfixai.settings import config_dir
+
+ACTIONS = ("terminate", "stop", "memory_high", "oom_score_adj")
+# terminate and stop must be allowed explicitly
+DEFAULT_ALLOWED = ("memory_high", "oom_score_adj")
+DEFAULT_PROTECTED = (
+    "systemd*",
+    "init",
+    "sshd",
+    "dbus*",
+    "Xorg",
+    "Xwayland",
+    "pipewire*",
+    "pulseaudio",
+    "gnome-shell",
+    "kwin*",
+    "sysfix*",
+)
+DEFAULT_OOM_SCORE_ADJ = 500
+TERMINATE_GRACE = 3  # seconds terminated processes get to exit
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+Rule = namedtuple("Rule", ["name", "cmdline", "min_rss_mb", "action", "value"])
+Rule.__doc__ = """Match processes by name and cmdline glob (case-insensitive) at or
+above min_rss_mb."""
+
+Decision = namedtuple("Decision", ["entry", "action", "value", "reason"])
+Decision.__doc__ = (
+    """What to do with one process; action is one of ACTIONS or "protect"."""
+)
+
+Outcome = namedtuple("Outcome", ["entry", "action", "ok", "detail"])
+
+_ADVICE_WORDS = (
+    ("oom_score_adj", ("oom_score_adj", "oom score")),
+    ("memory_high", ("memory.high", "memory_high", "cgroup", "limit")),
+    ("stop", ("sigstop", "suspend", "pause")),
+    ("terminate", ("terminate", "kill")),
+)
+
+
+class Policy:
+    """
+    Parsed policy file. The JSON document looks like:
+
+        {"allowed_actions": ["terminate", "oom_score_adj"],
+         "protected": ["sshd", "postgres*"],
+         "rules": [{"name": "chrome*", "cmdline": "*--type=renderer*",
+                    "min_rss_mb": 800, "action": "terminate"},
+                   {"name": "java", "min_rss_mb": 4000, "action": "memory_high",
+                    "value": 3500}]}
+
+    Rules are tried in order and the first match wins. Protected names are
+    never touched, whatever the rules say; the file's "protected" list adds to
+    DEFAULT_PROTECTED unless "replace_default_protected" is true. value is MB
+    for memory_high (default: the current RSS) and the score for
+    oom_score_adj (default 500).
+    """
+
+    def __init__(
+        self, rules=(), protected=DEFAULT_PROTECTED, allowed_actions=DEFAULT_ALLOWED
+    ):
+        self.rules = list(rules)
+        self.protected = [pattern.lower() for pattern in protected]
+        self.allowed_actions = tuple(allowed_actions)
+        for action in self.allowed_actions:
+            if action not in ACTIONS:
+                raise ValueError(
+                    f"Unknown action {action!r} in allowed_actions "
+                    f"(choose from {', '.join(ACTIONS)})"
+                )
+        for rule in self.rules:
+            if rule.action not in self.allowed_actions:
+                raise ValueError(
+                    f"Rule for {rule.name!r} uses {rule.action!r}, which "
+                    "allowed_actions does not permit"
+                )
+
+    @classmethod
+    def from_dict(cls, document):
+        rules = []
+        for item in document.get("rules", []):
+            if "action" not in item:
+                raise ValueError(f"Policy rule without an action: {item}")
+            rules.append(
+                Rule(
+                    item.get("name", "*"),
+                    item.get("cmdline"),
+                    float(item.get("min_rss_mb", 0)),
+                    item["action"],
+                    item.get("value"),
+                )
+            )
+        protected = tuple(document.get("protected", ()))
+        if not document.get("replace_default_protected", False):
+            protected = DEFAULT_PROTECTED + protected
+        return cls(rules, protected, document.get("allowed_actions", DEFAULT_ALLOWED))
+
+    def is_protected(self, entry):
+        name = entry.name.lower()
+        return entry.pid in (1, os.getpid()) or any(
+            fnmatch.fnmatchcase(name, p) for p in self.protected
+        )
+
+    def rule_for(self, entry):
+        """Return the first rule matching a process snapshot entry, or None."""
+        name = entry.name.lower()
+        cmdline = " ".join(entry.cmdline).lower()
+        rss_mb = entry.rss / (1024 * 1024)
+        for rule in self.rules:
+            if rss_mb < rule.min_rss_mb or not fnmatch.fnmatchcase(
+                name, rule.name.lower()
+            ):
+                continue
+            if rule.cmdline and not fnmatch.fnmatchcase(cmdline, rule.cmdline.lower()):
+                continue
+            return rule
+        return None
+
+    def min_rss_mb(self):
+        """Smallest RSS any rule acts on (None without rules)."""
+        return min((rule.min_rss_mb for rule in self.rules), default=None)
+
+    def decide(self, entries):
+        """
+        Split processes into decisions and the ones no rule covers.
+        Returns:
+            tuple: (list of Decision, list of uncovered entries)
+        """
+        decisions = []
+        uncovered = []
+        for entry in entries:
+            if self.is_protected(entry):
+                decisions.append(Decision(entry, "protect", None, "protected"))
+                continue
+            rule = self.rule_for(entry)
+            if rule is None:
+                uncovered.append(entry)
+            else:
+                decisions.append(
+                    Decision(entry, rule.action, rule.value, f"rule {rule.name}")
+                )
+        return decisions, uncovered
+
+
+def policy_path():
+    """Return the policy file location ($SYSFIX_POLICY or <config dir>/policy.json)."""
+    return os.environ.get("SYSFIX_POLICY") or os.path.join(config_dir(), "policy.json")
+
+
+def load_policy(path=None):
+    """
+    Load the policy file, or the built-in defaults if there is none.
+    Raises:
+        ValueError: If the file is not valid JSON or not a valid policy.
+    """
+    path = path or policy_path()
+    try:
+        with open(path) as f:
+            document = json.load(f)
+    except FileNotFoundError:
+        return Policy()
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid policy file {path}: {e}") from e
+    return Policy.from_dict(document)
+
+
+def cgroup_path(pid):
+    """Return the cgroup v2 directory of a process, or None."""
+    with open(f"/proc/{pid}/cgroup") as f:
+        for line in f:
+            if line.startswith("0::"):
+                return CGROUP_ROOT + line[3:].strip()
+    return None
+
+
+def set_memory_high(entry, megabytes):
+    """
+    Write memory.high for the process's cgroup v2. Shared cgroups (the root
+    and *.slice units) are refused, since the limit would apply to every
+    process in them.
+    """
+    path = cgroup_path(entry.pid)
+    if not path or path.rstrip("/") == CGROUP_ROOT or path.endswith(".slice"):
+        raise ValueError(
+            f"process is in a shared cgroup ({path or 'none'}); not limiting it"
+        )
+    with open(os.path.join(path, "memory.high"), "w") as f:
+        f.write(str(int(megabytes * 1024 * 1024)))
+    return f"memory.high={int(megabytes)}M on {path[len(CGROUP_ROOT):]}"
+
+
+def set_oom_score_adj(entry, score):
+    if not -1000 <= int(score) <= 1000:
+        raise ValueError(f"oom_score_adj {score} out of range -1000..1000")
+    with open(f"/proc/{entry.pid}/oom_score_adj", "w") as f:
+        f.write(str(int(score)))
+    return f"oom_score_adj={int(score)}"
+
+
+def apply_decisions(decisions, dry_run=False, grace=TERMINATE_GRACE):
+    """
+    Carry out decisions in one batch.
+    Every terminate is signalled first and all of them are waited for together,
+    so the batch takes at most `grace` seconds however many processes it hits.
+    Returns:
+        list: Outcome per decision, in input order.
+    """
+    outcomes = {}
+    terminating = {}
+    for position, decision in enumerate(decisions):
+        entry, action = decision.entry, decision.action
+        if action == "protect" or dry_run:
+            outcomes[position] = Outcome(
+                entry,
+                action,
+                True,
+                (
+                    decision.reason
+                    if action == "protect"
+                    else f"dry run ({decision.reason})"
+                ),
+            )
+            continue
+        try:
+            if action == "terminate":
+                proc = open_process(entry)
+                proc.terminate()
+                terminating[proc] = position
+                continue
+            if action == "stop":
+                open_process(entry).send_signal(signal.SIGSTOP)
+                detail = "stopped (SIGCONT to resume)"
+            elif action == "memory_high":
+                open_process(entry)
+                limit = (
+                    decision.value
+                    if decision.value is not None
+                    else entry.rss / (1024 * 1024)
+                )
+                detail = set_memory_high(entry, limit)
+            elif action == "oom_score_adj":
+                open_process(entry)
+                detail = set_oom_score_adj(
+                    entry,
+                    (
+                        decision.value
+                        if decision.value is not None
+                        else DEFAULT_OOM_SCORE_ADJ
+                    ),
+                )
+            else:
+                raise ValueError(f"unknown action {action!r}")
+            outcomes[position] = Outcome(entry, action, True, detail)
+        except (psutil.Error, OSError, ValueError) as e:
+            outcomes[position] = Outcome(
+                entry, action, False, str(e) or type(e).__name__
+            )
+    if terminating:
+        gone, alive = psutil.wait_procs(list(terminating), timeout=grace)
+        for proc in gone:
+            outcomes[terminating[proc]] = Outcome(
+                decisions[terminating[proc]].entry, "terminate", True, "terminated"
+            )
+        for proc in alive:
+            outcomes[terminating[proc]] = Outcome(
+                decisions[terminating[proc]].entry,
+                "terminate",
+                False,
+                f"still running after {grace}s",
+            )
+    if any(d.action in ("terminate", "stop") for d in decisions) and not dry_run:
+        invalidate()
+    return [outcomes[position] for position in range(len(decisions))]
+
+
+def action_from_advice(advice, allowed):
+    """
+    Map a model answer to one of the allowed actions, or None to leave the process
+    alone.
+    """
+    text = advice.lower()
+    if "skip" in text or "leave" in text:
+        return None
+    for action, words in _ADVICE_WORDS:
+        if action in allowed and any(word in text for word in words):
+            return action
+    return None
@@ -0,0 +1,162 @@
+"""Single-pass process table snapshot shared by the memory checks and fixes."""
+
+import sys
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+import psutil
+
+from sysfixai import trace
+
+SNAPSHOT_TTL = 2.0  # seconds a snapshot may be reused before it is rescanned
+
+ProcessEntry = namedtuple(
+    "ProcessEntry", ["pid", "name", "rss", "cmdline", "create_time"]
+)
+
+
+class ProcessSnapshot:
+    """
+    Column-oriented copy of the process table taken in one psutil scan.
+
+    pid, rss and create_time live in typed arrays; names are interned. Two
+    indexes are built at scan time: lower-cased name -> rows, and rows sorted
+    by RSS (largest first), so name and "RSS above threshold" lookups do not
+    walk the whole table again.
+    """
+
+    __slots__ = (
+        "taken_at",
+        "pids",
+        "rss",
+        "create_times",
+        "names",
+        "cmdlines",
+        "_by_name",
+        "_by_rss",
+    )
+
+    def __init__(self, rows, taken_at=None):
+        self.taken_at = time.monotonic() if taken_at is None else taken_at
+        self.pids = array("q")
+        self.rss = array("Q")
+        self.create_times = array("d")
+        self.names = []
+        self.cmdlines = []
+        self._by_name = {}
+        for pid, name, rss, cmdline, create_time in rows:
+            row = len(self.pids)
+            name = sys.intern(name or "")
+            self.pids.append(pid)
+            self.rss.append(rss or 0)
+            self.create_times.append(create_time or 0.0)
+            self.names.append(name)
+            self.cmdlines.append(tuple(cmdline or ()))
+            self._by_name.setdefault(name.lower(), array("l")).append(row)
+        self._by_rss = array(
+            "l", sorted(range(len(self.pids)), key=self.rss.__getitem__, reverse=True)
+        )
+
+    @classmethod
+    def scan(cls):
+        """Walk /proc once and return a new snapshot."""
+        rows = []
+        attrs = ["pid", "name", "memory_info", "cmdline", "create_time"]
+        with trace.span("process_iter", "psutil"):
+            for proc in psutil.process_iter(attrs):
+                info = proc.info
+                mem = info.get("memory_info")
+                rows.append(
+                    (
+                        info["pid"],
+                        info.get("name"),
+                        mem.rss if mem else 0,
+                        info.get("cmdline"),
+                        info.get("create_time"),
+                    )
+                )
+        with trace.span("index", "psutil", processes=len(rows)):
+            return cls(rows)
+
+    def __len__(self):
+        return len(self.pids)
+
+    def age(self):
+        return time.monotonic() - self.taken_at
+
+    def entry(self, row):
+        return ProcessEntry(
+            self.pids[row],
+            self.names[row],
+            self.rss[row],
+            self.cmdlines[row],
+            self.create_times[row],
+        )
+
+    def __iter__(self):
+        for row in range(len(self.pids)):
+            yield self.entry(row)
+
+    def find_name(self, pattern):
+        """Return entries whose name contains pattern (case-insensitive)."""
+        pattern = pattern.lower()
+        rows = []
+        for name, name_rows in self._by_name.items():
+            if pattern in name:
+                rows.extend(name_rows)
+        return [self.entry(row) for row in sorted(rows)]
+
+    def above_rss(self, threshold):
+        """Return entries with RSS above threshold bytes, largest first."""
+        entries = []
+        for row in self._by_rss:
+            if self.rss[row] <= threshold:
+                break
+            entries.append(self.entry(row))
+        return entries
+
+    def top_rss(self, count):
+        """Return the count largest processes by RSS."""
+        return [self.entry(row) for row in self._by_rss[:count]]
+
+
+_lock = threading.Lock()
+_current = None
+
+
+def get_snapshot(max_age=SNAPSHOT_TTL, refresh=False):
+    """
+    Return the shared process snapshot, rescanning if it is older than max_age.
+    Args:
+        max_age (float): Seconds a cached snapshot may be reused.
+        refresh (bool): Force a new scan regardless of age.
+    Returns:
+        ProcessSnapshot: The current snapshot.
+    """
+    global _current
+    with _lock:
+        if refresh or _current is None or _current.age() > max_age:
+            _current = ProcessSnapshot.scan()
+        return _current
+
+
+def invalidate():
+    """Drop the shared snapshot, e.g. after processes were terminated."""
+    global _current
+    with _lock:
+        _current = None
+
+
+def open_process(entry):
+    """
+    Return a psutil.Process for a snapshot entry, guarding against PID reuse.
+    Raises psutil.NoSuchProcess if the PID now belongs to a different process.
+    """
+    proc = psutil.Process(entry.pid)
+    if entry.create_time and abs(proc.create_time() - entry.create_time) > 0.01:
+        raise psutil.NoSuchProcess(
+            entry.pid, entry.name, "PID was reused since the snapshot"
+        )
+    return proc
@@ -0,0 +1,350 @@
+"""Resource-aware placement of model calls: run locally, offload to a remote Ollama,
+queue or degrade."""
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import psutil
+
+from sysfixai.settings import (
+    INFERENCE_QUEUE_TIMEOUT,
+    OLLAMA_HOST,
+    OLLAMA_REMOTE,
+    cache_dir,
+    split_host,
+)
+
+PSI_ROOT = "/proc/pressure"
+MODEL_MEMORY_MB = 1500  # RAM the model takes when Ollama has to load it
+MIN_AVAILABLE_MB = 512  # headroom left to the rest of the system
+MAX_LOAD_PER_CPU = 2.0  # 1-minute load average per CPU
+PSI_LIMITS = {"memory": 10.0, "io": 40.0, "cpu": 60.0}  # "some" avg10 stall percentages
+ABORT_PSI_MEMORY = 25.0  # memory stall % that cancels a local call while it generates
+POLL_INTERVAL = 1.0  # seconds between pressure readings while a call is queued
+GUARD_INTERVAL = 0.5  # seconds between pressure readings while a call generates
+LEDGER_RUNS = 1000  # runs kept in the inference cost ledger
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1", "0.0.0.0")
+
+Pressure = namedtuple("Pressure", ["available_mb", "load_per_cpu", "psi"])
+Pressure.__doc__ = """Host load: available memory, 1-minute load per CPU and PSI
+"some" avg10 % per resource."""
+Placement = namedtuple("Placement", ["where", "host", "reasons", "waited"])
+Placement.__doc__ = """Where a model call runs: "local", "remote" or "degrade" (no
+model, use the built-in fixes)."""
+InferenceCost = namedtuple(
+    "InferenceCost",
+    [
+        "where",
+        "host",
+        "elapsed",
+        "waited",
+        "prompt_chars",
+        "prompt_tokens",
+        "tokens",
+        "outcome",
+    ],
+)
+InferenceCost.__doc__ = """One model call; outcome is "ok", "cancelled" (early stop),
+"aborted" (host pressure during generation), "deferred" (never started) or "failed"."""
+
+
+def read_psi(root=PSI_ROOT):
+    """
+    Return the "some" avg10 stall percentage per resource; kernels without PSI give {}.
+    """
+    psi = {}
+    for resource in PSI_LIMITS:
+        try:
+            with open(os.path.join(root, resource)) as f:
+                line = f.readline()
+        except OSError:
+            continue
+        for field in line.split()[1:]:
+            if field.startswith("avg10="):
+                psi[resource] = float(field[len("avg10=") :])
+    return psi
+
+
+def read_pressure(psi_root=PSI_ROOT):
+    return Pressure(
+        psutil.virtual_memory().available / (1024 * 1024),
+        os.getloadavg()[0] / (os.cpu_count() or 1),
+        read_psi(psi_root),
+    )
+
+
+def pressure_reasons(pressure, need_mb=0):
+    """
+    Return why the host cannot take a model call needing need_mb of RAM (empty if it
+    can).
+    """
+    reasons = []
+    if pressure.available_mb < need_mb + MIN_AVAILABLE_MB:
+        reasons.append(
+            f"{pressure.available_mb:.0f} MB available, "
+            f"{need_mb + MIN_AVAILABLE_MB} MB needed"
+        )
+    if pressure.load_per_cpu > MAX_LOAD_PER_CPU:
+        reasons.append(f"load {pressure.load_per_cpu:.1f} per CPU")
+    for resource, limit in PSI_LIMITS.items():
+        if pressure.psi.get(resource, 0) > limit:
+            reasons.append(f"{resource} pressure {pressure.psi[resource]:.0f}%")
+    return reasons
+
+
+def is_local(host):
+    return split_host(host)[0] in LOCAL_HOSTS
+
+
+class PressureGuard:
+    """
+    Early-cancel predicate for OllamaClient.generate that also stops a local
+    call when the host runs short of memory while it generates. Pressure is
+    re-read as tokens arrive, at most every `interval` seconds, and on a timer
+    while watch() is active, since no tokens arrive during a long prefill or a
+    stalled stream. reason is set when the guard cancelled the call.
+    """
+
+    def __init__(self, read=read_pressure, stop=None, interval=GUARD_INTERVAL):
+        self.read = read
+        self.stop = stop
+        self.interval = interval
+        self.reason = None
+        self._next = time.monotonic() + interval
+
+    def __call__(self, token):
+        if self.reason is not None:
+            return True
+        if self.stop and self.stop(token):
+            return True
+        now = time.monotonic()
+        if now < self._next:
+            return False
+        self._next = now + self.interval
+        return self.check()
+
+    def check(self):
+        """Read pressure now; return True (and set reason) if the call must stop."""
+        pressure = self.read()
+        if pressure.available_mb < MIN_AVAILABLE_MB:
+            self.reason = f"{pressure.available_mb:.0f} MB available during generation"
+        elif pressure.psi.get("memory", 0) > ABORT_PSI_MEMORY:
+            self.reason = (
+                f"memory pressure {pressure.psi['memory']:.0f}% during generation"
+            )
+        return self.reason is not None
+
+    @contextmanager
+    def watch(self, abort):
+        """
+        Re-read pressure every `interval` seconds while the block runs, and call
+        abort() once if the call must stop, whether or not tokens are arriving.
+        """
+        done = threading.Event()
+
+        def run():
+            while not done.wait(self.interval):
+                if self.reason is not None or self.check():
+                    abort()
+                    return
+
+        threading.Thread(target=run, name="sysfix-guard", daemon=True).start()
+        try:
+            yield self
+        finally:
+            done.set()
+
+
+class InferenceScheduler:
+    """
+    Decides where each model call runs and keeps its cost.
+
+    A call to an Ollama host other than this machine always goes ahead. A
+    local call needs room for the model (its memory is counted only if Ollama
+    has not loaded it yet), a bounded load average and PSI stall times under
+    PSI_LIMITS. Otherwise it is offloaded to the remote endpoint if one is
+    configured, or queued until the pressure clears, for up to queue_timeout
+    seconds, before it is deferred. After a deferral, further calls within
+    queue_timeout are deferred at once instead of queueing again.
+    """
+
+    def __init__(
+        self,
+        host=OLLAMA_HOST,
+        remote=OLLAMA_REMOTE,
+        queue_timeout=INFERENCE_QUEUE_TIMEOUT,
+        poll_interval=POLL_INTERVAL,
+        read=read_pressure,
+    ):
+        self.host = host
+        self.remote = remote
+        self.queue_timeout = queue_timeout
+        self.poll_interval = poll_interval
+        self.read = read
+        self._lock = threading.Lock()
+        self._costs = []
+        self._deferred_at = None
+
+    def _reasons(self, model_loaded):
+        pressure = self.read()
+        reasons = pressure_reasons(pressure, MODEL_MEMORY_MB)
+        if reasons and not pressure_reasons(pressure) and model_loaded():
+            return []
+        return reasons
+
+    def place(self, model_loaded=lambda: False):
+        """
+        Decide where the next model call runs, waiting while it is queued.
+        Args:
+            model_loaded (callable): Returns True if Ollama already holds the
+                model in memory; only called when memory is tight.
+        Returns:
+            Placement
+        """
+        if not is_local(self.host):
+            return Placement("remote", self.host, [], 0.0)
+        loaded = []
+
+        def cached_loaded():
+            if not loaded:
+                loaded.append(bool(model_loaded()))
+            return loaded[0]
+
+        started = time.monotonic()
+        reasons = self._reasons(cached_loaded)
+        if not reasons:
+            return Placement("local", self.host, [], 0.0)
+        if self.remote:
+            return Placement("remote", self.remote, reasons, 0.0)
+        with self._lock:
+            recently_deferred = (
+                self._deferred_at is not None
+                and started - self._deferred_at < self.queue_timeout
+            )
+        deadline = started if recently_deferred else started + self.queue_timeout
+        while time.monotonic() < deadline:
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+            reasons = self._reasons(cached_loaded)
+            if not reasons:
+                return Placement("local", self.host, [], time.monotonic() - started)
+        with self._lock:
+            self._deferred_at = time.monotonic()
+        return Placement("degrade", None, reasons, time.monotonic() - started)
+
+    def record(self, cost):
+        with self._lock:
+            self._costs.append(cost)
+
+    def flush(self, label, path=None):
+        """
+        Append the calls recorded since the last flush to the cost ledger as one run.
+        Returns:
+            dict: The run summary, or None if no model call was made.
+        """
+        with self._lock:
+            costs, self._costs = self._costs, []
+        if not costs:
+            return None
+        summary = summarize(costs)
+        summary.update(ts=time.time(), label=label)
+        append_ledger(summary, path)
+        return summary
+
+
+def summarize(costs):
+    """Totals of a list of InferenceCost records."""
+    where = {}
+    for cost in costs:
+        key = "deferred" if cost.outcome == "deferred" else cost.where
+        where[key] = where.get(key, 0) + 1
+    return {
+        "calls": len(costs),
+        "where": where,
+        "seconds": round(sum(cost.elapsed for cost in costs), 3),
+        "queued": round(sum(cost.waited for cost in costs), 3),
+        "prompt_tokens": sum(cost.prompt_tokens or 0 for cost in costs),
+        "tokens": sum(cost.tokens or 0 for cost in costs),
+        "aborted": sum(cost.outcome == "aborted" for cost in costs),
+    }
+
+
+def format_summary(summary):
+    """
+    e.g. "3 model call(s) (local 2, remote 1): 12.4s, 0.0s queued, 850 tokens
+    generated".
+    """
+    where = ", ".join(
+        f"{key} {count}" for key, count in sorted(summary["where"].items())
+    )
+    line = (
+        f"{summary['calls']} model call(s) ({where}): {summary['seconds']:.1f}s, "
+        f"{summary['queued']:.1f}s queued, {summary['tokens']} tokens generated"
+    )
+    if summary["aborted"]:
+        line += f", {summary['aborted']} cancelled under memory pressure"
+    return line
+
+
+def ledger_path():
+    return os.path.join(cache_dir(), "inference.jsonl")
+
+
+def append_ledger(summary, path=None):
+    """
+    Append a run to the JSON-lines ledger, keeping the last LEDGER_RUNS runs.
+    The ledger is bookkeeping: if it cannot be written, a warning is printed and
+    the advice it accounts for is unaffected.
+    """
+    path = path or ledger_path()
+    try:
+        try:
+            with open(path) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            lines = []
+        lines.append(json.dumps(summary) + "\n")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.writelines(lines[-LEDGER_RUNS:])
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[WARNING] Could not update the inference ledger: {e}")
+
+
+def ledger_stats(path=None):
+    """Totals over the runs in the ledger."""
+    path = path or ledger_path()
+    runs = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    runs.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return {
+        "runs": len(runs),
+        "calls": sum(run["calls"] for run in runs),
+        "seconds": sum(run["seconds"] for run in runs),
+        "tokens": sum(run["tokens"] for run in runs),
+        "path": path,
+    }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide InferenceScheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = InferenceScheduler()
+        return _scheduler
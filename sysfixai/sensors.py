@@ -0,0 +1,282 @@
+"""High-frequency temperature sampling from sysfs, with CPU clock correlation for
+throttling."""
+
+import glob
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+
+SYSFS_ROOT = "/sys"
+PROC_ROOT = "/proc"
+SAMPLE_INTERVAL = 0.02  # seconds between reads (50 Hz)
+THROTTLE_RATIO = 0.7  # clock below this fraction of max while hot and busy: throttling
+THROTTLE_BUSY = 0.5  # CPU busy fraction needed before a low clock means anything
+
+Sensor = namedtuple("Sensor", ["sensor", "label", "path", "critical"])
+SensorStats = namedtuple(
+    "SensorStats",
+    ["sensor", "label", "samples", "p50", "p95", "max", "current", "critical"],
+)
+SensorStats.__doc__ = """Percentiles of one sensor over a sampling window, in °C;
+critical is the sensor's own limit."""
+ClockStats = namedtuple(
+    "ClockStats", ["mhz", "max_mhz", "ratio", "busy", "throttle_events"]
+)
+ClockStats.__doc__ = """Mean CPU clock over the window, CPU busy fraction and new
+thermal throttle events."""
+Window = namedtuple("Window", ["duration", "sensors", "clock"])
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def _read_text(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _millidegrees(path):
+    text = _read_text(path)
+    try:
+        return int(text) / 1000 if text else None
+    except ValueError:
+        return None
+
+
+def discover_sensors(root=SYSFS_ROOT):
+    """
+    List hwmon temperature inputs, or the thermal zones if no hwmon exposes any
+    (the same preference as psutil.sensors_temperatures).
+    """
+    sensors = []
+    for hwmon in sorted(glob.glob(os.path.join(root, "class/hwmon/hwmon*"))):
+        name = _read_text(os.path.join(hwmon, "name")) or os.path.basename(hwmon)
+        for path in sorted(glob.glob(os.path.join(hwmon, "temp*_input"))):
+            prefix = path[: -len("_input")]
+            label = _read_text(prefix + "_label") or os.path.basename(prefix)
+            sensors.append(Sensor(name, label, path, _millidegrees(prefix + "_crit")))
+    if sensors:
+        return sensors
+    for zone in sorted(glob.glob(os.path.join(root, "class/thermal/thermal_zone*"))):
+        name = _read_text(os.path.join(zone, "type")) or os.path.basename(zone)
+        sensors.append(
+            Sensor(name, os.path.basename(zone), os.path.join(zone, "temp"), None)
+        )
+    return sensors
+
+
+class SensorSampler:
+    """
+    Reads temperatures and CPU clocks through file descriptors opened once.
+
+    Each sample is one os.pread per sensor (plus one per CPU clock), so
+    sampling at 50 Hz costs microseconds of CPU per read. Clocks come from
+    cpufreq scaling_cur_freq, or from /proc/cpuinfo "cpu MHz" where cpufreq is
+    missing. thermal_throttle counters are read at the start and end of each
+    window, when the CPU exposes them.
+    """
+
+    def __init__(self, root=SYSFS_ROOT, proc_root=PROC_ROOT):
+        self.root = root
+        self.proc_root = proc_root
+        self.sensors = discover_sensors(root)
+        self._lock = threading.Lock()
+        self._fds = []
+        for sensor in self.sensors:
+            try:
+                self._fds.append(os.open(sensor.path, os.O_RDONLY))
+            except OSError:
+                self._fds.append(None)
+        cpus = sorted(glob.glob(os.path.join(root, "devices/system/cpu/cpu[0-9]*")))
+        self._clock_fds = []
+        max_khz = []
+        for cpu in cpus:
+            try:
+                self._clock_fds.append(
+                    os.open(os.path.join(cpu, "cpufreq/scaling_cur_freq"), os.O_RDONLY)
+                )
+            except OSError:
+                continue
+            khz = _read_text(os.path.join(cpu, "cpufreq/cpuinfo_max_freq"))
+            if khz and khz.isdigit():
+                max_khz.append(int(khz))
+        self.max_mhz = max(max_khz) / 1000 if max_khz else None
+        self._cpuinfo_fd = None
+        if not self._clock_fds:
+            try:
+                self._cpuinfo_fd = os.open(
+                    os.path.join(proc_root, "cpuinfo"), os.O_RDONLY
+                )
+            except OSError:
+                pass
+        self._throttle_paths = [
+            os.path.join(cpu, "thermal_throttle/core_throttle_count")
+            for cpu in cpus
+            if os.path.exists(os.path.join(cpu, "thermal_throttle/core_throttle_count"))
+        ]
+
+    @property
+    def has_throttle_counters(self):
+        return bool(self._throttle_paths)
+
+    def close(self):
+        for fd in self._fds + self._clock_fds + [self._cpuinfo_fd]:
+            if fd is not None:
+                os.close(fd)
+        self._fds, self._clock_fds, self._cpuinfo_fd = [], [], None
+
+    def read_temperatures(self):
+        """
+        Return the current reading of every sensor in °C (None where a read fails).
+        """
+        values = []
+        for fd in self._fds:
+            try:
+                values.append(
+                    int(os.pread(fd, 32, 0)) / 1000 if fd is not None else None
+                )
+            except (OSError, ValueError):
+                values.append(None)
+        return values
+
+    def read_clock_mhz(self):
+        """Return the mean current CPU clock in MHz, or None."""
+        readings = []
+        for fd in self._clock_fds:
+            try:
+                readings.append(int(os.pread(fd, 32, 0)) / 1000)
+            except (OSError, ValueError):
+                pass
+        if self._cpuinfo_fd is not None:
+            try:
+                text = os.pread(self._cpuinfo_fd, 1 << 20, 0).decode(errors="replace")
+            except OSError:
+                text = ""
+            for line in text.splitlines():
+                if line.startswith("cpu MHz"):
+                    try:
+                        readings.append(float(line.split(":", 1)[1]))
+                    except (IndexError, ValueError):
+                        pass
+        return sum(readings) / len(readings) if readings else None
+
+    def _cpu_times(self):
+        fields = (
+            (_read_text(os.path.join(self.proc_root, "stat")) or "")
+            .split("\n", 1)[0]
+            .split()[1:]
+        )
+        values = [int(v) for v in fields if v.isdigit()]
+        if len(values) < 4:
+            return None
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+        return sum(values), idle
+
+    def _throttle_count(self):
+        total = 0
+        for path in self._throttle_paths:
+            text = _read_text(path)
+            total += int(text) if text and text.isdigit() else 0
+        return total
+
+    def sample(self, window=1.0, interval=SAMPLE_INTERVAL):
+        """
+        Sample every sensor and the CPU clock for `window` seconds (once if window
+        is 0).
+        Returns:
+            Window: per-sensor percentiles and clock statistics.
+        """
+        with self._lock:
+            series = [[] for _ in self.sensors]
+            clocks = []
+            times_before = self._cpu_times()
+            throttled_before = self._throttle_count() if self._throttle_paths else None
+            started = time.monotonic()
+            deadline = started + window
+            while True:
+                for values, value in zip(series, self.read_temperatures()):
+                    if value is not None:
+                        values.append(value)
+                mhz = self.read_clock_mhz()
+                if mhz is not None:
+                    clocks.append(mhz)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(interval, remaining))
+            duration = time.monotonic() - started
+            times_after = self._cpu_times()
+            throttle_events = (
+                self._throttle_count() - throttled_before
+                if throttled_before is not None
+                else None
+            )
+        stats = []
+        for sensor, values in zip(self.sensors, series):
+            if not values:
+                continue
+            ordered = sorted(values)
+            stats.append(
+                SensorStats(
+                    sensor.sensor,
+                    sensor.label,
+                    len(values),
+                    percentile(ordered, 50),
+                    percentile(ordered, 95),
+                    ordered[-1],
+                    values[-1],
+                    sensor.critical,
+                )
+            )
+        busy = None
+        if times_before and times_after and times_after[0] > times_before[0]:
+            total = times_after[0] - times_before[0]
+            busy = 1 - (times_after[1] - times_before[1]) / total
+        mhz = sum(clocks) / len(clocks) if clocks else None
+        ratio = mhz / self.max_mhz if mhz and self.max_mhz else None
+        return Window(
+            duration, stats, ClockStats(mhz, self.max_mhz, ratio, busy, throttle_events)
+        )
+
+
+def is_throttling(window, hot):
+    """
+    True if the CPU reported new thermal throttle events, or if it ran well
+    below its maximum clock while busy and a sensor was hot.
+    """
+    clock = window.clock
+    if clock.throttle_events:
+        return True
+    return bool(
+        hot
+        and clock.ratio is not None
+        and clock.ratio < THROTTLE_RATIO
+        and clock.busy is not None
+        and clock.busy >= THROTTLE_BUSY
+    )
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    """
+    Return the process-wide SensorSampler; its descriptors stay open across checks (e.g.
+    in watch mode).
+    """
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = SensorSampler()
+        return _sampler
@@ -0,0 +1,46 @@
+"""Shared defaults. Kept import-free so the CLI can build its options cheaply."""
+
+import os
+
+CHECK_TIMEOUT = 10  # seconds, per check
+AI_PARALLELISM = 4  # concurrent model requests in parallel advice mode
+ADVICE_MODES = ("parallel", "batch", "serial")
+SCAN_TIME_BUDGET = 5.0  # seconds
+SCAN_MAX_DEPTH = 2
+FLEET_CONCURRENCY = 16  # hosts queried at once by `fleet`
+HOST_TIMEOUT = 30  # seconds per host, including connection and diagnostics
+ACTION_PARALLELISM = 4  # fix actions run at once when they do not conflict
+ACTION_TIMEOUT = 60  # seconds, per fix action
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "127.0.0.1:11434")
+# Offload target when this host is under pressure
+OLLAMA_REMOTE = os.environ.get("SYSFIX_OLLAMA_REMOTE")
+INFERENCE_QUEUE_TIMEOUT = 30  # seconds a queued model call waits before degrading
+
+
+def cache_dir():
+    """Return (and create) the sysfix-ai directory under $XDG_CACHE_HOME."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    path = os.path.join(base, "sysfix-ai")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def config_dir():
+    """Return the sysfix-ai directory under $XDG_CONFIG_HOME (not created)."""
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(
+        os.path.expanduser("~"), ".config"
+    )
+    return os.path.join(base, "sysfix-ai")
+
+
+def split_host(host, default_port=11434):
+    """
+    Return (hostname, port) of an Ollama endpoint such as "gpu-box:11434" or
+    "http://[::1]:11434".
+    """
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(host if "://" in host else f"http://{host}")
+    return parts.hostname or "127.0.0.1", parts.port or default_port
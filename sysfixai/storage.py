@@ -0,0 +1,338 @@
+"""Storage subsystem: mount usage, directory size scanning and space reclamation."""
+
+import glob
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+from sysfixai import trace
+from sysfixai.settings import SCAN_MAX_DEPTH, SCAN_TIME_BUDGET
+
+STORAGE_THRESHOLD = 90  # percent of bytes used
+INODE_THRESHOLD = 90  # percent of inodes used
+SCAN_WORKERS = 8
+JOURNAL_VACUUM_DAYS = 2
+
+# Filesystems that are always full by design or do not hold user data.
+IGNORED_FSTYPES = {
+    "squashfs",
+    "iso9660",
+    "udf",
+    "overlay",
+    "tmpfs",
+    "devtmpfs",
+    "ramfs",
+    "nsfs",
+}
+
+MountUsage = namedtuple(
+    "MountUsage",
+    [
+        "mountpoint",
+        "device",
+        "fstype",
+        "total",
+        "used",
+        "free",
+        "percent",
+        "inodes",
+        "inodes_used",
+        "inodes_percent",
+    ],
+)
+DirSize = namedtuple("DirSize", ["path", "size"])
+ScanResult = namedtuple("ScanResult", ["sizes", "complete", "elapsed"])
+ScanResult.__doc__ = """Cumulative on-disk bytes per scanned directory; complete is
+False if a budget ran out."""
+
+
+def real_mounts():
+    """
+    Return psutil partitions for real, writable-data filesystems, one per mount point.
+    """
+    seen = set()
+    mounts = []
+    for part in psutil.disk_partitions(all=False):
+        if part.fstype in IGNORED_FSTYPES or part.mountpoint in seen:
+            continue
+        seen.add(part.mountpoint)
+        mounts.append(part)
+    return mounts
+
+
+def mount_usage(mountpoint, device="", fstype=""):
+    """Return byte and inode usage for a mount point from a single statvfs call."""
+    st = os.statvfs(mountpoint)
+    total = st.f_blocks * st.f_frsize
+    free = st.f_bavail * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    # Match df: percentage of the space available to unprivileged users.
+    usable = used + free
+    percent = used / usable * 100 if usable else 0.0
+    inodes = st.f_files
+    inodes_used = st.f_files - st.f_ffree
+    # Some filesystems (btrfs, vfat) report no inode limit.
+    inodes_percent = inodes_used / inodes * 100 if inodes else 0.0
+    return MountUsage(
+        mountpoint,
+        device,
+        fstype,
+        total,
+        used,
+        free,
+        percent,
+        inodes,
+        inodes_used,
+        inodes_percent,
+    )
+
+
+def all_mount_usage():
+    """
+    Return MountUsage for every real mount; mounts that cannot be read are skipped.
+    """
+    usages = []
+    for part in real_mounts():
+        try:
+            usages.append(mount_usage(part.mountpoint, part.device, part.fstype))
+        except OSError:
+            continue
+    return usages
+
+
+def mount_of(path):
+    """Return the mount point containing path."""
+    path = os.path.realpath(path)
+    while not os.path.ismount(path):
+        path = os.path.dirname(path)
+    return path
+
+
+def _scan_dir(path, device):
+    """
+    Return (bytes of regular files directly in path, subdirectories on the same device).
+    """
+    own = 0
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if st.st_dev == device:
+                        subdirs.append(entry.path)
+                else:
+                    own += st.st_blocks * 512
+    except OSError:
+        pass
+    return own, subdirs
+
+
+def scan_tree(root, max_depth=None, time_budget=SCAN_TIME_BUDGET, workers=SCAN_WORKERS):
+    """
+    Measure on-disk usage below root with parallel os.scandir workers.
+    The scan stays on root's filesystem and never follows symlinks.
+    Args:
+        root (str): Directory to scan.
+        max_depth (int): Do not descend more than this many levels below root
+            (None: no limit).
+        time_budget (float): Stop scheduling work after this many seconds.
+        workers (int): Concurrent scandir workers.
+    Returns:
+        ScanResult: cumulative sizes for every scanned directory (like du).
+    """
+    with trace.span("scan_tree", "storage", root=root):
+        return _scan_tree(root, max_depth, time_budget, workers)
+
+
+def _scan_tree(root, max_depth, time_budget, workers):
+    started = time.monotonic()
+    deadline = started + time_budget
+    root = os.path.abspath(root)
+    try:
+        device = os.lstat(root).st_dev
+    except OSError:
+        return ScanResult({}, False, 0.0)
+    own = {}
+    depths = {}
+    parent = {root: None}
+    complete = True
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def task(path, depth):
+        results.put(
+            (path, depth, (0, []) if stop.is_set() else _scan_dir(path, device))
+        )
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sysfix-scan")
+    try:
+        pool.submit(task, root, 0)
+        outstanding = 1
+        while outstanding:
+            try:
+                path, depth, (size, subdirs) = results.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except queue.Empty:
+                complete = False
+                break
+            outstanding -= 1
+            own[path] = size
+            depths[path] = depth
+            if max_depth is not None and depth >= max_depth:
+                complete = complete and not subdirs
+                continue
+            for sub in subdirs:
+                parent[sub] = path
+                pool.submit(task, sub, depth + 1)
+                outstanding += 1
+    finally:
+        # Queued directories return immediately once stop is set.
+        stop.set()
+        pool.shutdown(wait=False)
+    # Roll sizes up to their ancestors, deepest directories first. Depth is the
+    # scan depth, not the separator count, which is the same for "/" and "/usr".
+    totals = dict(own)
+    for path in sorted(own, key=depths.get, reverse=True):
+        up = parent.get(path)
+        if up is not None and up in totals:
+            totals[up] += totals[path]
+    return ScanResult(totals, complete, time.monotonic() - started)
+
+
+def largest_directories(
+    root,
+    top_n=10,
+    max_depth=SCAN_MAX_DEPTH,
+    time_budget=SCAN_TIME_BUDGET,
+    workers=SCAN_WORKERS,
+):
+    """
+    Return the top_n largest directories up to max_depth levels below root, and
+    whether the scan finished within its time budget.
+    Sizes include everything below each directory that could be scanned in time.
+    """
+    root = os.path.abspath(root)
+    result = scan_tree(root, None, time_budget, workers)
+    base = root.rstrip(os.sep).count(os.sep)
+    candidates = [
+        DirSize(path, size)
+        for path, size in result.sizes.items()
+        if path != root and path.count(os.sep) - base <= max_depth
+    ]
+    candidates.sort(key=lambda d: d.size, reverse=True)
+    return candidates[:top_n], result.complete
+
+
+def tree_size(path, time_budget=SCAN_TIME_BUDGET):
+    """Return the on-disk bytes below path (0 if it does not exist)."""
+    if not os.path.isdir(path):
+        return 0
+    return scan_tree(path, time_budget=time_budget).sizes.get(os.path.abspath(path), 0)
+
+
+def package_cache_size(*roots):
+    """
+    Bytes in the "packages" directories below package manager cache roots:
+    what `dnf clean packages` / `yum clean packages` remove. Repository
+    metadata next to them is kept by those commands and not counted.
+    """
+    total = 0
+    for root in roots:
+        for dirpath, dirnames, _ in os.walk(root):
+            if os.path.basename(dirpath) == "packages":
+                total += tree_size(dirpath)
+                dirnames.clear()
+    return total
+
+
+def journal_reclaimable(days=JOURNAL_VACUUM_DAYS):
+    """
+    Bytes of archived journal files older than days, which journalctl --vacuum-time
+    would remove.
+    """
+    cutoff = time.time() - days * 86400
+    total = 0
+    for pattern in ("/var/log/journal/*/*.journal", "/var/log/journal/*/*.journal~"):
+        for path in glob.glob(pattern):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            # The active journal files (system.journal, user-N.journal) are never
+            # vacuumed.
+            if "@" in os.path.basename(path) and st.st_mtime < cutoff:
+                total += st.st_blocks * 512
+    return total
+
+
+Reclaim = namedtuple("Reclaim", ["name", "command", "estimate"])
+
+
+def reclaim_candidates():
+    """
+    Return the cleanup actions available on this host with their measured
+    reclaimable bytes, largest first. Actions whose tool is missing or that
+    would free nothing are left out.
+    """
+    measurements = []
+    if shutil.which("dnf"):
+        measurements.append(
+            (
+                "dnf package cache",
+                ["dnf", "clean", "packages"],
+                lambda: package_cache_size("/var/cache/dnf", "/var/cache/libdnf5"),
+            )
+        )
+    if shutil.which("yum") and not shutil.which("dnf"):
+        measurements.append(
+            (
+                "yum package cache",
+                ["yum", "clean", "packages"],
+                lambda: package_cache_size("/var/cache/yum"),
+            )
+        )
+    if shutil.which("apt-get"):
+        measurements.append(
+            (
+                "apt package cache",
+                ["apt-get", "clean"],
+                lambda: tree_size("/var/cache/apt/archives"),
+            )
+        )
+    if shutil.which("journalctl"):
+        measurements.append(
+            (
+                "systemd journal",
+                ["journalctl", f"--vacuum-time={JOURNAL_VACUUM_DAYS}d"],
+                journal_reclaimable,
+            )
+        )
+    if not measurements:
+        return []
+    with ThreadPoolExecutor(max_workers=len(measurements)) as pool:
+        estimates = list(pool.map(lambda m: m[2](), measurements))
+    plan = [
+        Reclaim(name, command, estimate)
+        for (name, command, _), estimate in zip(measurements, estimates)
+        if estimate > 0
+    ]
+    plan.sort(key=lambda r: r.estimate, reverse=True)
+    return plan
+
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if size < 1024 or unit == "TiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
@@ -0,0 +1,123 @@
+"""Lightweight span recorder for profiling checks, subprocesses, scans and model
+calls."""
+
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+Span = namedtuple("Span", ["name", "category", "start", "duration", "thread", "args"])
+
+_enabled = False
+_spans = []
+_lock = threading.Lock()
+_origin = time.perf_counter()
+
+
+def enable():
+    """Start recording spans (clearing any recorded earlier)."""
+    global _enabled, _origin
+    with _lock:
+        _spans.clear()
+        _origin = time.perf_counter()
+        _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def spans():
+    """Return a copy of the recorded spans."""
+    with _lock:
+        return list(_spans)
+
+
+@contextmanager
+def span(name, category, **args):
+    """
+    Record the wall time of the enclosed block as a span.
+    Costs a single flag check when profiling is off.
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        record = Span(
+            name, category, start - _origin, end - start, threading.get_ident(), args
+        )
+        with _lock:
+            _spans.append(record)
+
+
+def run(cmd, **kwargs):
+    """subprocess.run wrapped in a "subprocess" span named after the command."""
+    with span(" ".join(cmd[:3]), "subprocess"):
+        return subprocess.run(cmd, **kwargs)
+
+
+def summary(recorded=None):
+    """
+    Aggregate spans by (category, name).
+    Returns:
+        list: (category, name, count, total_seconds, max_seconds), slowest total first.
+    """
+    totals = {}
+    for s in spans() if recorded is None else recorded:
+        key = (s.category, s.name)
+        count, total, longest = totals.get(key, (0, 0.0, 0.0))
+        totals[key] = (count + 1, total + s.duration, max(longest, s.duration))
+    rows = [
+        (category, name, count, total, longest)
+        for (category, name), (count, total, longest) in totals.items()
+    ]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows
+
+
+def format_summary(recorded=None):
+    """Return printable lines for summary()."""
+    lines = []
+    for category, name, count, total, longest in summary(recorded):
+        lines.append(
+            f"{category:<10} {name:<32} {count:>5}x  {total * 1000:9.1f} ms total  "
+            f"{longest * 1000:8.1f} ms max"
+        )
+    return lines
+
+
+def chrome_trace(recorded=None):
+    """Return the spans as a Chrome trace (chrome://tracing, Perfetto) document."""
+    pid = os.getpid()
+    events = []
+    for s in spans() if recorded is None else recorded:
+        events.append(
+            {
+                "name": s.name,
+                "cat": s.category,
+                "ph": "X",
+                "pid": pid,
+                "tid": s.thread,
+                "ts": round(s.start * 1e6, 3),
+                "dur": round(s.duration * 1e6, 3),
+                "args": {k: str(v) for k, v in s.args.items()},
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path, recorded=None):
+    with open(path, "w") as f:
+        json.dump(chrome_trace(recorded), f)
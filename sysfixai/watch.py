@@ -0,0 +1,139 @@
+"""Continuous monitoring: re-sample the dynamic checks and report differences."""
+
+import re
+import time
+from collections import namedtuple
+
+from sysfixai.core import dynamic_checks, static_checks
+from sysfixai.diagnostics import CHECK_TIMEOUT, collect_issues, run_checks
+from sysfixai.issues import Issue
+
+Change = namedtuple("Change", ["kind", "issue", "previous"])
+Change.__doc__ = (
+    """A difference between two samples; kind is "new", "changed" or "cleared"."""
+)
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+CHANGE_FRACTION = 0.05  # value drift, as a fraction of the threshold, that is a change
+
+
+def issue_key(issue):
+    """
+    Identity of an issue across samples: Issue.key for issues with a subject,
+    otherwise the text with all numbers masked.
+    """
+    if isinstance(issue, Issue):
+        if issue.subject is not None:
+            return issue.key
+        return (issue.kind, _NUMBER.sub("#", issue.message))
+    return _NUMBER.sub("#", str(issue))
+
+
+def is_changed(previous, issue):
+    """
+    True if an issue differs meaningfully from the version last reported.
+    Messages carry live readings (RSS to 0.1 MB, temperature percentiles), so
+    structured issues are compared on severity, on which side of the threshold
+    the value is, and on value drift of at least CHANGE_FRACTION of the
+    threshold. Plain strings, and issues with neither subject nor value (such
+    as classified plugin strings), are compared by text.
+    """
+    if not (isinstance(previous, Issue) and isinstance(issue, Issue)):
+        return str(previous) != str(issue)
+    if previous.severity != issue.severity:
+        return True
+    if issue.subject is None and previous.value is None and issue.value is None:
+        return previous.message != issue.message
+    if previous.value is None or issue.value is None or issue.threshold is None:
+        return (previous.value is None) != (issue.value is None)
+    if (previous.value > issue.threshold) != (issue.value > issue.threshold):
+        return True
+    return abs(issue.value - previous.value) >= CHANGE_FRACTION * abs(issue.threshold)
+
+
+def diff_issues(previous, current, key=issue_key):
+    """
+    Compare two {key: issue} maps (see is_changed for what counts as a change).
+    Returns:
+        list: Change records for new, changed and cleared issues.
+    """
+    changes = []
+    for k, issue in current.items():
+        if k not in previous:
+            changes.append(Change("new", issue, None))
+        elif is_changed(previous[k], issue):
+            changes.append(Change("changed", issue, previous[k]))
+    for k, issue in previous.items():
+        if k not in current:
+            changes.append(Change("cleared", issue, None))
+    return changes
+
+
+class Sampler:
+    """
+    Long-lived sampler for watch mode.
+
+    Static facts (system info, motherboard, BIOS warning) are collected once.
+    Each sample() re-runs only the dynamic checks and keeps just the last
+    reported version of each current issue, so memory use stays flat however
+    long it runs.
+    """
+
+    def __init__(self, checks=None, static=None, timeout=CHECK_TIMEOUT, key=issue_key):
+        self.checks = list(checks if checks is not None else dynamic_checks())
+        self.static = list(static if static is not None else static_checks())
+        self.timeout = timeout
+        self.key = key
+        self.facts = None
+        self.previous = {}
+        self.samples = 0
+
+    def static_facts(self):
+        """Return the static check output, collecting it on first use."""
+        if self.facts is None:
+            self.facts = collect_issues(run_checks(self.static, timeout=self.timeout))
+        return self.facts
+
+    def sample(self):
+        """Take one sample and return the changes since the previous one."""
+        issues = collect_issues(run_checks(self.checks, timeout=self.timeout))
+        current = {self.key(issue): issue for issue in issues}
+        changes = diff_issues(self.previous, current, self.key)
+        # Unchanged issues keep the version last reported, so slow drift still adds up
+        # to a change.
+        reported = {
+            self.key(change.issue) for change in changes if change.kind != "cleared"
+        }
+        self.previous = {
+            k: issue if k in reported else self.previous[k]
+            for k, issue in current.items()
+        }
+        self.samples += 1
+        return changes
+
+
+def watch(interval, report, sampler=None, iterations=None, sleep=time.sleep):
+    """
+    Sample every `interval` seconds and pass each non-empty change list to report.
+    Args:
+        interval (float): Seconds between the starts of consecutive samples.
+        report (callable): Called with a list of Change records.
+        sampler (Sampler): Sampler to use; a default one is created if omitted.
+        iterations (int): Stop after this many samples; run forever if None.
+    """
+    sampler = sampler or Sampler()
+    next_run = time.monotonic()
+    while True:
+        changes = sampler.sample()
+        if changes:
+            report(changes)
+        if iterations is not None and sampler.samples >= iterations:
+            break
+        next_run += interval
+        delay = next_run - time.monotonic()
+        if delay > 0:
+            sleep(delay)
+        else:
+            # Sampling overran the interval; skip ahead rather than bunching up.
+            next_run = time.monotonic()
+    return sampler
@@ -0,0 +1,77 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sysfixai import cache, history, hostfacts, scheduler
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep the on-disk caches of every test in its own directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(cache, "_cache", None)
+    monkeypatch.setattr(hostfacts, "_facts", None)
+    monkeypatch.setattr(history, "_store", None)
+    # Model calls in tests must not depend on how loaded the machine running them is.
+    monkeypatch.setattr(
+        scheduler,
+        "_scheduler",
+        scheduler.InferenceScheduler(
+            remote=None, read=lambda: scheduler.Pressure(64 * 1024, 0.0, {})
+        ),
+    )
+    yield
+    if cache._cache is not None:
+        cache._cache.close()
+    if history._store is not None:
+        history._store.close()
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    """Speaks just enough of /api/generate to stand in for Ollama."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append(payload)
+            server.peers.add(self.client_address)
+        reply = server.responder(payload)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        tokens = reply if isinstance(reply, list) else [reply]
+        for token in tokens:
+            self._chunk(json.dumps({"response": token, "done": False}) + "\n")
+        self._chunk(json.dumps({"response": "", "done": True}) + "\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text):
+        data = text.encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+@pytest.fixture
+def ollama_stub():
+    """Run a local stub Ollama server; set .responder to control replies."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OllamaStubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.peers = set()
+    server.responder = lambda payload: ["Recommendation: ", "restart the service."]
+    server.address = f"127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
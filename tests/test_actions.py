@@ -0,0 +1,126 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from sysfixai import core
+from sysfixai.actions import Action, build_plan, execute_plan, format_results
+
+SLEEP = [sys.executable, "-c", "import time; time.sleep(0.3); print('done')"]
+
+
+def test_plan_dedups_and_orders_conflicts():
+    actions = [
+        Action("df", ["df"], reads={"disk"}),
+        Action("kill", ["pkill"], reads={"processes"}, writes={"processes"}),
+        Action("top", ["top"], reads={"processes"}),
+        Action("df", ["df", "-h"], reads={"disk"}),
+        Action("clean", ["clean"], writes={"disk"}, after=("report",)),
+        Action("report", ["report"]),
+    ]
+    ordered, deps = build_plan(actions)
+    assert [a.name for a in ordered] == ["df", "kill", "top", "report", "clean"]
+    assert deps == {
+        "df": set(),
+        "kill": set(),
+        "top": {"kill"},
+        "report": set(),
+        "clean": {"df", "report"},
+    }
+    with pytest.raises(ValueError):
+        build_plan([Action("a", ["a"], after=("b",)), Action("b", ["b"], after=("a",))])
+
+
+def test_independent_read_only_actions_overlap():
+    actions = [Action(f"read {i}", SLEEP, reads={f"r{i}"}) for i in range(4)]
+    started = time.monotonic()
+    results = execute_plan(actions, parallelism=4)
+    wall = time.monotonic() - started
+    assert [r.status for r in results] == ["ok"] * 4
+    assert results[0].output == "done"
+    assert wall < 0.3 * 4 * 0.75
+    assert "4/4 actions succeeded" in format_results(results, wall)[-1]
+
+
+def test_failures_timeouts_and_skips():
+    stuck = threading.Event()
+    actions = [
+        Action("fails", [sys.executable, "-c", "import sys; sys.exit(3)"]),
+        Action("after fails", ["true"], after=("fails",)),
+        Action(
+            "slow", [sys.executable, "-c", "import time; time.sleep(5)"], timeout=0.2
+        ),
+        Action("hangs", func=lambda: stuck.wait(5), timeout=0.2),
+    ]
+    results = {r.name: r for r in execute_plan(actions)}
+    stuck.set()
+    assert (results["fails"].status, results["fails"].returncode) == ("failed", 3)
+    assert results["after fails"].status == "skipped"
+    assert results["slow"].status == "timeout"
+    assert results["hangs"].status == "timeout"
+
+
+def test_timed_out_action_keeps_its_resources_until_it_finishes():
+    finished = {}
+
+    def slow_cleanup():
+        time.sleep(0.4)
+        finished["cleanup"] = time.monotonic()
+
+    actions = [
+        Action("cleanup", func=slow_cleanup, writes={"disk"}, timeout=0.1),
+        Action(
+            "measure",
+            func=lambda: finished.setdefault("measure", time.monotonic()),
+            reads={"disk"},
+        ),
+    ]
+    results = {r.name: r.status for r in execute_plan(actions)}
+    assert results == {"cleanup": "timeout", "measure": "ok"}
+    assert finished["measure"] >= finished["cleanup"]
+
+
+def test_terminal_commands_run_uncaptured_and_hold_other_reports(capfd):
+    reported = []
+    actions = [
+        Action(
+            "update",
+            [sys.executable, "-c", "import time; time.sleep(0.3); print('visible')"],
+            writes={"terminal"},
+        ),
+        Action("quick", ["true"], reads={"disk"}),
+    ]
+    started = time.monotonic()
+    results = execute_plan(
+        actions,
+        on_result=lambda r: reported.append((r.name, time.monotonic() - started)),
+    )
+    assert results[0].output == "" and "visible" in capfd.readouterr().out
+    assert dict(reported)["quick"] >= 0.3
+
+
+def test_response_actions_run_as_one_plan(monkeypatch):
+    ran = []
+    monkeypatch.setattr(
+        core, "execute_plan", lambda actions, **kw: ran.extend(actions) or []
+    )
+    core.apply_fixes_from_ai(
+        "Monitor Processes with top, then Check Disk Space with df -h. Restart Discord."
+    )
+    assert [a.name for a in ran] == [
+        "monitor processes",
+        "check disk space",
+        "restart discord",
+    ]
+    assert core.advice_actions("Free up disk space.") == [core.FREE_SPACE]
+    # In-process steps print directly, so none may share the terminal
+    (terminate,) = core.advice_actions("Terminate chrome to free memory.")
+    for action in (
+        terminate,
+        core.HANDLE_MEMORY_HOGS,
+        core.FREE_SPACE,
+        core.builtin_fix_action("disk full"),
+    ):
+        assert action.func and "terminal" in action.writes
+    assert core.advice_actions("Skip it.") == []
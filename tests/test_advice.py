@@ -0,0 +1,57 @@
+from sysfixai.advice import AdviceStream, parse_advice
+
+
+def feed_all(stream, tokens):
+    for count, token in enumerate(tokens, 1):
+        if stream.feed(token):
+            return count
+    return None
+
+
+def test_recommendation_is_recognised_when_its_line_completes():
+    stream = AdviceStream()
+    tokens = [
+        "Okay, the disk ",
+        "is full.\n",
+        "**Recommendation:** ",
+        "Free up ",
+        "disk space.",
+        "\n",
+        "Because...",
+    ]
+    assert feed_all(stream, tokens) == 6
+    assert stream.advice == "Free up disk space."
+
+
+def test_think_blocks_and_headings():
+    stream = AdviceStream()
+    tokens = [
+        "<think>\nRecommendation: kill everything?\n",
+        "no.</think>\n",
+        "## Recommendation:\n",
+        "\n",
+        "Restart PulseAudio.\n",
+    ]
+    assert feed_all(stream, tokens) == 5
+    assert stream.advice == "Restart PulseAudio."
+
+
+def test_action_tag_completes_mid_line():
+    stream = AdviceStream()
+    assert (
+        feed_all(
+            stream, ["I would ", "<action>terminate ", "chrome</action>", " and then"]
+        )
+        == 3
+    )
+    assert stream.advice == "terminate chrome"
+
+
+def test_fallback_without_markers():
+    response = (
+        "Okay, let me think about it.\n"
+        "Clear the package cache with dnf clean all.\nwait"
+    )
+    assert parse_advice(response) == "Clear the package cache with dnf clean all."
+    assert parse_advice("k") == "k"
+    assert parse_advice("Recommendation: s") == "s"
@@ -0,0 +1,116 @@
+import threading
+import time
+from unittest import mock
+
+from sysfixai import ai
+from sysfixai.ai import OllamaClient
+
+
+def test_client_streams_and_reuses_connection(ollama_stub):
+    client = OllamaClient(host=ollama_stub.address)
+    tokens = []
+    first = client.generate("hello", on_token=tokens.append)
+    second = client.generate("again")
+    client.close()
+    assert first == second == "Recommendation: restart the service."
+    assert tokens == ["Recommendation: ", "restart the service."]
+    assert len(ollama_stub.peers) == 1
+    assert ollama_stub.requests[0]["keep_alive"] == ai.KEEP_ALIVE
+    assert ollama_stub.requests[0]["model"] == ai.MODEL_NAME
+
+
+def test_query_falls_back_to_cli_when_server_is_down():
+    down = OllamaClient(host="127.0.0.1:1")
+    with mock.patch.object(ai, "get_client", return_value=down), mock.patch.object(
+        ai, "query_ollama_cli", return_value="from cli"
+    ) as cli:
+        assert ai.query_lfm25_thinking("prompt") == "from cli"
+    cli.assert_called_once_with("prompt")
+
+
+def test_parse_batch_response_skips_reasoning():
+    response = (
+        "Okay, let me think. Maybe [1, 2] matters.\n"
+        '{"recommendations": [{"id": 2, "recommendation": "Free up disk space."},'
+        ' {"id": 1, "recommendation": "Restart PulseAudio."}]}'
+    )
+    assert ai.parse_batch_response(response, 3) == [
+        "Restart PulseAudio.",
+        "Free up disk space.",
+        None,
+    ]
+    assert ai.parse_batch_response("no json here", 2) == [None, None]
+
+
+def test_batch_mode_uses_one_request(ollama_stub):
+    ollama_stub.responder = lambda payload: (
+        '{"recommendations": [{"id": 1, "recommendation": "a"},'
+        ' {"id": 2, "recommendation": "b"}]}'
+    )
+    with mock.patch.object(ai, "_client", OllamaClient(host=ollama_stub.address)):
+        assert ai.ask_ai_for_fixes(["x", "y"], mode="batch") == ["a", "b"]
+    assert len(ollama_stub.requests) == 1
+    assert ollama_stub.requests[0]["format"] == "json"
+
+
+def test_batch_mode_retries_missing_answers():
+    with mock.patch.object(
+        ai, "ask_ai_for_fix_batch", return_value=["a", None]
+    ), mock.patch.object(ai, "ask_ai_for_fix", return_value="single") as single:
+        assert ai.ask_ai_for_fixes(["x", "y"], mode="batch") == ["a", "single"]
+    single.assert_called_once_with("y")
+
+
+def test_parallel_mode_is_bounded_and_ordered():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_ask(issue):
+        with lock:
+            active.append(issue)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(issue)
+        return issue.upper()
+
+    with mock.patch.object(ai, "ask_ai_for_fix", side_effect=fake_ask):
+        answers = ai.ask_ai_for_fixes(list("abcdefgh"), mode="parallel", parallelism=3)
+    assert answers == list("ABCDEFGH")
+    assert max(peak) == 3
+
+
+def test_parallel_mode_pools_a_connection_per_worker(ollama_stub, monkeypatch):
+    ollama_stub.responder = lambda payload: time.sleep(0.1) or [
+        "Recommendation: ",
+        "reboot.",
+    ]
+    monkeypatch.setattr(ai, "_pool_size", ai.AI_PARALLELISM)
+    monkeypatch.setattr(ai, "_client", OllamaClient(host=ollama_stub.address))
+    parallelism = ai.AI_PARALLELISM + 2
+    for _ in range(2):
+        answers = ai.ask_ai_for_fixes(
+            list("abcdef"), mode="parallel", parallelism=parallelism, use_cache=False
+        )
+        assert answers == ["Recommendation: reboot."] * 6
+    assert len(ollama_stub.peers) <= parallelism
+    assert ai.get_client().pool_size == parallelism
+
+
+def test_generation_is_cancelled_once_advice_is_complete(ollama_stub):
+    ollama_stub.responder = lambda payload: (
+        [
+            "<think>",
+            "Recommendation: maybe?\n",
+            "</think>\n",
+            "Recommendation: restart ",
+            "pulseaudio.\n",
+        ]
+        + ["more reasoning "] * 5000
+    )
+    with mock.patch.object(ai, "_client", OllamaClient(host=ollama_stub.address)):
+        response = ai.ask_ai_for_fix("Audio system check failed.")
+    assert response.endswith("Recommendation: restart pulseaudio.")
+    assert "more reasoning" not in response
+    assert "Recommendation:" in ollama_stub.requests[0]["prompt"]
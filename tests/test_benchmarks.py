@@ -0,0 +1,178 @@
+"""
+Performance regression guards. Budgets are deliberately loose so they only trip
+on order-of-magnitude regressions; run `pytest -m benchmark -s` to see timings.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from unittest import mock
+
+import pytest
+
+from sysfixai import ai, core, procsnap
+from sysfixai.ai import OllamaClient
+from sysfixai.procsnap import ProcessSnapshot
+
+pytestmark = pytest.mark.benchmark
+
+MB = 1024 * 1024
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Top-level entries only: "import time: self | cumulative | name" with no indent.
+IMPORTTIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (?! )")
+FakeMem = namedtuple("FakeMem", ["rss"])
+
+
+class FakeProc:
+    __slots__ = ("info",)
+
+    def __init__(self, pid):
+        self.info = {
+            "pid": pid,
+            "name": f"worker-{pid % 50}",
+            "memory_info": FakeMem((pid % 997) * MB),
+            "cmdline": [f"/usr/bin/worker-{pid % 50}", "--serve"],
+            "create_time": 1000.0 + pid,
+        }
+
+
+def bench(label, fn, repeat=5):
+    """Return the best wall time of fn over repeat runs and print it."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"\n{label}: {best * 1000:.2f} ms")
+    return best
+
+
+@pytest.mark.parametrize("count", [1000, 10000])
+def test_process_scan_and_queries(count):
+    procs = [FakeProc(pid) for pid in range(1, count + 1)]
+    with mock.patch.object(procsnap.psutil, "process_iter", return_value=procs):
+        scan_time = bench(f"scan {count} processes", ProcessSnapshot.scan)
+        snapshot = ProcessSnapshot.scan()
+    query_time = bench(
+        f"queries over {count} processes",
+        lambda: (snapshot.above_rss(500 * MB), snapshot.find_name("worker-7")),
+    )
+    assert len(snapshot) == count
+    assert scan_time < count * 20e-6
+    assert query_time < count * 5e-6
+
+
+def test_diagnose_with_mocked_system():
+    procs = [FakeProc(pid) for pid in range(1, 1001)]
+    pactl = subprocess.CompletedProcess(
+        ["pactl", "info"], 0, stdout="Server Name: stub\n", stderr=""
+    )
+
+    def run_diagnose():
+        procsnap.invalidate()
+        return core.diagnose()
+
+    with mock.patch.object(
+        procsnap.psutil, "process_iter", return_value=procs
+    ), mock.patch.object(core.trace, "run", return_value=pactl), mock.patch.object(
+        core, "SENSOR_WINDOW", 0
+    ), mock.patch.object(
+        core, "dmidecode_path", return_value=None
+    ):
+        elapsed = bench("diagnose() with 1000 mocked processes", run_diagnose)
+        issues = run_diagnose()
+    assert any(issue.kind == "memory" for issue in issues)
+    assert elapsed < 0.5
+
+
+def test_ai_post_processing():
+    reasoning = "\n".join(
+        f"Okay, considering option {i} [{i}] {{maybe}}" for i in range(2000)
+    )
+    response = (
+        reasoning
+        + "\nRecommendation: Free up disk space by cleaning the package cache."
+    )
+    batch = (
+        reasoning
+        + "\n"
+        + json.dumps(
+            {
+                "recommendations": [
+                    {"id": i, "recommendation": f"fix {i}"} for i in range(1, 9)
+                ]
+            }
+        )
+    )
+    extract_time = bench(
+        "extract_final_advice over 2000 lines",
+        lambda: core.extract_final_advice(response),
+    )
+    parse_time = bench(
+        "parse_batch_response over 2000 lines",
+        lambda: ai.parse_batch_response(batch, 8),
+    )
+    assert core.extract_final_advice(response).startswith("Free up disk space")
+    assert ai.parse_batch_response(batch, 8)[7] == "fix 8"
+    assert extract_time < 0.05
+    assert parse_time < 0.5
+
+
+def test_streaming_client_throughput(ollama_stub):
+    ollama_stub.responder = lambda payload: ["token "] * 2000
+    client = OllamaClient(host=ollama_stub.address)
+    elapsed = bench(
+        "stream 2000 tokens from stub Ollama", lambda: client.generate("x"), repeat=3
+    )
+    client.close()
+    assert elapsed < 2.0
+
+
+IMPORT_BUDGET_MS = {"help": 150, "check": 250}
+STARTUP_SCRIPT = """
+import json, sys
+from sysfixai.cli import cli
+cli.main(sys.argv[2:], standalone_mode=False)
+with open(sys.argv[1], "w") as f:
+    json.dump(sorted(sys.modules), f)
+"""
+
+
+def import_profile(tmp_path, *args):
+    """
+    Run the CLI under -X importtime; return (total import ms, loaded module names).
+    """
+    modules_file = tmp_path / "modules.json"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT, str(modules_file)]
+        + list(args),
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        check=True,
+    )
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            total_us += int(match.group(1))
+    return total_us / 1000, set(json.loads(modules_file.read_text()))
+
+
+@pytest.mark.parametrize(
+    "name,args",
+    [("help", ["--help"]), ("check", ["check", "--no-ai", "--format", "json"])],
+)
+def test_cli_startup_import_time(tmp_path, name, args):
+    total_ms, modules = import_profile(tmp_path, *args)
+    print(f"\nimport time for {' '.join(args)}: {total_ms:.1f} ms")
+    assert not {"sysfixai.ai", "http.client", "sysfixai.cache"} & modules
+    if name == "help":
+        assert (
+            not {"psutil", "sysfixai.core", "concurrent.futures", "sqlite3"} & modules
+        )
+    assert total_ms < IMPORT_BUDGET_MS[name]
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from sysfixai import ai
+from sysfixai.cache import AdviceCache, fingerprint, normalize_issue
+
+
+def test_normalize_buckets_volatile_numbers():
+    assert normalize_issue("Storage almost full: 93.4% used.") == normalize_issue(
+        "Storage almost full: 96.1% used."
+    )
+    assert normalize_issue("Storage almost full: 93.4% used.") != normalize_issue(
+        "Storage almost full: 81.0% used."
+    )
+    assert normalize_issue("chrome (PID 4242) using 900.2 MB RAM") == normalize_issue(
+        "chrome (PID 17) using 1010.0 MB RAM"
+    )
+    assert fingerprint("x", "m", 1) != fingerprint("x", "m", 2)
+    assert fingerprint("x", "m", 1) != fingerprint("x", "other", 1)
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    store = AdviceCache(path=str(tmp_path / "a.sqlite3"), max_entries=2)
+    store.put("a", "1")
+    store.put("b", "2")
+    assert store.get("a") == "1"
+    store.put("c", "3")
+    assert store.get("b") is None
+    assert store.get("a") == "1" and store.get("c") == "3"
+    store.ttl = -1
+    assert store.get("a") is None
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 2, 1)
+    store.clear()
+    assert store.stats()["entries"] == 0
+
+
+def test_repeat_sweep_skips_inference():
+    with mock.patch.object(
+        ai, "ask_ai_for_fix", side_effect=lambda issue: f"fix {issue}"
+    ) as ask:
+        first = ai.ask_ai_for_fixes(
+            ["Storage almost full: 93.4% used.", "AI down"], mode="serial"
+        )
+        second = ai.ask_ai_for_fixes(
+            ["Storage almost full: 95.0% used.", "AI down"], mode="serial"
+        )
+        assert ask.call_count == 2
+        assert second[0] == first[0]
+        ai.ask_ai_for_fixes(["AI down"], mode="serial", use_cache=False)
+        assert ask.call_count == 3
+
+
+def test_failed_answers_are_not_cached():
+    with mock.patch.object(
+        ai, "ask_ai_for_fix", return_value="AI query failed: boom"
+    ) as ask:
+        ai.ask_ai_for_fixes(["issue"], mode="serial")
+        ai.ask_ai_for_fixes(["issue"], mode="serial")
+    assert ask.call_count == 2
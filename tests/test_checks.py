@@ -0,0 +1,121 @@
+import json
+from unittest import mock
+
+import pytest
+from click.testing import CliRunner
+
+from sysfixai import checks, core
+from sysfixai.checks import register_check, select_checks
+from sysfixai.cli import cli
+from sysfixai.issues import Issue
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(checks, "_CHECKS", dict(checks._CHECKS))
+    monkeypatch.setattr(checks, "_plugins_loaded", True)
+    return checks._CHECKS
+
+
+def test_selection_is_cheap_first_and_drops_missing_prerequisites(registry):
+    specs, dropped = select_checks(which=lambda binary: None, euid=1000)
+    names = [spec.name for spec in specs]
+    assert names.index("storage") < names.index("memory") < names.index("temperatures")
+    assert ("audio", "pactl not found") in dropped
+    assert ("motherboard", "dmidecode not found") in dropped
+    specs, dropped = select_checks(
+        which=lambda binary: f"/usr/bin/{binary}", euid=0, budget_ms=150
+    )
+    assert [spec.name for spec in specs] == ["system_info", "storage", "bios", "audio"]
+    assert ("memory", "over the 150 ms budget") in dropped
+    specs, _ = select_checks(only=["storage", "memory"], skip=["memory"])
+    assert [spec.name for spec in specs] == ["storage"]
+    with pytest.raises(ValueError):
+        select_checks(skip=["nope"])
+
+
+def test_binaries_are_resolved_once_per_boot(registry):
+    with mock.patch("sysfixai.hostfacts.shutil.which", return_value=None) as which:
+        select_checks(euid=0)
+        select_checks(euid=0)
+    looked_up = [call.args[0] for call in which.call_args_list]
+    assert "dmidecode" in looked_up and len(looked_up) == len(set(looked_up))
+    assert core.dmidecode_path() is None and which.call_count == len(looked_up)
+
+
+def test_root_and_sudo_privileges(registry):
+    register_check(name="rootly", privileges=("root",))(lambda: [])
+    register_check(name="escalates", privileges=("sudo",))(lambda: [])
+    _, dropped = select_checks(
+        only=["rootly", "escalates"], which=lambda binary: None, euid=1000
+    )
+    assert dropped == [("rootly", "needs root"), ("escalates", "needs root or sudo")]
+    specs, _ = select_checks(
+        only=["rootly", "escalates"], which=lambda binary: None, euid=0
+    )
+    assert len(specs) == 2
+
+
+def test_entry_point_plugins(monkeypatch, registry):
+    def check_site_backup():
+        return [Issue("backup", "Last backup is 3 days old.")]
+
+    class EntryPoint:
+        def __init__(self, name, target):
+            self.name, self.target = name, target
+
+        def load(self):
+            if isinstance(self.target, Exception):
+                raise self.target
+            return self.target
+
+    monkeypatch.setattr(checks, "_plugins_loaded", False)
+    monkeypatch.setattr(checks, "_plugin_errors", [])
+    monkeypatch.setattr(
+        checks,
+        "_entry_points",
+        lambda: [
+            EntryPoint("site_backup", check_site_backup),
+            EntryPoint("broken", ImportError("no module x")),
+        ],
+    )
+    specs, _ = select_checks(only=["site_backup"])
+    assert specs[0].func is check_site_backup and specs[0].cost == "cheap"
+    assert checks.plugin_errors() == [("broken", "no module x")]
+    _, dropped = select_checks(only=["broken"])
+    assert dropped == [("broken", "plugin failed to load: no module x")]
+    assert "broken" not in dict(select_checks(skip=["broken"])[1])
+    assert select_checks(only=["site_backup"])[1] == []
+    result = CliRunner().invoke(
+        cli, ["check", "--no-ai", "--only", "site_backup,broken"]
+    )
+    assert "Not run: broken (plugin failed to load: no module x)" in result.output
+
+
+def test_string_returning_plugin_is_classified(registry):
+    register_check(name="legacy")(lambda: ["Legacy plugin says hi"])
+    result = CliRunner().invoke(cli, ["check", "--format", "json", "--only", "legacy"])
+    assert result.exit_code == 0, result.output
+    (issue,) = json.loads(result.output)["issues"]
+    assert (issue["kind"], issue["message"]) == ("other", "Legacy plugin says hi")
+    with mock.patch.object(core, "ai_auto_fix") as sweep:
+        result = CliRunner().invoke(cli, ["check", "--only", "legacy"], input="y\n1\n")
+    assert result.exception is None, result.output
+    assert sweep.call_args.args[0] == []  # the classified string is informational
+
+
+def test_cli_only_and_not_run(registry):
+    register_check(name="needs_tool", binaries=("no-such-binary-xyz",))(lambda: [])
+    result = CliRunner().invoke(
+        cli, ["check", "--format", "json", "--only", "storage,needs_tool"]
+    )
+    assert result.exit_code == 0, result.output
+    report = json.loads(result.output)
+    assert [c["name"] for c in report["checks"]] == ["storage"]
+    assert report["not_run"] == [
+        {"name": "needs_tool", "reason": "no-such-binary-xyz not found"}
+    ]
+    assert (
+        core.check_storage in core.dynamic_checks()
+        and core.check_system_info in core.static_checks()
+    )
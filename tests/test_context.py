@@ -0,0 +1,98 @@
+import subprocess
+from unittest import mock
+
+from sysfixai import context, core
+from sysfixai.context import Section, estimate_tokens, format_usage, render
+from sysfixai.issues import Issue
+
+
+def test_render_keeps_priority_order_within_budget():
+    sections = [
+        Section("Detected issues", ["disk / is 97% full"]),
+        Section(
+            "Top processes", [f"RSS {n:8.1f} MB  worker (PID {n})" for n in range(200)]
+        ),
+        Section("Empty", []),
+        Section("Recent journal errors", ["kernel: oops"]),
+    ]
+    rendered = render(sections, budget=200)
+    assert rendered.tokens <= 200
+    assert rendered.text.startswith("## Detected issues\ndisk / is 97% full")
+    assert "more omitted)" in rendered.text and "Empty" not in rendered.text
+    issues, processes, journal = rendered.usage
+    assert issues.included == issues.total == 1
+    assert 0 < processes.included < processes.total == 200
+    assert journal.tokens == 0 and journal.included == 0
+    assert sum(u.tokens for u in rendered.usage) >= rendered.tokens
+
+
+def test_render_charges_the_omitted_note_to_the_budget():
+    lines = [f"line {n:02d}" for n in range(40)]
+    for budget in range(8, 60):
+        rendered = render([Section("Top processes", lines)], budget=budget)
+        assert rendered.tokens <= budget
+        (usage,) = rendered.usage
+        if usage.included:
+            assert f"({40 - usage.included} more omitted)" in rendered.text
+            assert usage.tokens <= budget
+
+
+def test_render_cuts_long_lines():
+    rendered = render([Section("Recent journal errors", ["x" * 1000])])
+    assert len(rendered.text.splitlines()[1]) == context.LINE_CHARS
+    assert estimate_tokens("abcd") == 1 and estimate_tokens("abcde") == 2
+
+
+def test_journal_lines_collapse_repeats():
+    output = (
+        "usb 1-1: device not accepting address\n"
+        "foo failed\n"
+        "usb 1-1: device not accepting address\n"
+    )
+    result = subprocess.CompletedProcess([], 0, stdout=output, stderr="")
+    with mock.patch(
+        "sysfixai.context.shutil.which", return_value="/usr/bin/journalctl"
+    ), mock.patch("sysfixai.context.trace.run", return_value=result):
+        assert context.journal_lines() == [
+            "foo failed",
+            "usb 1-1: device not accepting address (x2)",
+        ]
+    with mock.patch("sysfixai.context.shutil.which", return_value=None):
+        assert context.journal_lines() == []
+
+
+def test_gather_sections_reports_failing_collectors():
+    with mock.patch(
+        "sysfixai.context.journal_lines", side_effect=OSError("no journal")
+    ), mock.patch(
+        "sysfixai.context.mount_lines", side_effect=KeyError("sda1")
+    ), mock.patch(
+        "sysfixai.context.CPU_INTERVAL", 0
+    ):
+        sections = context.gather_sections(
+            [Issue("storage", "disk full"), Issue("system", "CPU x", "info")]
+        )
+    titles = [section.title for section in sections]
+    assert titles[0] == "Detected issues" and sections[0].lines == ["disk full"]
+    assert dict(sections)["Recent journal errors"] == ["(unavailable: no journal)"]
+    assert dict(sections)["Disk and mounts"] == ["(unavailable: 'sda1')"]
+    assert dict(sections)["Memory and load"]
+    assert "context" in format_usage(render(sections), "prompt")
+
+
+def test_ai_deep_dive_is_one_round_trip_with_snapshot():
+    with mock.patch("sysfixai.core.is_ollama_running", return_value=True), mock.patch(
+        "builtins.input", side_effect=AssertionError("no questions expected")
+    ), mock.patch("sysfixai.core.run_diagnostics", return_value=[]), mock.patch(
+        "sysfixai.context.gather_sections",
+        return_value=[Section("Top processes", ["RSS big"])],
+    ), mock.patch(
+        "sysfixai.ai.ask_ai_deep_dive",
+        return_value="Use top and df -h, then sudo dnf update",
+    ) as ask, mock.patch(
+        "sysfixai.core.run_actions"
+    ) as run:
+        core.ai_deep_dive("laptop is slow")
+    ask.assert_called_once()
+    assert "RSS big" in ask.call_args.kwargs["context"]
+    assert [action.name for action in run.call_args.args[0]] == ["update core packages"]
@@ -1,5 +1,46 @@
-from sysfixai.core import diagnose
+import subprocess
+from unittest import mock
+
+from sysfixai import core
+from sysfixai.core import check_memory, diagnose
+from sysfixai.issues import Issue
+from sysfixai.procsnap import ProcessSnapshot
+
 
 def test_diagnose():
     issues = diagnose()
     assert isinstance(issues, list)
+    assert all(isinstance(issue, Issue) for issue in issues)
+
+
+def test_check_memory_reports_hogs_from_the_snapshot():
+    snapshot = ProcessSnapshot(
+        [
+            (4242, "hog", 900 * 1024 * 1024, ["hog"], 1000.0),
+            (4243, "small", 50 * 1024 * 1024, ["small"], 1000.0),
+        ]
+    )
+    with mock.patch("sysfixai.core.get_snapshot", return_value=snapshot):
+        messages = [str(issue) for issue in check_memory()]
+    assert len(messages) == 1
+    assert "hog (PID 4242) using 900.0 MB RAM" in messages[0]
+    assert "small" not in messages[0]
+
+
+def test_failed_dmidecode_is_not_cached():
+    denied = subprocess.CompletedProcess(
+        [], 1, stdout="", stderr="sudo: a password is required\n"
+    )
+    ok = subprocess.CompletedProcess(
+        [], 0, stdout="Manufacturer: ACME\nSerial Number: 1234\n", stderr=""
+    )
+    with mock.patch.object(
+        core, "dmidecode_path", return_value="/usr/sbin/dmidecode"
+    ), mock.patch.object(core.os, "geteuid", return_value=1000), mock.patch.object(
+        core.trace, "run", side_effect=[denied, ok]
+    ) as run:
+        assert [str(i) for i in core.check_motherboard()] == [
+            "Failed to retrieve motherboard info (needs root or passwordless sudo)."
+        ]
+        assert run.call_args.args[0][:2] == ["sudo", "-n"]
+        assert "ACME" in str(core.check_motherboard()[0])
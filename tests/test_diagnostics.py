@@ -0,0 +1,74 @@
+import subprocess
+import sys
+import threading
+import time
+
+from sysfixai.checks import CheckSpec
+from sysfixai.diagnostics import collect_issues, format_timings, run_checks
+
+
+def check_fast():
+    return ["fast issue"]
+
+
+def check_slow():
+    time.sleep(0.3)
+    return ["slow issue"]
+
+
+def check_hung():
+    time.sleep(2)
+    return ["never reported"]
+
+
+def check_broken():
+    raise RuntimeError("boom")
+
+
+def test_run_checks_is_concurrent():
+    started = time.monotonic()
+    results = run_checks([check_slow, check_slow, check_slow, check_fast], timeout=5)
+    assert time.monotonic() - started < 0.8
+    messages = [issue.message for issue in collect_issues(results)]
+    assert messages == ["slow issue"] * 3 + ["fast issue"]
+    assert all(result.status == "ok" for result in results)
+
+
+def test_run_checks_timeout_and_error():
+    results = run_checks([check_fast, check_hung, check_broken], timeout=0.2)
+    statuses = {result.name: result.status for result in results}
+    assert statuses == {"fast": "ok", "hung": "timeout", "broken": "error"}
+    assert results[1].issues[0].kind == "check_timeout"
+    assert "timed out" in str(results[1].issues[0])
+    assert "boom" in str(results[2].issues[0])
+    assert len(format_timings(results)) == 3
+
+
+def test_hung_check_does_not_hold_up_exit():
+    code = (
+        "import time\n"
+        "from sysfixai.diagnostics import run_checks\n"
+        "def check_stuck():\n"
+        "    time.sleep(8)\n"
+        "print(run_checks([check_stuck], timeout=0.2)[0].status)\n"
+    )
+    started = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, timeout=30
+    )
+    assert result.stdout.strip() == "timeout"
+    assert time.monotonic() - started < 4
+
+
+def test_one_function_under_two_names_keeps_both_timings():
+    def check_shared():
+        time.sleep(0.05 if threading.current_thread().name.endswith("quick") else 0.3)
+        return []
+
+    specs = [
+        CheckSpec("slow", check_shared, "cheap", (), (), False),
+        CheckSpec("quick", check_shared, "cheap", (), (), False),
+    ]
+    slow, quick = run_checks(specs, timeout=5)
+    assert (slow.name, quick.name) == ("slow", "quick")
+    assert slow.elapsed >= 0.25 and quick.elapsed < 0.2
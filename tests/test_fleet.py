@@ -0,0 +1,103 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from sysfixai.fleet import HostResult, aggregate, format_finding, sweep
+from sysfixai.issues import Issue
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def agents(tmp_path):
+    """Start three local agent processes standing in for remote hosts."""
+    procs = []
+    targets = []
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    for idx in range(3):
+        sock = tmp_path / f"agent{idx}.sock"
+        procs.append(
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "sysfixai.cli",
+                    "agent",
+                    "--listen",
+                    f"unix:{sock}",
+                    "--name",
+                    f"node{idx}",
+                ],
+                cwd=ROOT,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        )
+        targets.append(f"unix:{sock}")
+    deadline = time.monotonic() + 15
+    while not all(os.path.exists(t[len("unix:") :]) for t in targets):
+        assert time.monotonic() < deadline, "agents did not start"
+        time.sleep(0.05)
+    yield targets
+    for proc in procs:
+        proc.terminate()
+        proc.wait(timeout=5)
+
+
+def test_sweep_local_agents(agents, tmp_path):
+    missing = f"unix:{tmp_path / 'missing.sock'}"
+    results = sweep(agents + [missing], concurrency=2, timeout=20)
+    assert [r.host for r in results[:3]] == ["node0", "node1", "node2"]
+    assert all(r.error is None and r.issues for r in results[:3])
+    assert results[3].error
+    findings = aggregate(results, include_info=True)
+    # Every agent runs on this machine, so every shared fact is seen on all three hosts.
+    assert any(len(f.hosts) == 3 and f.kind == "system_info" for f in findings)
+
+
+def test_command_transport_and_timeout():
+    command = f"cmd:{sys.executable} -m sysfixai.cli check --format json"
+    slow = f"cmd:{sys.executable} -c 'import time; time.sleep(5)'"
+    results = sweep([command, slow], timeout=2)
+    assert results[0].error is None and results[0].issues
+    assert "timed out" in results[1].error
+
+
+def test_aggregate_deduplicates_across_hosts():
+    def temp(host, value):
+        issue = Issue(
+            "temperature",
+            f"High temperature alert: coretemp sensor 'Package id 0' at {value:.1f}°C.",
+            severity="critical",
+            value=value,
+            unit="°C",
+        )
+        return HostResult(
+            host,
+            host,
+            [issue, Issue("system_info", f"Node: {host}", severity="info")],
+            0.1,
+            None,
+        )
+
+    results = [temp(f"h{i}", 86.0 + i) for i in range(14)]
+    results.append(
+        HostResult(
+            "h99", "h99", [Issue("audio", "Audio system check failed.")], 0.1, None
+        )
+    )
+    findings = aggregate(results)
+    assert [(f.kind, len(f.hosts)) for f in findings] == [
+        ("temperature", 14),
+        ("audio", 1),
+    ]
+    line = format_finding(findings[0])
+    assert (
+        "temperature on 14 hosts" in line
+        and "range 86-99°C" in line
+        and "+9 more" in line
+    )
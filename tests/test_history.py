@@ -0,0 +1,86 @@
+import time
+from unittest import mock
+
+from sysfixai import core
+from sysfixai.history import HistoryStore
+from sysfixai.procsnap import ProcessSnapshot
+
+MB = 1024 * 1024
+
+
+def test_trends_fit_slope_and_quality(tmp_path):
+    store = HistoryStore(path=str(tmp_path / "h.sqlite3"))
+    for minute in range(10):
+        ts = 1000 + minute * 60
+        store.record(
+            "rss",
+            [("1:5.00", "leaky", 100 + 40 * minute), ("2:5.00", "jvm", 2000)],
+            ts=ts,
+        )
+    trends = {t.key: t for t in store.trends("rss", window=3600, now=1000 + 9 * 60)}
+    assert abs(trends["1:5.00"].slope - 40) < 1e-6
+    assert trends["1:5.00"].r2 > 0.99
+    assert (trends["1:5.00"].first, trends["1:5.00"].last) == (100, 460)
+    assert abs(trends["2:5.00"].slope) < 1e-9
+    assert trends["1:5.00"].span == 9 * 60
+
+
+def test_min_interval_and_retention(tmp_path):
+    store = HistoryStore(path=str(tmp_path / "h.sqlite3"), retention=300, max_samples=6)
+    assert store.record("rss", [("a", "a", 1)], ts=100)
+    assert not store.record("rss", [("a", "a", 2)], ts=105)
+    for i in range(1, 10):
+        store.record("rss", [("a", "a", i), ("b", "b", i)], ts=100 + i * 20)
+    store.prune(now=400)
+    assert store.stats()["samples"] <= 6
+    store.prune(now=10000)
+    assert store.stats() == {"samples": 0, "series": 0, "path": store.path}
+
+
+def test_trend_query_stays_fast(tmp_path):
+    store = HistoryStore(path=str(tmp_path / "h.sqlite3"), min_interval=0)
+    # three days of one-minute samples for 50 processes
+    for minute in range(3 * 24 * 60):
+        store.record(
+            "rss",
+            [(str(pid), "p", pid + minute) for pid in range(50)],
+            ts=minute * 60.0,
+        )
+    started = time.perf_counter()
+    trends = store.trends("rss", window=1800, now=3 * 24 * 3600.0)
+    assert len(trends) == 50
+    assert time.perf_counter() - started < 0.5
+
+
+def test_check_memory_separates_leaks_from_stable_hogs(tmp_path):
+    store = HistoryStore(path=str(tmp_path / "h.sqlite3"), min_interval=0)
+    rows = [
+        (10, "leaky", 0, (), 5.0),
+        (20, "jvm", 2000 * MB, (), 6.0),
+        (30, "cache", 645 * MB, (), 7.0),
+    ]
+    now = time.time()
+    for minute in range(10):
+        ts = now - (9 - minute) * 60
+        store.record(
+            "rss",
+            [
+                ("10:5.00", "leaky", 100 + 40 * minute),
+                ("20:6.00", "jvm", 2000),
+                ("30:7.00", "cache", 600 + 5 * minute),
+            ],
+            ts=ts,
+        )
+    rows[0] = (10, "leaky", 460 * MB, (), 5.0)
+    snapshot = ProcessSnapshot(rows)
+    with mock.patch(
+        "sysfixai.history.get_history", return_value=store
+    ), mock.patch.object(core, "get_snapshot", return_value=snapshot):
+        issues = core.check_memory()
+    by_kind = {issue.kind: issue for issue in issues}
+    assert by_kind["memory_leak"].subject == 10
+    assert "growing 40.0 MB/min" in by_kind["memory_leak"].message
+    hogs = {issue.subject: issue for issue in issues if issue.kind == "memory"}
+    assert hogs[20].severity == "info" and "stable" in hogs[20].message
+    # Growing 5 MB/min is below the leak rate but is not stable either
+    assert hogs[30].severity == "warning" and "stable" not in hogs[30].message
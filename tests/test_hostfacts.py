@@ -0,0 +1,41 @@
+import os
+from unittest import mock
+
+import pytest
+
+from sysfixai import hostfacts
+from sysfixai.hostfacts import host_fact
+
+
+def test_fact_computed_once_per_boot(tmp_path, monkeypatch):
+    boot = tmp_path / "boot_id"
+    boot.write_text("boot-1\n")
+    monkeypatch.setattr(hostfacts, "BOOT_ID_PATH", str(boot))
+    compute = mock.Mock(return_value={"status": "ok", "info": ["Manufacturer: ACME"]})
+    assert host_fact("baseboard", compute) == host_fact("baseboard", compute)
+    # A new process on the same boot reads the persisted value.
+    monkeypatch.setattr(hostfacts, "_facts", None)
+    assert host_fact("baseboard", compute)["info"] == ["Manufacturer: ACME"]
+    assert compute.call_count == 1
+    # After a reboot the fact is recomputed.
+    boot.write_text("boot-2\n")
+    monkeypatch.setattr(hostfacts, "_facts", None)
+    host_fact("baseboard", compute)
+    assert compute.call_count == 2
+
+
+def test_transient_failures_are_not_cached():
+    with pytest.raises(TimeoutError):
+        host_fact("slow", mock.Mock(side_effect=TimeoutError))
+    assert host_fact("slow", lambda: "ok") == "ok"
+
+
+def test_clear_forgets_facts():
+    host_fact("x", lambda: 1)
+    hostfacts.clear()
+    assert host_fact("x", lambda: 2) == 2
+
+
+def test_facts_file_is_private():
+    host_fact("baseboard", lambda: {"status": "ok", "info": ["Serial Number: 1234"]})
+    assert os.stat(hostfacts.facts_path()).st_mode & 0o777 == 0o600
@@ -0,0 +1,58 @@
+from unittest import mock
+
+from sysfixai import core
+from sysfixai.fixes import fix_for, register_fix
+from sysfixai.issues import Issue, as_issue
+from sysfixai.procsnap import ProcessSnapshot
+
+MB = 1024 * 1024
+
+
+def test_issue_record():
+    issue = Issue(
+        "storage",
+        "Storage almost full: 93.0% used.",
+        subject="/",
+        value=93.0,
+        threshold=90,
+        unit="%",
+    )
+    assert str(issue) == "Storage almost full: 93.0% used."
+    assert issue.key == ("storage", "/")
+    assert issue.to_dict()["threshold"] == 90
+    assert not hasattr(issue, "__dict__")
+
+
+def test_as_issue_classifies_legacy_strings():
+    assert as_issue("Storage almost full: 99.0% used.").kind == "storage"
+    assert as_issue("High temperature alert: x").severity == "critical"
+    assert as_issue("something else").kind == "other"
+
+
+def test_check_memory_reports_one_issue_per_process():
+    snapshot = ProcessSnapshot(
+        [(10, "java", 800 * MB, (), 1.0), (11, "bash", 5 * MB, (), 1.0)]
+    )
+    with mock.patch.object(core, "get_snapshot", return_value=snapshot):
+        issues = core.check_memory()
+    assert [(i.kind, i.subject, i.value, i.threshold) for i in issues] == [
+        ("memory", 10, 800.0, 500)
+    ]
+
+
+def test_apply_fix_dispatches_by_kind(capsys):
+    seen = []
+    previous = fix_for("memory")
+    register_fix("memory")(seen.append)
+    try:
+        issue = Issue(
+            "memory",
+            "High memory usage by process: java (PID 10) using 800.0 MB RAM.",
+            subject=10,
+        )
+        core.apply_fix(issue)
+        core.apply_fix("No issues detected.")
+    finally:
+        register_fix("memory")(previous)
+    assert seen == [issue]
+    assert "No automatic fix available." in capsys.readouterr().out
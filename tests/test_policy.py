@@ -0,0 +1,199 @@
+import json
+import subprocess
+import sys
+import time
+from unittest import mock
+
+import psutil
+import pytest
+
+from sysfixai import core
+from sysfixai.issues import Issue
+from sysfixai.policy import (
+    Decision,
+    Outcome,
+    Policy,
+    action_from_advice,
+    apply_decisions,
+    load_policy,
+)
+from sysfixai.procsnap import ProcessEntry, ProcessSnapshot
+
+MB = 1024 * 1024
+
+
+def entry(pid, name, mb, cmdline=()):
+    return ProcessEntry(pid, name, mb * MB, cmdline, 0.0)
+
+
+def test_load_policy_and_match(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text(
+        json.dumps(
+            {
+                "allowed_actions": ["terminate", "oom_score_adj"],
+                "protected": ["postgres*"],
+                "rules": [
+                    {
+                        "name": "chrome*",
+                        "cmdline": "*--type=renderer*",
+                        "min_rss_mb": 800,
+                        "action": "terminate",
+                    },
+                    {
+                        "name": "*",
+                        "min_rss_mb": 2000,
+                        "action": "oom_score_adj",
+                        "value": 800,
+                    },
+                ],
+            }
+        )
+    )
+    policy = load_policy(str(path))
+    renderer = entry(10, "chrome", 900, ("chrome", "--type=renderer"))
+    decisions, uncovered = policy.decide(
+        [
+            renderer,
+            entry(11, "chrome", 900),
+            entry(12, "postgres", 3000),
+            entry(13, "java", 2500),
+        ]
+    )
+    assert [(d.entry.pid, d.action) for d in decisions] == [
+        (10, "terminate"),
+        (12, "protect"),
+        (13, "oom_score_adj"),
+    ]
+    assert [e.pid for e in uncovered] == [11]
+    session = [entry(14, "systemd-journald", 2500), entry(15, "Xorg", 2500)]
+    assert [d.action for d in policy.decide(session)[0]] == ["protect", "protect"]
+    path.write_text(
+        json.dumps(
+            {
+                "allowed_actions": ["oom_score_adj"],
+                "protected": ["sshd"],
+                "replace_default_protected": True,
+                "rules": [{"name": "*", "action": "oom_score_adj"}],
+            }
+        )
+    )
+    replaced = load_policy(str(path))
+    assert [
+        d.action for d in replaced.decide(session + [entry(16, "sshd", 10)])[0]
+    ] == ["oom_score_adj", "oom_score_adj", "protect"]
+    assert load_policy(str(tmp_path / "missing.json")).allowed_actions == (
+        "memory_high",
+        "oom_score_adj",
+    )
+    path.write_text(json.dumps({"rules": [{"name": "x", "action": "terminate"}]}))
+    with pytest.raises(ValueError):
+        load_policy(str(path))
+
+
+def test_batch_terminate_waits_concurrently():
+    children = [
+        subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        for _ in range(6)
+    ]
+    try:
+        entries = [
+            ProcessEntry(c.pid, "python", 0, (), psutil.Process(c.pid).create_time())
+            for c in children
+        ]
+        started = time.monotonic()
+        outcomes = apply_decisions(
+            [Decision(e, "terminate", None, "test") for e in entries], grace=3
+        )
+        assert time.monotonic() - started < 3
+        assert all(o.ok and o.detail == "terminated" for o in outcomes)
+    finally:
+        for child in children:
+            child.kill()
+            child.wait()
+
+
+def test_oom_score_adj_and_stop_on_a_child():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        target = ProcessEntry(
+            child.pid, "python", 0, (), psutil.Process(child.pid).create_time()
+        )
+        outcomes = apply_decisions(
+            [
+                Decision(target, "oom_score_adj", 700, "test"),
+                Decision(target, "stop", None, "t"),
+            ]
+        )
+        assert all(o.ok for o in outcomes)
+        with open(f"/proc/{child.pid}/oom_score_adj") as f:
+            assert f.read().strip() == "700"
+        deadline = time.monotonic() + 2
+        while (
+            psutil.Process(child.pid).status() != psutil.STATUS_STOPPED
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.01)
+        assert psutil.Process(child.pid).status() == psutil.STATUS_STOPPED
+        dry = apply_decisions(
+            [Decision(target, "terminate", None, "rule x")], dry_run=True
+        )
+        assert dry[0].detail == "dry run (rule x)" and child.poll() is None
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_model_is_asked_only_about_uncovered_processes():
+    snapshot = ProcessSnapshot(
+        [
+            (10, "chrome", 900 * MB, (), 0.0),
+            (11, "mystery", 700 * MB, (), 0.0),
+            (12, "tiny", 10 * MB, (), 0.0),
+        ]
+    )
+    policy = Policy(
+        [
+            Policy.from_dict(
+                {"rules": [{"name": "chrome", "action": "oom_score_adj"}]}
+            ).rules[0]
+        ]
+    )
+    with mock.patch.object(core, "is_ollama_running", return_value=True), mock.patch(
+        "sysfixai.ai.ask_ai_for_fixes", return_value=["Recommendation: kill it"]
+    ) as ask, mock.patch.object(
+        core,
+        "apply_decisions",
+        side_effect=lambda d, dry_run: [
+            Outcome(x.entry, x.action, True, "") for x in d
+        ],
+    ) as apply:
+        core.handle_memory_hogs(snapshot=snapshot, policy=policy)
+    assert len(ask.call_args.args[0]) == 1 and "mystery" in ask.call_args.args[0][0]
+    # terminate is not in the default allowed actions, so the model's "kill" is not
+    # acted on
+    assert [(d.entry.pid, d.action) for d in apply.call_args.args[0]] == [
+        (10, "oom_score_adj")
+    ]
+    assert (
+        action_from_advice("Use a cgroup memory limit", ("memory_high",))
+        == "memory_high"
+    )
+    assert action_from_advice("Skip it", ("terminate",)) is None
+
+
+def test_builtin_memory_fix_never_asks_the_model():
+    snapshot = ProcessSnapshot([(11, "mystery", 700 * MB, (), 0.0)])
+    issue = Issue("memory", "High memory usage", subject=11)
+    with mock.patch.object(
+        core, "get_snapshot", return_value=snapshot
+    ), mock.patch.object(core, "load_policy", return_value=Policy()), mock.patch.object(
+        core, "is_ollama_running", return_value=True
+    ), mock.patch(
+        "sysfixai.ai.ask_ai_for_fixes"
+    ) as ask, mock.patch.object(
+        core, "apply_decisions", return_value=[]
+    ) as apply:
+        core.apply_fix(issue)
+    ask.assert_not_called()
+    assert apply.call_args.args[0] == []
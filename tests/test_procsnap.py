@@ -0,0 +1,55 @@
+from unittest import mock
+
+import psutil
+import pytest
+
+from sysfixai import procsnap
+from sysfixai.procsnap import ProcessSnapshot, get_snapshot, open_process
+
+MB = 1024 * 1024
+
+
+def make_snapshot():
+    return ProcessSnapshot(
+        [
+            (1, "systemd", 12 * MB, ["/sbin/init"], 100.0),
+            (200, "chrome", 900 * MB, ["chrome", "--type=renderer"], 200.0),
+            (201, "chrome", 300 * MB, ["chrome"], 201.0),
+            (300, "plasmashell", 700 * MB, ["plasmashell"], 300.0),
+            (400, "Chromium", 50 * MB, None, 400.0),
+        ]
+    )
+
+
+def test_indexes():
+    snap = make_snapshot()
+    assert len(snap) == 5
+    assert [e.pid for e in snap.find_name("chrom")] == [200, 201, 400]
+    assert [e.pid for e in snap.above_rss(500 * MB)] == [200, 300]
+    assert [e.pid for e in snap.top_rss(2)] == [200, 300]
+    assert snap.find_name("plasma")[0].cmdline == ("plasmashell",)
+
+
+def test_get_snapshot_ttl():
+    procsnap.invalidate()
+    with mock.patch.object(ProcessSnapshot, "scan", side_effect=make_snapshot) as scan:
+        first = get_snapshot()
+        assert get_snapshot() is first
+        assert get_snapshot(refresh=True) is not first
+        assert get_snapshot(max_age=-1) is not first
+        assert scan.call_count == 3
+    procsnap.invalidate()
+
+
+def test_open_process_detects_pid_reuse():
+    me = psutil.Process()
+    entry = procsnap.ProcessEntry(me.pid, me.name(), 0, (), me.create_time())
+    assert open_process(entry).pid == me.pid
+    with pytest.raises(psutil.NoSuchProcess):
+        open_process(entry._replace(create_time=entry.create_time - 60))
+
+
+def test_scan_live_table():
+    snap = ProcessSnapshot.scan()
+    assert len(snap) > 0
+    assert snap.top_rss(1)[0].rss >= snap.top_rss(len(snap))[-1].rss
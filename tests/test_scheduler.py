@@ -0,0 +1,176 @@
+import threading
+import time
+from unittest import mock
+
+from sysfixai import ai, core, scheduler
+from sysfixai.ai import OllamaClient
+from sysfixai.issues import Issue
+from sysfixai.scheduler import (
+    InferenceScheduler,
+    Pressure,
+    PressureGuard,
+    ledger_stats,
+    pressure_reasons,
+    read_psi,
+)
+
+CALM = Pressure(8000, 0.2, {"memory": 0.0, "cpu": 5.0, "io": 0.0})
+SWAPPING = Pressure(300, 3.5, {"memory": 40.0, "cpu": 5.0, "io": 0.0})
+
+
+def readings(*values):
+    values = list(values)
+    return lambda: values.pop(0) if len(values) > 1 else values[0]
+
+
+def test_read_psi_parses_some_avg10(tmp_path):
+    (tmp_path / "memory").write_text(
+        "some avg10=12.50 avg60=3.00 avg300=1.00 total=100\n"
+        "full avg10=2.00 avg60=1.00 avg300=0.50 total=50\n"
+    )
+    (tmp_path / "cpu").write_text("some avg10=0.75 avg60=0.50 avg300=0.25 total=10\n")
+    assert read_psi(str(tmp_path)) == {"memory": 12.5, "cpu": 0.75}
+    assert read_psi(str(tmp_path / "missing")) == {}
+
+
+def test_pressure_reasons():
+    assert pressure_reasons(CALM, scheduler.MODEL_MEMORY_MB) == []
+    reasons = pressure_reasons(SWAPPING, scheduler.MODEL_MEMORY_MB)
+    assert reasons == [
+        "300 MB available, 2012 MB needed",
+        "load 3.5 per CPU",
+        "memory pressure 40%",
+    ]
+    assert pressure_reasons(Pressure(1000, 0.1, {})) == []
+    assert pressure_reasons(Pressure(1000, 0.1, {}), scheduler.MODEL_MEMORY_MB)
+
+
+def test_place_runs_locally_offloads_or_waits():
+    assert InferenceScheduler(read=lambda: CALM).place().where == "local"
+    offload = InferenceScheduler(remote="gpu-box:11434", read=lambda: SWAPPING).place()
+    assert (offload.where, offload.host) == (
+        "remote",
+        "gpu-box:11434",
+    ) and offload.reasons
+    remote_only = InferenceScheduler(
+        host="gpu-box:11434", read=mock.Mock(side_effect=AssertionError)
+    )
+    assert remote_only.place().where == "remote"
+    queued = InferenceScheduler(
+        read=readings(SWAPPING, SWAPPING, CALM), poll_interval=0.01
+    ).place()
+    assert queued.where == "local" and queued.waited > 0
+
+
+def test_place_counts_model_memory_only_when_not_loaded():
+    tight = Pressure(1000, 0.1, {})
+    sched = InferenceScheduler(read=lambda: tight, queue_timeout=0)
+    loaded = mock.Mock(return_value=True)
+    assert sched.place(model_loaded=loaded).where == "local"
+    assert sched.place(model_loaded=lambda: False).where == "degrade"
+    assert InferenceScheduler(read=lambda: CALM).place(
+        model_loaded=mock.Mock(side_effect=AssertionError)
+    )
+
+
+def test_place_degrades_after_queue_timeout_and_then_immediately():
+    read = mock.Mock(return_value=SWAPPING)
+    sched = InferenceScheduler(read=read, queue_timeout=0.05, poll_interval=0.01)
+    first = sched.place()
+    assert first.where == "degrade" and first.waited >= 0.05 and first.host is None
+    calls = read.call_count
+    second = sched.place()
+    assert second.where == "degrade" and second.waited < 0.05
+    assert read.call_count == calls + 1
+
+
+def test_guard_cancels_generation_under_memory_pressure():
+    guard = PressureGuard(
+        read=readings(CALM, SWAPPING), stop=lambda token: False, interval=0
+    )
+    assert guard("a") is False and guard.reason is None
+    assert guard("b") is True and "300 MB" in guard.reason
+    stopping = PressureGuard(
+        read=mock.Mock(side_effect=AssertionError), stop=lambda token: True
+    )
+    assert stopping("c") is True and stopping.reason is None
+
+
+def test_guard_cancels_a_long_prefill_without_waiting_for_tokens(ollama_stub):
+    release = threading.Event()
+    ollama_stub.responder = lambda payload: release.wait(10) and ["late"]
+    # The stub answers into the socket the cancelled client has already dropped.
+    ollama_stub.handle_error = lambda request, address: None
+    guard = PressureGuard(read=readings(CALM, SWAPPING), interval=0.05)
+    stats = {}
+    started = time.monotonic()
+    try:
+        response = OllamaClient(host=ollama_stub.address).generate(
+            "prompt", stop=guard, stats=stats
+        )
+    finally:
+        release.set()
+    assert time.monotonic() - started < 5
+    assert response == "" and stats["cancelled"] and "300 MB" in guard.reason
+
+
+def test_unwritable_ledger_only_warns(tmp_path, capsys):
+    sched = InferenceScheduler(read=lambda: CALM)
+    sched.record(scheduler.InferenceCost("local", None, 0.1, 0.0, 6, 2, 3, "ok"))
+    summary = sched.flush("test", path=str(tmp_path / "missing" / "ledger.jsonl"))
+    assert summary["calls"] == 1
+    assert "[WARNING] Could not update the inference ledger" in capsys.readouterr().out
+
+
+def test_query_offloads_to_remote_endpoint_and_records_cost(ollama_stub):
+    sched = InferenceScheduler(remote=ollama_stub.address, read=lambda: SWAPPING)
+    local = mock.Mock(spec=OllamaClient)
+    local.loaded_models.return_value = set()
+    with mock.patch.object(scheduler, "_scheduler", sched), mock.patch.object(
+        ai, "_client", local
+    ):
+        assert (
+            ai.query_lfm25_thinking("prompt") == "Recommendation: restart the service."
+        )
+    local.generate.assert_not_called()
+    assert len(ollama_stub.requests) == 1
+    summary = sched.flush("test")
+    assert (
+        summary["where"] == {"remote": 1}
+        and summary["calls"] == 1
+        and summary["tokens"] == 2
+    )
+    assert ledger_stats()["runs"] == 1 and ledger_stats()["calls"] == 1
+
+
+def test_deferred_query_degrades_to_builtin_fix():
+    sched = InferenceScheduler(read=lambda: SWAPPING, queue_timeout=0)
+    with mock.patch.object(scheduler, "_scheduler", sched), mock.patch.object(
+        ai, "get_client"
+    ) as client:
+        client.return_value.loaded_models.return_value = set()
+        response = ai.query_lfm25_thinking("prompt")
+        assert ai.is_failed_response(response) and "host under pressure" in response
+        client.return_value.generate.assert_not_called()
+        issue = Issue("storage", "Disk / is 97% full", subject="/")
+        fix = mock.Mock()
+        with mock.patch.object(
+            core, "is_ollama_running", return_value=True
+        ), mock.patch.dict("sysfixai.fixes._FIXES", {"storage": fix}):
+            results = core.ai_auto_fix([issue], use_cache=False)
+    fix.assert_called_once_with(issue)
+    assert [result.status for result in results] == ["ok"]
+    assert ledger_stats()["calls"] == 2
+
+
+def test_is_ollama_running_follows_configured_hosts(ollama_stub):
+    with mock.patch.object(core, "OLLAMA_HOST", "127.0.0.1:1"), mock.patch.object(
+        core, "OLLAMA_REMOTE", None
+    ):
+        assert not core.is_ollama_running()
+    with mock.patch.object(core, "OLLAMA_HOST", "127.0.0.1:1"), mock.patch.object(
+        core, "OLLAMA_REMOTE", f"http://{ollama_stub.address}"
+    ):
+        assert core.is_ollama_running()
+    with mock.patch.object(core, "OLLAMA_HOST", ollama_stub.address):
+        assert core.is_ollama_running()
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from unittest import mock
+
+from sysfixai import core
+from sysfixai.sensors import (
+    ClockStats,
+    SensorSampler,
+    Window,
+    is_throttling,
+    percentile,
+)
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def fake_sysfs(tmp_path, temp_c=50, mhz=3000, crit_c=100):
+    root = tmp_path / "sys"
+    hwmon = root / "class/hwmon/hwmon0"
+    write(hwmon / "name", "coretemp\n")
+    write(hwmon / "temp1_input", f"{int(temp_c * 1000)}\n")
+    write(hwmon / "temp1_label", "Package id 0\n")
+    write(hwmon / "temp1_crit", f"{int(crit_c * 1000)}\n")
+    cpu = root / "devices/system/cpu/cpu0"
+    write(cpu / "cpufreq/scaling_cur_freq", f"{mhz * 1000}\n")
+    write(cpu / "cpufreq/cpuinfo_max_freq", "3000000\n")
+    write(cpu / "thermal_throttle/core_throttle_count", "0\n")
+    proc = tmp_path / "proc"
+    write(proc / "stat", "cpu  100 0 100 800 0 0 0 0 0 0\n")
+    return root, proc
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert (
+        percentile(values, 50),
+        percentile(values, 95),
+        percentile(values, 100),
+    ) == (50, 95, 100)
+    assert percentile([], 50) is None
+
+
+def test_sampler_reuses_descriptors_and_sees_spikes(tmp_path):
+    root, proc = fake_sysfs(tmp_path)
+    sampler = SensorSampler(root=str(root), proc_root=str(proc))
+    fds = len(os.listdir("/proc/self/fd"))
+
+    def spike():
+        time.sleep(0.1)
+        (root / "class/hwmon/hwmon0/temp1_input").write_text("97000\n")
+        time.sleep(0.03)
+        (root / "class/hwmon/hwmon0/temp1_input").write_text("50000\n")
+
+    writer = threading.Thread(target=spike)
+    writer.start()
+    window = sampler.sample(0.3, interval=0.005)
+    writer.join()
+    assert len(os.listdir("/proc/self/fd")) == fds
+    stats = window.sensors[0]
+    assert (stats.sensor, stats.label, stats.critical) == (
+        "coretemp",
+        "Package id 0",
+        100,
+    )
+    assert stats.p50 == 50 and stats.max == 97 and stats.samples > 20
+    assert window.clock.ratio == 1.0 and window.clock.throttle_events == 0
+    sampler.close()
+
+
+def test_check_temperatures_reports_sustained_heat_and_throttle_events(tmp_path):
+    root, proc = fake_sysfs(tmp_path, temp_c=91, mhz=1200, crit_c=85)
+    sampler = SensorSampler(root=str(root), proc_root=str(proc))
+    counter = root / "devices/system/cpu/cpu0/thermal_throttle/core_throttle_count"
+    original = sampler.read_temperatures
+
+    def read_and_throttle():
+        counter.write_text("4\n")
+        return original()
+
+    with mock.patch.object(
+        core, "get_sampler", return_value=sampler
+    ), mock.patch.object(core, "SENSOR_WINDOW", 0.05), mock.patch.object(
+        sampler, "read_temperatures", side_effect=read_and_throttle
+    ):
+        issues = core.check_temperatures()
+    kinds = {issue.kind: issue for issue in issues}
+    assert kinds["temperature"].severity == "critical"
+    assert "p95 91.0" in kinds["temperature"].message
+    assert "4 throttle events" in kinds["throttling"].message
+    sampler.close()
+
+
+def test_low_clock_only_counts_when_hot_and_busy():
+    def window(ratio, busy):
+        return Window(1.0, [], ClockStats(ratio * 3000, 3000, ratio, busy, None))
+
+    assert is_throttling(window(0.4, 0.9), hot=True)
+    # idle cores clock down on their own
+    assert not is_throttling(window(0.4, 0.1), hot=True)
+    assert not is_throttling(window(0.4, 0.9), hot=False)
+    assert not is_throttling(window(0.95, 0.9), hot=True)
+
+
+def test_check_temperatures_uses_the_sensor_critical_limit(tmp_path):
+    root, proc = fake_sysfs(tmp_path, temp_c=91, crit_c=100)
+    sampler = SensorSampler(root=str(root), proc_root=str(proc))
+    with mock.patch.object(
+        core, "get_sampler", return_value=sampler
+    ), mock.patch.object(core, "SENSOR_WINDOW", 0):
+        assert core.check_temperatures() == []
+        (root / "class/hwmon/hwmon0/temp1_input").write_text("102000\n")
+        (issue,) = core.check_temperatures()
+    assert issue.severity == "critical" and issue.threshold == 100
+    sampler.close()
+
+
+def test_check_temperatures_detects_throttling_without_sensors(tmp_path):
+    root, proc = fake_sysfs(tmp_path)
+    for name in ("temp1_input", "temp1_label", "temp1_crit"):
+        (root / "class/hwmon/hwmon0" / name).unlink()
+    sampler = SensorSampler(root=str(root), proc_root=str(proc))
+    assert not sampler.sensors
+    counter = root / "devices/system/cpu/cpu0/thermal_throttle/core_throttle_count"
+    original = sampler.read_temperatures
+
+    def read_and_throttle():
+        counter.write_text("2\n")
+        return original()
+
+    with mock.patch.object(
+        core, "get_sampler", return_value=sampler
+    ), mock.patch.object(core, "SENSOR_WINDOW", 0.05), mock.patch.object(
+        sampler, "read_temperatures", side_effect=read_and_throttle
+    ):
+        issues = core.check_temperatures()
+    assert [issue.kind for issue in issues] == ["throttling"]
+    assert "2 throttle events" in issues[0].message
+    sampler.close()
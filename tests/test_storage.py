@@ -0,0 +1,104 @@
+import os
+from unittest import mock
+
+from sysfixai import core, storage
+from sysfixai.storage import MountUsage, largest_directories, scan_tree
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(os.urandom(size))
+
+
+def make_tree(root):
+    write(os.path.join(root, "big", "a.bin"), 256 * 1024)
+    write(os.path.join(root, "big", "nested", "b.bin"), 256 * 1024)
+    write(os.path.join(root, "small", "c.bin"), 8 * 1024)
+    os.symlink(os.path.join(root, "big"), os.path.join(root, "link"))
+
+
+def test_scan_tree_rolls_sizes_up(tmp_path):
+    tmp_path = tmp_path / "tree"
+    make_tree(str(tmp_path))
+    result = scan_tree(str(tmp_path), workers=4)
+    sizes = result.sizes
+    assert result.complete
+    big = sizes[str(tmp_path / "big")]
+    assert big >= 512 * 1024
+    assert big > sizes[str(tmp_path / "big" / "nested")] > 0
+    # The symlink itself may occupy a block, but its target is not counted twice.
+    assert big + sizes[str(tmp_path / "small")] <= sizes[str(tmp_path)] < 2 * big
+    assert str(tmp_path / "link") not in sizes
+
+
+def test_scan_of_filesystem_root_rolls_up_children_first():
+    tree = {"/": (1, ["/usr"]), "/usr": (10, ["/usr/lib"]), "/usr/lib": (100, [])}
+    with mock.patch.object(storage, "_scan_dir", side_effect=lambda p, dev: tree[p]):
+        sizes = scan_tree("/", workers=1).sizes
+    assert sizes == {"/": 111, "/usr": 110, "/usr/lib": 100}
+
+
+def test_largest_directories_depth_and_budget(tmp_path):
+    tmp_path = tmp_path / "tree"
+    make_tree(str(tmp_path))
+    dirs, complete = largest_directories(str(tmp_path), top_n=2, max_depth=1)
+    assert complete
+    assert [d.path for d in dirs] == [str(tmp_path / "big"), str(tmp_path / "small")]
+    assert not scan_tree(str(tmp_path), max_depth=0).complete
+    assert not scan_tree(str(tmp_path), time_budget=0).complete
+
+
+def test_check_storage_reports_bytes_and_inodes():
+    usages = [
+        MountUsage("/", "/dev/sda1", "ext4", 100, 95, 5, 95.0, 1000, 100, 10.0),
+        MountUsage("/srv", "/dev/sdb1", "xfs", 100, 10, 90, 10.0, 1000, 990, 99.0),
+    ]
+    with mock.patch.object(core, "all_mount_usage", return_value=usages):
+        issues = core.check_storage()
+    assert [(i.kind, i.subject) for i in issues] == [
+        ("storage", "/"),
+        ("inodes", "/srv"),
+    ]
+
+
+def test_reclaim_candidates_ranked_by_measured_bytes():
+    with mock.patch.object(
+        storage.shutil,
+        "which",
+        side_effect=lambda tool: tool in ("dnf", "apt-get", "journalctl"),
+    ), mock.patch.object(storage, "tree_size", return_value=10), mock.patch.object(
+        storage, "package_cache_size", return_value=500
+    ), mock.patch.object(
+        storage, "journal_reclaimable", return_value=0
+    ):
+        plan = storage.reclaim_candidates()
+    assert [(r.name, r.estimate) for r in plan] == [
+        ("dnf package cache", 500),
+        ("apt package cache", 10),
+    ]
+
+
+def test_package_cache_size_counts_only_packages(tmp_path):
+    write(
+        str(tmp_path / "dnf" / "fedora-1234" / "repodata" / "primary.xml.zst"),
+        512 * 1024,
+    )
+    write(str(tmp_path / "dnf" / "fedora-1234" / "packages" / "foo.rpm"), 128 * 1024)
+    write(
+        str(tmp_path / "libdnf5" / "updates-5678" / "packages" / "bar.rpm"), 64 * 1024
+    )
+    size = storage.package_cache_size(
+        str(tmp_path / "dnf"), str(tmp_path / "libdnf5"), str(tmp_path / "missing")
+    )
+    assert 192 * 1024 <= size < 512 * 1024
+
+
+def test_free_space_dry_run_runs_nothing(capsys):
+    plan = [storage.Reclaim("apt package cache", ["apt-get", "clean"], 2048)]
+    with mock.patch.object(
+        core, "reclaim_candidates", return_value=plan
+    ), mock.patch.object(core.subprocess, "run") as run:
+        core.free_space(dry_run=True)
+    run.assert_not_called()
+    assert "2.0 KiB" in capsys.readouterr().out
@@ -0,0 +1,29 @@
+import json
+
+from sysfixai import trace
+
+
+def test_spans_recorded_only_when_enabled(tmp_path):
+    with trace.span("ignored", "check"):
+        pass
+    trace.enable()
+    try:
+        with trace.span("outer", "check", host="x"):
+            with trace.span("inner", "subprocess"):
+                pass
+        with trace.span("inner", "subprocess"):
+            pass
+    finally:
+        trace.disable()
+    recorded = trace.spans()
+    assert [s.name for s in recorded] == ["inner", "outer", "inner"]
+    rows = {
+        (category, name): count
+        for category, name, count, _, _ in trace.summary(recorded)
+    }
+    assert rows == {("check", "outer"): 1, ("subprocess", "inner"): 2}
+    path = tmp_path / "trace.json"
+    trace.write_chrome_trace(str(path), recorded)
+    events = json.loads(path.read_text())["traceEvents"]
+    assert {e["ph"] for e in events} == {"X"}
+    assert events[1]["args"] == {"host": "x"}
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from sysfixai import core
+from sysfixai.procsnap import ProcessSnapshot
+from sysfixai.sensors import SensorSampler
+from sysfixai.watch import Sampler, diff_issues, issue_key, watch
+from tests.test_sensors import fake_sysfs
+
+MB = 1024 * 1024
+
+
+def test_diff_reports_new_changed_cleared():
+    previous = {
+        issue_key(i): i
+        for i in ["Storage almost full: 91.0% used.", "Audio system check failed."]
+    }
+    current = {
+        issue_key(i): i
+        for i in [
+            "Storage almost full: 95.0% used.",
+            "High temperature alert: cpu at 90.0°C.",
+        ]
+    }
+    changes = {c.kind: c for c in diff_issues(previous, current)}
+    assert changes["changed"].issue == "Storage almost full: 95.0% used."
+    assert changes["changed"].previous == "Storage almost full: 91.0% used."
+    assert changes["new"].issue.startswith("High temperature")
+    assert changes["cleared"].issue.startswith("Audio")
+
+
+def test_watch_reports_only_differences_and_reads_static_once():
+    readings = iter([["a 1"], ["a 1"], ["a 2", "b"], []])
+    static_calls = []
+
+    def check_dynamic():
+        return next(readings)
+
+    def check_static():
+        static_calls.append(1)
+        return ["Node: test"]
+
+    sampler = Sampler(checks=[check_dynamic], static=[check_static], timeout=5)
+    assert sampler.static_facts() == sampler.static_facts()
+    assert [issue.message for issue in sampler.static_facts()] == ["Node: test"]
+    reports = []
+    watch(0, reports.append, sampler=sampler, iterations=4, sleep=lambda s: None)
+    kinds = [[c.kind for c in changes] for changes in reports]
+    assert kinds == [["new"], ["changed", "new"], ["cleared", "cleared"]]
+    assert len(static_calls) == 1
+    assert sampler.samples == 4
+
+
+def test_live_readings_do_not_count_as_changes():
+    rss = iter([900.0, 900.4, 910.0, 930.0, 930.0])
+
+    def snapshot(*args, **kwargs):
+        return ProcessSnapshot([(4242, "hog", int(next(rss) * MB), ["hog"], 1000.0)])
+
+    with mock.patch.object(core, "get_snapshot", side_effect=snapshot):
+        sampler = Sampler(checks=[core.check_memory], static=[], timeout=5)
+        kinds = [[c.kind for c in sampler.sample()] for _ in range(5)]
+    # 900.0 -> 900.4 -> 910.0 stay within 5% of the 500 MB threshold of what was
+    # reported;
+    # by 930.0 the drift since the last report adds up to 30 MB.
+    assert kinds == [["new"], [], [], ["changed"], []]
+
+
+def test_temperature_changes_follow_severity_and_drift(tmp_path):
+    root, proc = fake_sysfs(tmp_path, temp_c=90.0, crit_c=85)
+    temp = root / "class/hwmon/hwmon0/temp1_input"
+    sensors = SensorSampler(root=str(root), proc_root=str(proc))
+    sampler = Sampler(checks=[core.check_temperatures], static=[], timeout=5)
+    kinds = []
+    with mock.patch.object(
+        core, "get_sampler", return_value=sensors
+    ), mock.patch.object(core, "SENSOR_WINDOW", 0):
+        for celsius in (90.0, 90.7, 96.0, 84.0):
+            temp.write_text(f"{int(celsius * 1000)}\n")
+            kinds.append(
+                [c.kind for c in sampler.sample() if c.issue.kind == "temperature"]
+            )
+    sensors.close()
+    assert kinds == [["new"], [], ["changed"], ["cleared"]]